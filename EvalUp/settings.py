@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # PRIMERO PARA QUE EL TIEMPO TOTAL INCLUYA AL RESTO DE MIDDLEWARES
+    'api.instrumentacion.InstrumentacionMiddleware',
+    # DETECTOR DE CONSULTAS N+1 (SOLO CON DETECTOR_N1=True, EN DESARROLLO)
+    'api.detector.DetectorN1Middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -104,6 +109,12 @@ DATABASES = {
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
+# Login por correo: carga usuario y persona en una consulta (api/backends.py)
+AUTHENTICATION_BACKENDS = [
+    'api.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -140,12 +151,55 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caché compartida entre procesos: sellos de versión de los catálogos y de los tokens.
+# Por defecto en la base de datos (python manage.py createcachetable); para Redis o
+# Memcached se cambian CACHE_BACKEND y CACHE_LOCATION. Con un backend por proceso
+# (LocMemCache) los cambios no llegan a los otros workers (check api.W001). La caché
+# de tokens (TOKEN_CACHE_*) solo se activa con Redis o Memcached: con la base de datos
+# leer el sello cuesta una consulta por request, lo mismo que validar el token
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='evalup_cache'),
+    }
+}
+
+# Segundos entre lecturas del sello de versión de los catálogos: demora máxima con la
+# que un catálogo modificado en un proceso se recarga en los demás
+CATALOGOS_VERIFICACION = config('CATALOGOS_VERIFICACION', default=5, cast=float)
+
 # settings.py
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.autenticacion.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ]
 }
+
+# Serializador de exámenes por defecto: 'orm' (instancias) o 'values' (values_list)
+EXAM_SERIALIZER_BACKEND = config('EXAM_SERIALIZER_BACKEND', default='orm')
+
+# Generador de exámenes con IA usado por el worker (python manage.py worker_generacion).
+# Debe ser una clase con el método generar(trabajo) que devuelve el resultado
+EXAM_GENERATOR_BACKEND = config('EXAM_GENERATOR_BACKEND', default='api.trabajos.GeneradorStub')
+GENERADOR_STUB_LATENCIA = config('GENERADOR_STUB_LATENCIA', default=0, cast=float)
+GENERADOR_STUB_FALLOS = config('GENERADOR_STUB_FALLOS', default=0, cast=float)
+
+# Tokens de autenticación: vigencia desde el login y caché token -> usuario por proceso
+TOKEN_EXPIRACION = timedelta(hours=config('TOKEN_EXPIRACION_HORAS', default=24 * 7, cast=int))
+TOKEN_CACHE_TTL = config('TOKEN_CACHE_TTL', default=60, cast=int)
+TOKEN_CACHE_MAXIMO = config('TOKEN_CACHE_MAXIMO', default=10000, cast=int)
+
+# Instrumentación por request (Server-Timing y /metrics): fracción de requests medidos
+# (0 = desactivada: el middleware se quita de la cadena al iniciar)
+INSTRUMENTACION_MUESTREO = config('INSTRUMENTACION_MUESTREO', default=0, cast=float)
+# Token del scraper de /metrics (Authorization: Bearer <token>); sin token solo acceden usuarios staff
+INSTRUMENTACION_METRICS_TOKEN = config('INSTRUMENTACION_METRICS_TOKEN', default='')
+
+# Detector de consultas N+1 (desarrollo): advierte (o falla, en modo estricto) cuando una
+# forma de consulta se repite desde la misma línea o una vista supera su presupuesto_consultas
+DETECTOR_N1 = config('DETECTOR_N1', default=False, cast=bool)
+DETECTOR_N1_ESTRICTO = config('DETECTOR_N1_ESTRICTO', default=False, cast=bool)
+DETECTOR_N1_REPETICIONES = config('DETECTOR_N1_REPETICIONES', default=3, cast=int)
@@ -1,5 +1,8 @@
 from django.urls import path, include
 
+from api.instrumentacion import metrics_view
+
 urlpatterns = [
     path('api/', include('api.urls')),
-]
\ No newline at end of file
+    path('metrics', metrics_view, name='metrics'),
+]
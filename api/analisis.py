@@ -0,0 +1,305 @@
+import hashlib
+import time
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .calificacion import CalificacionService
+from .models import Examen, Pregunta, Respuesta, AnalisisItem
+
+# Dependencia opcional: sin numpy el análisis de ítems no está disponible
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Presentaciones mínimas de un ítem para calcular su discriminación
+PRESENTACIONES_MINIMAS = 3
+
+# Exámenes por consulta de temas, preguntas y respuestas (listas IN acotadas)
+IDS_POR_CONSULTA = 5000
+
+
+def normalizar(texto):
+    """Texto sin diferencias de espacios ni de mayúsculas, para reconocer el mismo ítem u opción"""
+    return ' '.join((texto or '').split()).casefold()
+
+
+def clave_item(enunciado):
+    return hashlib.sha1(normalizar(enunciado).encode('utf-8')).hexdigest()
+
+
+def calcular(fila, item, celda, opcion, es_correcta, seleccionada, n_filas, n_items, n_opciones):
+    """
+    Estadísticas clásicas de los ítems, vectorizadas con numpy
+
+    La matriz estudiantes × ítems se recibe dispersa: una "celda" por cada
+    pregunta presentada (fila = examen, item = ítem) y una entrada por cada
+    opción de esas preguntas. Una celda es un acierto con la misma regla que
+    ``CalificacionService``: se marcaron exactamente las opciones correctas.
+
+    Args:
+        fila, item: Por celda, índice del examen (0..n_filas) y del ítem (0..n_items)
+        celda, opcion: Por opción presentada, índice de su celda y de la opción (0..n_opciones)
+        es_correcta, seleccionada: Por opción presentada, booleanos
+
+    Returns:
+        Dict de arrays: por ítem ``presentaciones``, ``dificultad`` (proporción de
+        aciertos) y ``discriminacion`` (correlación punto biserial entre el acierto
+        y la proporción de aciertos en el resto del examen; NaN si no se puede
+        calcular); por opción ``opcion_presentaciones``,
+        ``opcion_proporcion`` (proporción de presentaciones en que se eligió) y
+        ``opcion_correcta``
+    """
+    if np is None:
+        raise RuntimeError('El análisis de ítems necesita el paquete numpy')
+
+    fila = np.asarray(fila, dtype=np.int64)
+    item = np.asarray(item, dtype=np.int64)
+    celda = np.asarray(celda, dtype=np.int64)
+    opcion = np.asarray(opcion, dtype=np.int64)
+    es_correcta = np.asarray(es_correcta, dtype=bool)
+    seleccionada = np.asarray(seleccionada, dtype=bool)
+    n_celdas = len(fila)
+
+    # Acierto por celda
+    correctas = np.bincount(celda, weights=es_correcta, minlength=n_celdas)
+    marcadas_correctas = np.bincount(celda, weights=es_correcta & seleccionada, minlength=n_celdas)
+    marcadas_incorrectas = np.bincount(celda, weights=~es_correcta & seleccionada, minlength=n_celdas)
+    acierto = ((correctas > 0) & (marcadas_correctas == correctas) & (marcadas_incorrectas == 0)).astype(np.float64)
+
+    # Dificultad
+    presentaciones = np.bincount(item, minlength=n_items)
+    aciertos = np.bincount(item, weights=acierto, minlength=n_items)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dificultad = aciertos / presentaciones
+
+    # Discriminación: el puntaje de la fila sin el propio ítem (corrige la autocorrelación)
+    suma_fila = np.bincount(fila, weights=acierto, minlength=n_filas)
+    n_fila = np.bincount(fila, minlength=n_filas)
+    validas = n_fila[fila] > 1
+    x = acierto[validas]
+    y = (suma_fila[fila][validas] - x) / (n_fila[fila][validas] - 1)
+    it = item[validas]
+    n = np.bincount(it, minlength=n_items).astype(np.float64)
+    sx = np.bincount(it, weights=x, minlength=n_items)
+    sy = np.bincount(it, weights=y, minlength=n_items)
+    sxy = np.bincount(it, weights=x * y, minlength=n_items)
+    syy = np.bincount(it, weights=y * y, minlength=n_items)
+    # x es 0/1: la suma de x² es la suma de x
+    covarianza = n * sxy - sx * sy
+    varianza_x = n * sx - sx * sx
+    varianza_y = n * syy - sy * sy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discriminacion = covarianza / np.sqrt(varianza_x * varianza_y)
+    # Sin variación en el acierto o en el resto del examen (con tolerancia al error de redondeo)
+    discriminacion[(n < PRESENTACIONES_MINIMAS) | (varianza_x <= 0) | (varianza_y <= 1e-9 * n * n)] = np.nan
+
+    # Opciones (distractores)
+    opcion_presentaciones = np.bincount(opcion, minlength=n_opciones)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        opcion_proporcion = np.bincount(opcion, weights=seleccionada, minlength=n_opciones) / opcion_presentaciones
+        # Si el mismo texto fue correcto en unas preguntas e incorrecto en otras, decide la mayoría
+        opcion_correcta = np.bincount(opcion, weights=es_correcta, minlength=n_opciones) * 2 > opcion_presentaciones
+
+    return {
+        'presentaciones': presentaciones,
+        'dificultad': dificultad,
+        'discriminacion': discriminacion,
+        'opcion_presentaciones': opcion_presentaciones,
+        'opcion_proporcion': opcion_proporcion,
+        'opcion_correcta': opcion_correcta,
+    }
+
+
+class AnalisisItemsService:
+    """
+    Análisis clásico de los ítems del banco de preguntas (``AnalisisItem``)
+
+    Como cada examen generado tiene sus propias filas de Pregunta, un ítem es un
+    enunciado (normalizado) dentro de un grupo (área, tema, nivel): las preguntas
+    con el mismo enunciado en exámenes distintos son presentaciones del mismo
+    ítem, y las opciones se reconocen por su texto. Un examen con varios temas
+    cuenta en el grupo de cada uno. Solo cuentan los exámenes entregados o
+    calificados, por quien sea (``CalificacionService.entregados``).
+
+    Los datos se leen con cuatro consultas ``values_list`` por refresco y las
+    métricas se calculan para todos los ítems a la vez con ``calcular``.
+    """
+
+    @staticmethod
+    def grupos_modificados(desde):
+        """
+        Pares (area_estudio_id, nivel_id) con exámenes, preguntas o respuestas modificados después de ``desde``
+        """
+        consultas = (
+            Examen.objects.filter(updated_at__gt=desde).values_list('area_estudio_id', 'nivel_id'),
+            Pregunta.objects.filter(updated_at__gt=desde).values_list(
+                'examen__area_estudio_id', 'examen__nivel_id'
+            ),
+            Respuesta.objects.filter(updated_at__gt=desde).values_list(
+                'pregunta__examen__area_estudio_id', 'pregunta__examen__nivel_id'
+            ),
+        )
+        return {par for consulta in consultas for par in consulta.order_by().distinct()}
+
+    @staticmethod
+    def _filtro_grupos(grupos):
+        """Q que selecciona los pares (area_estudio_id, nivel_id), con NULL incluido"""
+        def condicion(campo, valor):
+            return Q(**{f'{campo}__isnull': True} if valor is None else {campo: valor})
+        return reduce(or_, (condicion('area_estudio_id', area) & condicion('nivel_id', nivel) for area, nivel in grupos))
+
+    @classmethod
+    def cargar(cls, grupos=None):
+        """
+        Lee las presentaciones de los exámenes de los grupos y las indexa para ``calcular``
+
+        Args:
+            grupos: Pares (area_estudio_id, nivel_id) o None para todos
+
+        Returns:
+            Tupla (argumentos de ``calcular``, ítems, opciones) donde ítems es una lista de
+            (area_estudio_id, tema_id, nivel_id, clave, enunciado) y opciones de (índice del ítem, texto)
+        """
+        examenes = CalificacionService.entregados()
+        if grupos is not None:
+            examenes = examenes.filter(cls._filtro_grupos(grupos))
+        # Los ids se leen una sola vez: con una subconsulta, un examen calificado entre
+        # una consulta y la siguiente aparecería en las preguntas pero no en ``filas``
+        filas_examenes = list(examenes.values_list('id', 'area_estudio_id', 'nivel_id'))
+        bloques = [
+            [examen_id for examen_id, _, _ in filas_examenes[inicio:inicio + IDS_POR_CONSULTA]]
+            for inicio in range(0, len(filas_examenes), IDS_POR_CONSULTA)
+        ]
+
+        temas = {}
+        for ids in bloques:
+            for examen_id, tema_id in Examen.tema.through.objects.filter(examen_id__in=ids).values_list(
+                'examen_id', 'temaareaestudio_id'
+            ):
+                temas.setdefault(examen_id, []).append(tema_id)
+
+        # Filas de la matriz: (examen, tema); un examen aparece una vez por cada tema
+        filas, n_filas = {}, 0
+        for examen_id, area_id, nivel_id in filas_examenes:
+            filas[examen_id] = []
+            for tema_id in temas.get(examen_id) or [None]:
+                filas[examen_id].append((n_filas, (area_id, tema_id, nivel_id)))
+                n_filas += 1
+
+        items, indice_item = [], {}
+        fila, item, celdas_pregunta = [], [], {}
+        preguntas = (
+            fila_pregunta for ids in bloques
+            for fila_pregunta in Pregunta.objects.filter(examen_id__in=ids).values_list('id', 'examen_id', 'enunciado')
+        )
+        for pregunta_id, examen_id, enunciado in preguntas:
+            clave = clave_item(enunciado)
+            celdas = celdas_pregunta[pregunta_id] = []
+            for indice, grupo in filas[examen_id]:
+                indice_it = indice_item.get((grupo, clave))
+                if indice_it is None:
+                    indice_it = indice_item[(grupo, clave)] = len(items)
+                    items.append((*grupo, clave, enunciado or ''))
+                celdas.append(len(fila))
+                fila.append(indice)
+                item.append(indice_it)
+
+        opciones, indice_opcion = [], {}
+        celda, opcion, es_correcta, seleccionada = [], [], [], []
+        respuestas = (
+            fila_respuesta for ids in bloques
+            for fila_respuesta in Respuesta.objects.filter(pregunta__examen_id__in=ids).values_list(
+                'pregunta_id', 'texto', 'es_correcta', 'seleccionada'
+            )
+        )
+        for pregunta_id, texto, correcta, marcada in respuestas:
+            texto_normalizado = normalizar(texto)
+            for indice_celda in celdas_pregunta.get(pregunta_id, ()):
+                clave = (item[indice_celda], texto_normalizado)
+                indice_op = indice_opcion.get(clave)
+                if indice_op is None:
+                    indice_op = indice_opcion[clave] = len(opciones)
+                    opciones.append((item[indice_celda], texto or ''))
+                celda.append(indice_celda)
+                opcion.append(indice_op)
+                es_correcta.append(correcta)
+                seleccionada.append(marcada)
+
+        argumentos = {
+            'fila': fila, 'item': item, 'celda': celda, 'opcion': opcion,
+            'es_correcta': es_correcta, 'seleccionada': seleccionada,
+            'n_filas': n_filas, 'n_items': len(items), 'n_opciones': len(opciones),
+        }
+        return argumentos, items, opciones
+
+    @staticmethod
+    def armar(resultado, items, opciones, calculado_en):
+        """Instancias de AnalisisItem (sin guardar) a partir del resultado de ``calcular``"""
+        opciones_por_item = [[] for _ in items]
+        for indice, (indice_item, texto) in enumerate(opciones):
+            opciones_por_item[indice_item].append({
+                'texto': texto,
+                'es_correcta': bool(resultado['opcion_correcta'][indice]),
+                'presentaciones': int(resultado['opcion_presentaciones'][indice]),
+                'proporcion': round(float(resultado['opcion_proporcion'][indice]), 4),
+            })
+
+        analisis = []
+        for indice, (area_id, tema_id, nivel_id, clave, enunciado) in enumerate(items):
+            discriminacion = float(resultado['discriminacion'][indice])
+            analisis.append(AnalisisItem(
+                area_estudio_id=area_id, tema_id=tema_id, nivel_id=nivel_id,
+                clave=clave, enunciado=enunciado,
+                presentaciones=int(resultado['presentaciones'][indice]),
+                dificultad=float(resultado['dificultad'][indice]),
+                discriminacion=None if np.isnan(discriminacion) else round(discriminacion, 4),
+                opciones=sorted(opciones_por_item[indice], key=lambda o: -o['proporcion']),
+                calculado_en=calculado_en,
+            ))
+        return analisis
+
+    @classmethod
+    def refrescar(cls, todo=False):
+        """
+        Recalcula el análisis de los grupos (área, nivel) con cambios desde el último refresco
+
+        Un grupo se recalcula entero (con todos sus temas) si alguno de sus exámenes,
+        preguntas o respuestas tiene ``updated_at`` posterior al último cálculo. Los
+        cambios que no tocan ``updated_at`` (``QuerySet.update``, temas de un examen)
+        solo se ven con ``todo=True``.
+
+        Returns:
+            Dict con ``grupos`` (None si se recalculó todo), ``items``, ``presentaciones``,
+            ``opciones``, ``segundos_lectura`` y ``segundos_calculo``
+        """
+        # Se toma antes de leer: lo que cambie durante el refresco se verá en el próximo
+        calculado_en = timezone.now()
+        ultimo = None if todo else AnalisisItem.objects.aggregate(ultimo=Max('calculado_en'))['ultimo']
+        grupos = None if ultimo is None else cls.grupos_modificados(ultimo)
+        resultado = {'grupos': None if grupos is None else len(grupos), 'items': 0, 'presentaciones': 0,
+                     'opciones': 0, 'segundos_lectura': 0.0, 'segundos_calculo': 0.0}
+        if grupos is not None and not grupos:
+            return resultado
+
+        inicio = time.perf_counter()
+        argumentos, items, opciones = cls.cargar(grupos)
+        resultado['segundos_lectura'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        analisis = cls.armar(calcular(**argumentos), items, opciones, calculado_en)
+        resultado['segundos_calculo'] = time.perf_counter() - inicio
+
+        with transaction.atomic():
+            existentes = AnalisisItem.objects.all()
+            if grupos is not None:
+                existentes = existentes.filter(cls._filtro_grupos(grupos))
+            existentes.delete()
+            AnalisisItem.objects.bulk_create(analisis, batch_size=1000)
+
+        resultado.update(items=len(items), presentaciones=len(argumentos['fila']), opciones=len(argumentos['opcion']))
+        return resultado
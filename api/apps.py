@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registra las señales que mantienen las estadísticas por persona
+        from . import signals  # noqa: F401
+        # Verifica que la caché de los sellos de versión sea compartida
+        from . import checks  # noqa: F401
@@ -0,0 +1,139 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from core.models import Persona
+from .autenticacion import aautenticar_token
+from .catalogos import catalogos
+from .condicional import calcular_etag, respuesta_condicional, agregar_etag
+from .estadisticas import EstadisticasPersonaService
+from .examen import ExamReportService, ExamReportAPIView
+from .models import Examen
+from .paginacion import KeysetPaginator, CursorInvalido
+from .proyeccion import Proyeccion, ProyeccionInvalida
+from .renderizado import render_response
+from .serializacion import ExamValuesSerializer
+
+# Vistas async nativas para despliegues ASGI (EvalUp/asgi.py).
+# Devuelven lo mismo que mainview.get_examenes y examen.exam_report_view, pero
+# consultan con el ORM async en lugar de ocupar un hilo por request. Usan siempre
+# el serializador ``values``: el ORM async no admite prefetch_related.
+
+
+def _error(mensaje, status):
+    return JsonResponse({'error': True, 'message': mensaje}, status=status)
+
+
+async def _preparar(request, alcance_queryset, *alcance):
+    """
+    Carga los catálogos y calcula el ETag
+
+    Las consultas de catálogos y del validador del ETag no tienen API async y se
+    ejecutan juntas en un solo salto a hilo.
+
+    Args:
+        alcance_queryset: Función que devuelve el QuerySet de exámenes a validar
+            (se llama después de cargar los catálogos, que usan los filtros)
+    """
+    def sincronico():
+        catalogos.precargar()
+        return calcular_etag(request, alcance_queryset(), *alcance)
+    return await sync_to_async(sincronico)()
+
+
+async def get_examenes_async(request):
+    """
+    Versión async de ``mainview.get_examenes`` (mismos parámetros y respuesta)
+    """
+    if request.method != 'GET':
+        return _error('Método no permitido', 405)
+
+    user = await aautenticar_token(request)
+    if user is None:
+        return _error('Las credenciales de autenticación no se proveyeron o no son válidas', 401)
+
+    try:
+        proyeccion = Proyeccion.desde_request(request)
+        etag = await _preparar(request, lambda: Examen.objects.filter(persona__user_id=user.id), user.id)
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return agregar_etag(no_modificado, etag)
+
+        persona = await Persona.objects.only('id').aget(user_id=user.id)
+        estadisticas = await EstadisticasPersonaService.aobtener(persona.id)
+        if not estadisticas['cantidad']:
+            return agregar_etag(render_response(request, {'examenes': [], 'cantidad': 0, 'promedio': 0, 'next': None}), etag)
+
+        examenes = ExamReportService.get_exam_complete_data(persona_id=persona.id, proyeccion=proyeccion).filter(
+            is_active=True
+        )
+        filas, next_cursor = await KeysetPaginator(request.GET.get('page_size')).apaginate(
+            ExamValuesSerializer.exam_rows(examenes, proyeccion), request.GET.get('cursor')
+        )
+        jsonexamenes = await ExamValuesSerializer.aserialize_rows(filas, proyeccion=proyeccion)
+
+        return agregar_etag(render_response(request, {
+            'examenes': jsonexamenes,
+            'cantidad': estadisticas['cantidad'],
+            'promedio': estadisticas['promedio'],
+            'next': next_cursor
+        }), etag)
+    except Exception as ex:
+        return JsonResponse({'error': str(ex)}, status=400)
+
+
+async def exam_report_async(request, exam_id=None):
+    """
+    Versión async de ``examen.exam_report_view`` (solo administradores)
+
+    Acepta los mismos filtros y la paginación por cursor; el formato NDJSON solo
+    está disponible en la vista sincrónica.
+    """
+    if request.method != 'GET':
+        return _error('Método no permitido', 405)
+
+    user = await aautenticar_token(request)
+    if user is None:
+        return _error('Las credenciales de autenticación no se proveyeron o no son válidas', 401)
+    if not user.is_staff:
+        return _error('No tiene permiso para realizar esta acción', 403)
+
+    persona_id, filters = ExamReportAPIView().get_filters(request)
+    filters = filters or None
+    try:
+        proyeccion = Proyeccion.desde_request(request)
+    except ProyeccionInvalida as e:
+        return _error(str(e), 400)
+
+    try:
+        etag = await _preparar(
+            request, lambda: ExamReportService.apply_filters(Examen.objects.all(), exam_id, persona_id, filters),
+            exam_id, persona_id
+        )
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return agregar_etag(no_modificado, etag)
+
+        examenes_queryset = ExamReportService.get_exam_complete_data(exam_id, persona_id, filters, proyeccion)
+        filas_queryset = ExamValuesSerializer.exam_rows(examenes_queryset, proyeccion)
+        cursor, page_size = request.GET.get('cursor'), request.GET.get('page_size')
+        if cursor or page_size:
+            filas, next_cursor = await KeysetPaginator(page_size).apaginate(filas_queryset, cursor)
+        else:
+            filas, next_cursor = [fila async for fila in filas_queryset], None
+
+        examenes_data = await ExamValuesSerializer.aserialize_rows(filas, proyeccion=proyeccion)
+        statistics = await sync_to_async(ExamReportService.get_exam_statistics)(examenes_queryset)
+
+        report = ExamReportService.build_report(
+            exam_id, persona_id, filters, examenes_data, next_cursor, statistics, proyeccion
+        )
+        return agregar_etag(render_response(request, report), etag)
+
+    except CursorInvalido as e:
+        return _error(str(e), 400)
+
+    except Exception as e:
+        return JsonResponse({
+            'error': True,
+            'message': f'Error al generar reporte: {str(e)}'
+        }, status=500)
@@ -0,0 +1,227 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .checks import cache_sin_consultas
+
+# Mismo encabezado que TokenAuthentication de DRF: "Authorization: Token <key>"
+TOKEN_KEYWORD = 'Token'
+
+# Sello por token en la caché compartida; cambia al revocar el token o al
+# modificar su usuario, y descarta las entradas cacheadas en todos los procesos.
+# Solo tiene que durar lo que dura una entrada cacheada (TOKEN_CACHE_TTL) más este margen
+VERSION_TOKEN_KEY = 'tokens:version:{}'
+MARGEN_VERSION_SEGUNDOS = 60
+
+
+def version_token_key(key):
+    return VERSION_TOKEN_KEY.format(key)
+
+
+def token_expirado(creado, ahora=None):
+    """True si un token creado en ``creado`` ya superó ``TOKEN_EXPIRACION``"""
+    expiracion = getattr(settings, 'TOKEN_EXPIRACION', None)
+    if not expiracion:
+        return False
+    return creado < (ahora or timezone.now()) - expiracion
+
+
+def obtener_token(user):
+    """
+    Token vigente del usuario para el login; si el actual expiró se reemplaza por uno nuevo
+
+    Returns:
+        Token
+    """
+    token, creado = Token.objects.get_or_create(user=user)
+    if not creado and token_expirado(token.created):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+def invalidar_tokens(keys):
+    """Descarta en todos los procesos las entradas cacheadas de los tokens ``keys``"""
+    if not keys:
+        return
+    version = time.time_ns()
+    # Pasado el TTL ya no queda ninguna entrada cacheada antes del cambio de sello
+    cache.set_many(
+        {version_token_key(key): version for key in keys}, timeout=cache_tokens.ttl + MARGEN_VERSION_SEGUNDOS
+    )
+    for key in keys:
+        cache_tokens.descartar(key)
+
+
+def invalidar_usuario(user_id):
+    """Descarta en todos los procesos los tokens cacheados del usuario"""
+    invalidar_tokens(list(Token.objects.filter(user_id=user_id).values_list('key', flat=True)))
+    cache_tokens.descartar_usuario(user_id)
+
+
+class CacheTokens:
+    """
+    Caché LRU en memoria (por proceso) de token → usuario, con TTL
+
+    Cada entrada guarda el sello del token leído antes de consultar la base;
+    una entrada solo es válida mientras ese sello no cambie (ver
+    ``invalidar_usuario``) y no haya superado el TTL, que acota cualquier
+    desfase si el sello se pierde de la caché compartida.
+
+    Si la caché por defecto no es compartida (LocMemCache, DummyCache) la
+    revocación no llegaría a los otros procesos, y si está en la base de datos
+    (DatabaseCache) leer el sello cuesta lo mismo que validar el token: en ambos
+    casos la caché queda desactivada y cada request valida el token en la base
+    con una consulta, como TokenAuthentication.
+    """
+
+    def __init__(self, maximo=None, ttl=None):
+        self._maximo = maximo
+        self._ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maximo(self):
+        return self._maximo if self._maximo is not None else getattr(settings, 'TOKEN_CACHE_MAXIMO', 10000)
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else getattr(settings, 'TOKEN_CACHE_TTL', 60)
+
+    @property
+    def activa(self):
+        return self.maximo > 0 and self.ttl > 0 and cache_sin_consultas()
+
+    def obtener(self, key):
+        """Entrada (token, version) si está vigente en el LRU, si no None"""
+        if not self.activa:
+            return None
+        with self._lock:
+            entrada = self._entradas.get(key)
+            if entrada is None:
+                return None
+            token, version, vence = entrada
+            if vence < time.monotonic():
+                del self._entradas[key]
+                return None
+            self._entradas.move_to_end(key)
+            return token, version
+
+    def guardar(self, token, version):
+        if not self.activa:
+            return
+        with self._lock:
+            self._entradas[token.key] = (token, version, time.monotonic() + self.ttl)
+            self._entradas.move_to_end(token.key)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def descartar(self, key):
+        with self._lock:
+            self._entradas.pop(key, None)
+
+    def descartar_usuario(self, user_id):
+        with self._lock:
+            for key in [k for k, (t, _, _) in self._entradas.items() if t.user_id == user_id]:
+                del self._entradas[key]
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+cache_tokens = CacheTokens()
+
+
+def _resultado(token):
+    # Copias para que cada request tenga su propio usuario (p. ej. update_last_login lo modifica)
+    token = copy.copy(token)
+    token.user = copy.copy(token.user)
+    return token.user, token
+
+
+def _validar(token):
+    if not token.user.is_active:
+        raise exceptions.AuthenticationFailed('Usuario inactivo o eliminado.')
+    if token_expirado(token.created):
+        cache_tokens.descartar(token.key)
+        raise exceptions.AuthenticationFailed('El token expiró. Inicie sesión nuevamente.')
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication con caché de token → usuario y expiración de tokens
+
+    En cada request con la entrada en caché solo se lee el sello del token de la
+    caché compartida (Redis, Memcached: sin consultas a la base), en lugar del
+    JOIN Token + User. Las señales de ``Token`` y
+    ``User`` (api/signals.py) cambian el sello al cerrar sesión, desactivar el
+    usuario o cambiar la contraseña.
+    """
+
+    def authenticate_credentials(self, key):
+        # Sin caché de tokens no se lee el sello: solo el JOIN Token + User
+        version = cache.get(version_token_key(key)) if cache_tokens.activa else None
+        entrada = cache_tokens.obtener(key)
+        if entrada is not None and entrada[1] == version:
+            token = entrada[0]
+        else:
+            # El sello se leyó antes de la consulta: si el token o el usuario cambian
+            # después, el sello guardado ya no coincide y la entrada se descarta
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed('Token inválido.')
+            cache_tokens.guardar(token, version)
+
+        _validar(token)
+        return _resultado(token)
+
+
+def token_del_encabezado(request):
+    """Key del token enviado en el encabezado Authorization, o None"""
+    partes = request.headers.get('Authorization', '').split()
+    if len(partes) != 2 or partes[0].lower() != TOKEN_KEYWORD.lower():
+        return None
+    return partes[1]
+
+
+async def aautenticar_token(request):
+    """
+    Autenticación por token para vistas async (misma caché y expiración que CachedTokenAuthentication)
+
+    Returns:
+        El usuario activo dueño de un token vigente, o None
+    """
+    key = token_del_encabezado(request)
+    if key is None:
+        return None
+
+    version = await cache.aget(version_token_key(key)) if cache_tokens.activa else None
+    entrada = cache_tokens.obtener(key)
+    if entrada is not None and entrada[1] == version:
+        token = entrada[0]
+    else:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        cache_tokens.guardar(token, version)
+
+    try:
+        _validar(token)
+    except exceptions.AuthenticationFailed:
+        return None
+    return _resultado(token)[0]
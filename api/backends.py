@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.models import Persona
+
+
+class EmailBackend(ModelBackend):
+    """
+    Autenticación por correo electrónico y contraseña
+
+    El usuario y su persona se cargan en una sola consulta por el índice único
+    ``UPPER(correo)`` de Persona. Los usuarios sin persona (p. ej. administradores
+    creados con createsuperuser) se buscan por ``auth_user.email``.
+    """
+
+    @staticmethod
+    def obtener_por_email(email):
+        """
+        Usuario con ese correo (sin distinguir mayúsculas), con ``user.persona`` ya cargada
+
+        Returns:
+            User o None
+        """
+        if not email:
+            return None
+
+        persona = Persona.objects.select_related('user').filter(correo__iexact=email).first()
+        if persona is not None:
+            return persona.user
+
+        user = get_user_model().objects.filter(email__iexact=email, persona__isnull=True).order_by('id').first()
+        if user is not None:
+            # Se marca que no tiene persona para que ``user.persona`` no consulte de nuevo
+            Persona.user.field.remote_field.set_cached_value(user, None)
+        return user
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        user = self.obtener_por_email(email)
+        if user is None:
+            # Mismo costo que con un usuario existente (evita distinguir correos por tiempo de respuesta)
+            get_user_model()().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
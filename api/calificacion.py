@@ -0,0 +1,211 @@
+import time
+
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .catalogos import catalogos
+from .estadisticas import EstadisticasPersonaService, EstadisticasExamenesService
+from .models import Examen, Pregunta, EstadoExamen
+
+# Estado de los exámenes entregados (a calificar) y de los ya calificados
+ESTADO_COMPLETADO = 'EXAMEN COMPLETADO'
+ESTADO_CALIFICADO = 'EXAMEN CALIFICADO'
+
+
+class CalificacionService:
+    """
+    Calificación automática de exámenes a partir de las opciones marcadas
+    (``Respuesta.seleccionada``).
+
+    Una pregunta suma su puntaje si el estudiante marcó exactamente sus opciones
+    correctas (todas y ninguna incorrecta). ``puntaje_obtenido`` es la suma de esos
+    puntajes y ``calificacion`` el porcentaje (0-100, redondeado) sobre el puntaje
+    de todas las preguntas del examen. Los exámenes sin preguntas con puntaje no se
+    califican.
+
+    ``calificar`` resuelve un conjunto de exámenes con un solo
+    ``UPDATE ... FROM (subconsulta agregada)`` (PostgreSQL y SQLite 3.33+): no lee
+    las respuestas en Python ni guarda examen por examen. Como el UPDATE no dispara
+    las señales de Examen, las estadísticas de las personas afectadas (y de los
+    días cerrados) se recalculan al final.
+    """
+
+    @staticmethod
+    def pendientes():
+        """Exámenes activos entregados y todavía sin calificar"""
+        catalogos.sync()
+        return Examen.objects.filter(
+            is_active=True, estado_id=catalogos.id_por_nombre(EstadoExamen, ESTADO_COMPLETADO)
+        )
+
+    @staticmethod
+    def entregados():
+        """Exámenes activos entregados o calificados, por quien sea (para el análisis de ítems)"""
+        catalogos.sync()
+        return Examen.objects.filter(is_active=True, estado_id__in=[
+            catalogos.id_por_nombre(EstadoExamen, ESTADO_COMPLETADO),
+            catalogos.id_por_nombre(EstadoExamen, ESTADO_CALIFICADO),
+        ])
+
+    @staticmethod
+    def calificados(calificado_por_id=None):
+        """
+        Exámenes activos entregados o ya calificados, para recalificar
+
+        De los ya calificados solo se incluyen los calificados automáticamente (sin
+        ``calificado_por``) o por ``calificado_por_id``: las notas puestas por otra
+        persona no se sobrescriben.
+        """
+        catalogos.sync()
+        return Examen.objects.filter(is_active=True).filter(
+            Q(estado_id=catalogos.id_por_nombre(EstadoExamen, ESTADO_COMPLETADO))
+            | Q(
+                Q(calificado_por__isnull=True) | Q(calificado_por_id=calificado_por_id),
+                estado_id=catalogos.id_por_nombre(EstadoExamen, ESTADO_CALIFICADO),
+            )
+        )
+
+    @staticmethod
+    def preguntas_sql(examen_ids):
+        """
+        SQL y parámetros de una fila por pregunta de los exámenes con su puntaje y la
+        cantidad de opciones correctas, marcadas correctas y marcadas incorrectas
+        """
+        return Pregunta.objects.filter(examen_id__in=examen_ids).order_by().values('examen_id', 'id').annotate(
+            valor=Coalesce('puntaje', 0, output_field=Pregunta._meta.get_field('puntaje')),
+            correctas=Count('respuestas', filter=Q(respuestas__es_correcta=True)),
+            marcadas_correctas=Count('respuestas', filter=Q(respuestas__es_correcta=True, respuestas__seleccionada=True)),
+            marcadas_incorrectas=Count(
+                'respuestas', filter=Q(respuestas__es_correcta=False, respuestas__seleccionada=True)
+            ),
+        ).query.sql_with_params()
+
+    @classmethod
+    def calificar(cls, examen_ids, calificado_por_id=None, estadisticas=True):
+        """
+        Califica los exámenes indicados en una sola sentencia
+
+        Args:
+            examen_ids: IDs de los exámenes
+            calificado_por_id: Persona que figura como calificadora (None: se mantiene la que tenga el examen)
+            estadisticas: Recalcula las estadísticas de las personas y días afectados
+
+        Returns:
+            Cantidad de exámenes calificados
+        """
+        catalogos.sync()
+        examen_ids = list(examen_ids)
+        if not examen_ids:
+            return 0
+
+        connection = connections[Examen.objects.db]
+        tabla = connection.ops.quote_name(Examen._meta.db_table)
+        preguntas, params = cls.preguntas_sql(examen_ids)
+        sql = f"""
+            UPDATE {tabla}
+            SET puntaje_obtenido = g.obtenido,
+                calificacion = CAST(ROUND(100.0 * g.obtenido / g.total) AS integer),
+                estado_id = COALESCE(%s, estado_id),
+                calificado_por_id = COALESCE(%s, calificado_por_id),
+                updated_at = %s
+            FROM (
+                SELECT q.examen_id,
+                       SUM(q.valor) AS total,
+                       SUM(CASE WHEN q.correctas > 0 AND q.marcadas_correctas = q.correctas
+                                     AND q.marcadas_incorrectas = 0
+                                THEN q.valor ELSE 0 END) AS obtenido
+                FROM ({preguntas}) q
+                GROUP BY q.examen_id
+                HAVING SUM(q.valor) > 0
+            ) g
+            WHERE {tabla}.id = g.examen_id
+        """
+        # 100.0: en PostgreSQL la división y el ROUND son numeric (no float); en SQLite no es entera
+        params = [catalogos.id_por_nombre(EstadoExamen, ESTADO_CALIFICADO), calificado_por_id, timezone.now(), *params]
+
+        with transaction.atomic(using=Examen.objects.db):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                calificados = cursor.rowcount
+            if estadisticas:
+                cls.actualizar_estadisticas(*cls.afectados(examen_ids))
+        return calificados
+
+    @staticmethod
+    def afectados(examen_ids):
+        """
+        Personas y días (de exámenes activos) cuyas estadísticas dependen de los exámenes
+
+        Returns:
+            Tupla (set de persona_id, set de fechas)
+        """
+        examenes = Examen.objects.filter(id__in=examen_ids)
+        persona_ids = set(examenes.values_list('persona_id', flat=True).distinct())
+        fechas = {
+            timezone.localtime(fecha).date() if timezone.is_aware(fecha) else fecha.date()
+            for fecha in examenes.filter(is_active=True).values_list(
+                Coalesce('fecha_examen', 'created_at'), flat=True
+            )
+        }
+        return persona_ids, fechas
+
+    @staticmethod
+    def actualizar_estadisticas(persona_ids, fechas):
+        """Recalcula las estadísticas de las personas y las diarias de los días ya cerrados"""
+        if persona_ids:
+            EstadisticasPersonaService.rebuild(sorted(persona_ids))
+        # El día en curso se calcula en vivo (EstadisticasExamenesService.rango)
+        cerradas = [fecha for fecha in fechas if fecha < timezone.localdate()]
+        if cerradas:
+            EstadisticasExamenesService.refrescar_diarias(min(cerradas), max(cerradas))
+
+    @classmethod
+    def calificar_lote(cls, examenes=None, tamano_lote=1000, limite=None, calificado_por_id=None, progreso=None):
+        """
+        Califica muchos exámenes por lotes ordenados por id (un UPDATE por lote)
+
+        Las estadísticas se recalculan una sola vez al final.
+
+        Args:
+            examenes: QuerySet de Examen (por defecto ``pendientes()``)
+            tamano_lote: Exámenes por UPDATE
+            limite: Máximo de exámenes a procesar
+            calificado_por_id: Persona que figura como calificadora
+            progreso: Función que recibe el dict de resultados tras cada lote
+
+        Returns:
+            Dict con ``procesados``, ``calificados``, ``segundos`` y ``por_segundo``
+        """
+        if examenes is None:
+            examenes = cls.pendientes()
+        examenes = examenes.order_by('id').values_list('id', flat=True)
+
+        resultado = {'procesados': 0, 'calificados': 0, 'segundos': 0.0, 'por_segundo': 0.0}
+        inicio = time.perf_counter()
+        persona_ids, fechas = set(), set()
+        ultimo_id = 0
+
+        while limite is None or resultado['procesados'] < limite:
+            cantidad = tamano_lote if limite is None else min(tamano_lote, limite - resultado['procesados'])
+            ids = list(examenes.filter(id__gt=ultimo_id)[:cantidad])
+            if not ids:
+                break
+
+            resultado['calificados'] += cls.calificar(ids, calificado_por_id, estadisticas=False)
+            resultado['procesados'] += len(ids)
+            personas_lote, fechas_lote = cls.afectados(ids)
+            persona_ids |= personas_lote
+            fechas |= fechas_lote
+            ultimo_id = ids[-1]
+
+            resultado['segundos'] = time.perf_counter() - inicio
+            resultado['por_segundo'] = resultado['procesados'] / resultado['segundos'] if resultado['segundos'] else 0.0
+            if progreso:
+                progreso(resultado)
+
+        cls.actualizar_estadisticas(persona_ids, fechas)
+        resultado['segundos'] = time.perf_counter() - inicio
+        resultado['por_segundo'] = resultado['procesados'] / resultado['segundos'] if resultado['segundos'] else 0.0
+        return resultado
@@ -0,0 +1,140 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import (
+    EstadoExamen, TipoPregunta, NivelExamen, AreaEstudio,
+    EstadoPregunta, VerdaderoFalso
+)
+
+# Tablas de catálogo pequeñas y casi estáticas que se mantienen en memoria
+CATALOGOS = (EstadoExamen, TipoPregunta, NivelExamen, AreaEstudio, EstadoPregunta, VerdaderoFalso)
+
+# Clave del sello de versión en la caché compartida entre procesos (CACHES en
+# settings.py; api/checks.py advierte si el backend es por proceso)
+VERSION_KEY = 'catalogos:version'
+
+
+class CatalogRegistry:
+    """
+    Registro en memoria (por proceso) de las tablas de catálogo.
+
+    Cada catálogo se carga una sola vez y se consulta por ``id`` o por ``nombre``.
+    Las señales de guardado/borrado de los catálogos incrementan un sello de versión
+    en la caché; ``sync()`` lo compara con el sello local y descarta lo cargado si
+    cambió. El sello se lee como mucho una vez cada CATALOGOS_VERIFICACION segundos,
+    que es lo que tarda un cambio hecho en otro proceso en llegar a este. Así el
+    reporte no necesita hacer JOIN con estas tablas.
+    """
+
+    def __init__(self):
+        self._por_id = {}
+        self._por_nombre = {}
+        self._version = None
+        self._verificado = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def intervalo():
+        return getattr(settings, 'CATALOGOS_VERIFICACION', 5)
+
+    def sync(self):
+        """Descarta los catálogos cargados si otro proceso los invalidó"""
+        ahora = time.monotonic()
+        if self._verificado is not None and ahora - self._verificado < self.intervalo():
+            return
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, 1, timeout=None)
+            version = cache.get(VERSION_KEY)
+        with self._lock:
+            if version != self._version:
+                self._por_id = {}
+                self._por_nombre = {}
+                self._version = version
+            self._verificado = ahora
+
+    @property
+    def version(self):
+        """Sello de versión de los catálogos cargados (tras ``sync()``)"""
+        return self._version
+
+    def invalidar(self):
+        """Incrementa el sello de versión para que todos los procesos recarguen"""
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY)
+        with self._lock:
+            self._por_id = {}
+            self._por_nombre = {}
+            self._version = version
+            self._verificado = time.monotonic()
+
+    def _cargar(self, modelo):
+        """
+        Carga un catálogo
+
+        Returns:
+            Tupla (dict por id, dict por nombre) cargada o ya presente; se devuelven
+            los dicts leídos con el lock tomado porque un ``sync()`` o ``invalidar()``
+            concurrente puede reemplazar los del registro
+        """
+        with self._lock:
+            por_id = self._por_id.get(modelo)
+            if por_id is not None:
+                return por_id, self._por_nombre[modelo]
+            objetos = list(modelo.objects.all())
+            por_id = {obj.id: obj for obj in objetos}
+            por_nombre = {obj.nombre: obj for obj in objetos}
+            self._por_id[modelo] = por_id
+            self._por_nombre[modelo] = por_nombre
+            return por_id, por_nombre
+
+    def precargar(self):
+        """Carga todos los catálogos (las vistas async lo llaman antes de usar el registro)"""
+        self.sync()
+        for modelo in CATALOGOS:
+            if modelo not in self._por_id:
+                self._cargar(modelo)
+
+    def get(self, modelo, pk):
+        """Objeto del catálogo por id (None si no existe)"""
+        if pk is None:
+            return None
+        por_id = self._por_id.get(modelo)
+        if por_id is None:
+            por_id = self._cargar(modelo)[0]
+        return por_id.get(pk)
+
+    def get_by_nombre(self, modelo, nombre):
+        """Objeto del catálogo por nombre (None si no existe)"""
+        por_nombre = self._por_nombre.get(modelo)
+        if por_nombre is None:
+            por_nombre = self._cargar(modelo)[1]
+        return por_nombre.get(nombre)
+
+    def id_por_nombre(self, modelo, nombre):
+        obj = self.get_by_nombre(modelo, nombre)
+        return obj.id if obj else None
+
+    def attach(self, instancia, *campos):
+        """
+        Asigna en la caché de relaciones de ``instancia`` los objetos del catálogo
+        para los ForeignKey indicados, de modo que ``instancia.estado`` (etc.) no
+        genere una consulta.
+        """
+        for nombre in campos:
+            campo = instancia._meta.get_field(nombre)
+            if campo.is_cached(instancia):
+                continue
+            pk = getattr(instancia, campo.attname)
+            obj = self.get(campo.related_model, pk)
+            if obj is not None or pk is None:
+                campo.set_cached_value(instancia, obj)
+
+
+catalogos = CatalogRegistry()
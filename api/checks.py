@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core import checks
+
+# Backends de caché que guardan los datos en memoria del proceso: lo que escribe un
+# worker no lo ven los demás
+BACKENDS_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+# Backends compartidos que igual cuestan una consulta a la base por lectura
+BACKENDS_EN_BASE = (
+    'django.core.cache.backends.db.DatabaseCache',
+)
+
+
+def _backend(alias):
+    return settings.CACHES.get(alias, {}).get('BACKEND', BACKENDS_POR_PROCESO[0])
+
+
+def cache_compartida(alias='default'):
+    """True si el backend de la caché ``alias`` se comparte entre procesos"""
+    return _backend(alias) not in BACKENDS_POR_PROCESO
+
+
+def cache_sin_consultas(alias='default'):
+    """True si la caché ``alias`` es compartida y leerla no consulta la base (Redis, Memcached...)"""
+    return cache_compartida(alias) and _backend(alias) not in BACKENDS_EN_BASE
+
+
+@checks.register(checks.Tags.caches)
+def verificar_cache_compartida(app_configs, **kwargs):
+    """
+    Advierte si la caché por defecto es por proceso: los sellos de versión de los
+    catálogos (api/catalogos.py) y de los tokens (api/autenticacion.py) no llegarían
+    a los otros workers
+    """
+    if cache_compartida():
+        return []
+    return [checks.Warning(
+        'La caché por defecto no se comparte entre procesos: los cambios de catálogos '
+        'no llegan a los otros workers y la caché de tokens queda desactivada.',
+        hint='Configure CACHES con un backend compartido (base de datos, Redis o Memcached).',
+        id='api.W001',
+    )]
@@ -0,0 +1,93 @@
+import hashlib
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from core.models import Persona
+from .catalogos import catalogos
+from .models import Examen, Pregunta, Respuesta, GeneracionIA, TemaAreaEstudio
+
+
+def _agregado_sql(queryset, campo='updated_at'):
+    """SQL de ``SELECT MAX(campo), COUNT(*)`` sobre las filas del queryset"""
+    sql, params = queryset.order_by().values_list(campo).query.sql_with_params()
+    return f'SELECT MAX(t.{campo}) AS m, COUNT(*) AS c FROM ({sql}) t', params
+
+
+def validador_sql(examenes_queryset):
+    """SQL y parámetros de la consulta de ``validador_examenes``"""
+    examenes = examenes_queryset.order_by()
+    ids = examenes.values('id')
+    temas = Examen.tema.through.objects.filter(examen_id__in=ids)
+    generaciones = GeneracionIA.objects.filter(examen_id__in=ids)
+    partes = [
+        _agregado_sql(examenes_queryset),
+        _agregado_sql(Pregunta.objects.filter(examen_id__in=ids)),
+        _agregado_sql(Respuesta.objects.filter(pregunta__examen_id__in=ids)),
+        _agregado_sql(generaciones),
+        # La tabla intermedia no tiene updated_at: un tema agregado tiene un id mayor
+        # y uno quitado cambia la cantidad
+        _agregado_sql(temas, 'id'),
+        _agregado_sql(TemaAreaEstudio.objects.filter(
+            Q(id__in=temas.values('temaareaestudio_id')) | Q(id__in=generaciones.values('temas_id'))
+        )),
+        _agregado_sql(Persona.objects.filter(
+            Q(id__in=examenes.values('persona_id')) | Q(id__in=examenes.values('calificado_por_id'))
+        )),
+    ]
+    sql = 'SELECT * FROM ' + ' CROSS JOIN '.join(f'({parte}) v{i}' for i, (parte, _) in enumerate(partes))
+    return sql, [p for _, parametros in partes for p in parametros]
+
+
+def validador_examenes(examenes_queryset):
+    """
+    Valor que cambia cuando cambia cualquier dato que se muestra de los exámenes del alcance
+
+    Se calcula en una sola consulta con el máximo ``updated_at`` y la cantidad
+    de filas (la cantidad detecta borrados) de exámenes, preguntas, respuestas,
+    generaciones IA, temas (y sus asignaciones) y personas (alumno y calificador).
+    Los catálogos van aparte, con su sello de versión.
+
+    Args:
+        examenes_queryset: QuerySet de Examen sin anotaciones ni prefetch
+
+    Returns:
+        Tupla con el máximo y la cantidad de cada fuente
+    """
+
+    sql, params = validador_sql(examenes_queryset)
+    with connections[examenes_queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return tuple(cursor.fetchone())
+
+
+def calcular_etag(request, examenes_queryset, *alcance):
+    """
+    ETag débil para una respuesta de exámenes
+
+    Combina el validador de los datos, el sello de versión de los catálogos,
+    los query parameters, el Accept y el ``alcance`` indicado (usuario, persona...).
+    """
+
+    catalogos.sync()
+    datos = (
+        validador_examenes(examenes_queryset),
+        catalogos.version,
+        sorted(request.GET.lists()),
+        request.META.get('HTTP_ACCEPT', ''),
+        alcance,
+    )
+    return 'W/"%s"' % hashlib.sha1(repr(datos).encode()).hexdigest()
+
+
+def respuesta_condicional(request, etag):
+    """Respuesta 304 si el If-None-Match del cliente coincide con ``etag``, si no None"""
+    return get_conditional_response(request, etag=etag)
+
+
+def agregar_etag(response, etag):
+    response['ETag'] = etag
+    # El cliente debe revalidar siempre: la respuesta depende del token
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,85 @@
+from django.db.models import prefetch_related_objects
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .autenticacion import CachedTokenAuthentication
+from .condicional import calcular_etag, respuesta_condicional, agregar_etag
+from .detector import presupuesto_consultas
+from .examen import ExamReportService
+from .instrumentacion import fase
+from .models import Examen, Pregunta
+from .paginacion import IdKeysetPaginator, CursorInvalido
+from .proyeccion import ESCALARES, METRICAS, Proyeccion
+from .renderizado import render_response, renderer_classes_disponibles
+
+# Cabecera del examen en el detalle: sus campos y catálogos, sin métricas agregadas
+# (porcentaje_aciertos y los totales recorren todas las preguntas) ni preguntas
+CABECERA = Proyeccion(
+    escalares=[clave for clave, (columnas, _) in ESCALARES.items() if not set(columnas) & set(METRICAS)],
+    relaciones=['estado', 'nivel', 'area_estudio', 'temas'],
+)
+
+
+# ETag, catálogos, cabecera, temas, preguntas de la página y sus respuestas: no depende del largo del examen
+@presupuesto_consultas(8)
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+@renderer_classes(renderer_classes_disponibles())
+def get_examen_detalle(request, exam_id):
+    """
+    Detalle de un examen: cabecera y preguntas con sus respuestas, paginadas por cursor
+
+    Solo se leen las preguntas de la página pedida (y sus respuestas), así que el
+    tiempo hasta la primera pregunta no depende de la cantidad de preguntas del
+    examen. La cabecera se devuelve solo en la primera página.
+
+    Query parameters:
+    - cursor: Cursor de la página siguiente de preguntas (devuelto en ``next``)
+    - page_size: Cantidad de preguntas por página
+
+    El estudiante solo ve sus exámenes activos; el personal administrativo, cualquiera.
+    Responde con ``ETag``; con un ``If-None-Match`` vigente devuelve 304.
+    """
+    user = request.user
+    alcance = Examen.objects.filter(id=exam_id)
+    if not user.is_staff:
+        alcance = alcance.filter(persona__user_id=user.id, is_active=True)
+
+    etag = calcular_etag(request, alcance, user.id)
+    no_modificado = respuesta_condicional(request, etag)
+    if no_modificado is not None:
+        return agregar_etag(no_modificado, etag)
+
+    cursor = request.GET.get('cursor')
+    cabecera = None
+    if not cursor:
+        examenes, _ = ExamReportService.load_exams(
+            ExamReportService.get_exam_complete_data(proyeccion=CABECERA).filter(id__in=alcance)
+        )
+        if not examenes:
+            return Response({'error': 'Examen no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        cabecera = ExamReportService.serialize_exam(examenes[0], CABECERA)
+    elif not alcance.exists():
+        return Response({'error': 'Examen no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        with fase('preguntas'):
+            preguntas, next_cursor = IdKeysetPaginator(request.GET.get('page_size')).paginate(
+                Pregunta.objects.filter(examen_id=exam_id), cursor
+            )
+    except CursorInvalido as ex:
+        return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+    with fase('prefetch_respuestas'):
+        prefetch_related_objects(preguntas, ExamReportService.prefetch_respuestas())
+
+    with fase('serializacion'):
+        data = {
+            'examen': cabecera,
+            'preguntas': [ExamReportService.serialize_pregunta(pregunta) for pregunta in preguntas],
+            'next': next_cursor,
+        }
+    return agregar_etag(render_response(request, data, status=status.HTTP_200_OK), etag)
@@ -0,0 +1,260 @@
+import logging
+import re
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Detector de consultas N+1 para desarrollo y tests.
+#
+# Mientras está activo registra cada consulta SQL con su "forma" (el SQL sin
+# valores literales y con las listas IN colapsadas) y la línea del proyecto que
+# la disparó. Una misma forma repetida desde la misma línea es un N+1; las cargas
+# perezosas de relaciones (acceder a ``examen.persona.user`` sin select_related)
+# se marcan aparte. El middleware lo activa por request (DETECTOR_N1) y
+# ``ConsultasTestMixin`` permite fallar un test que supera el presupuesto de
+# consultas declarado para un endpoint con ``presupuesto_consultas``.
+
+logger = logging.getLogger(__name__)
+
+# Repeticiones de una misma forma desde la misma línea a partir de las que se reporta
+REPETICIONES_POR_DEFECTO = 3
+
+_actual = ContextVar('detector_n1', default=None)
+
+_LISTA_IN = re.compile(r'\bIN \((?:%s, )*%s\)')
+_CADENA = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+# Las consultas que salen de estos archivos de Django son cargas perezosas de
+# relaciones, salvo que vengan de un prefetch_related
+_DESCRIPTORES = ('related_descriptors.py', 'fields/related.py')
+_PREFETCH = ('prefetch_related_objects', 'prefetch_one_level')
+
+_PROYECTO = str(Path(settings.BASE_DIR).resolve()) if getattr(settings, 'BASE_DIR', None) else None
+_ESTE_ARCHIVO = str(Path(__file__).resolve())
+
+
+class PresupuestoExcedido(AssertionError):
+    """Un endpoint o bloque hizo más consultas que las declaradas o tiene consultas N+1"""
+
+
+def forma_consulta(sql):
+    """SQL sin literales y con ``IN (%s, ...)`` colapsado, para agrupar consultas iguales"""
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    sql = _CADENA.sub('?', sql)
+    return _NUMERO.sub('?', sql)
+
+
+def _ubicacion(pila, niveles=2):
+    """
+    Archivos del proyecto (desde la llamada más interna, sin paquetes instalados
+    ni este módulo) que dispararon la consulta, p. ej.
+    ``core/models.py:45 en __str__ <- api/examen.py:310 en serialize_exam``
+    """
+    partes = []
+    for frame in pila:
+        archivo = frame.filename
+        if archivo == _ESTE_ARCHIVO or 'site-packages' in archivo or 'dist-packages' in archivo:
+            continue
+        if _PROYECTO is not None and not archivo.startswith(_PROYECTO):
+            continue
+        relativo = archivo[len(_PROYECTO) + 1:] if _PROYECTO else Path(archivo).name
+        partes.append(f'{relativo}:{frame.lineno} en {frame.name}')
+        if len(partes) == niveles:
+            break
+    return ' <- '.join(partes) or 'desconocida'
+
+
+def _es_perezosa(pila):
+    nombres = {frame.name for frame in pila}
+    if nombres.intersection(_PREFETCH):
+        return False
+    return any(frame.filename.endswith(_DESCRIPTORES) for frame in pila)
+
+
+class Detector:
+    """Consultas registradas mientras el detector está activo"""
+
+    def __init__(self, repeticiones=None):
+        self.repeticiones = repeticiones or getattr(settings, 'DETECTOR_N1_REPETICIONES', REPETICIONES_POR_DEFECTO)
+        # (forma, ubicación) -> [cantidad, es carga perezosa, primer SQL]
+        self.formas = {}
+        self.total = 0
+
+    def registrar(self, sql):
+        # Sin leer el código fuente de cada línea: solo archivo, número y función
+        pila = traceback.StackSummary.extract(traceback.walk_stack(None), lookup_lines=False)
+        clave = (forma_consulta(sql), _ubicacion(pila))
+        datos = self.formas.get(clave)
+        if datos is None:
+            self.formas[clave] = [1, _es_perezosa(pila), sql]
+        else:
+            datos[0] += 1
+        self.total += 1
+
+    def repetidas(self):
+        """Formas repetidas al menos ``repeticiones`` veces desde la misma línea, de más a menos"""
+        return sorted(
+            (
+                {'forma': forma, 'ubicacion': ubicacion, 'cantidad': cantidad, 'perezosa': perezosa, 'sql': sql}
+                for (forma, ubicacion), (cantidad, perezosa, sql) in self.formas.items()
+                if cantidad >= self.repeticiones
+            ),
+            key=lambda consulta: -consulta['cantidad']
+        )
+
+    def perezosas(self):
+        """Cargas perezosas de relaciones (aunque no lleguen al umbral de repeticiones)"""
+        return [
+            {'forma': forma, 'ubicacion': ubicacion, 'cantidad': cantidad}
+            for (forma, ubicacion), (cantidad, perezosa, _) in self.formas.items()
+            if perezosa
+        ]
+
+    def informe(self, maximo=None):
+        """Texto con el total de consultas, el presupuesto, las formas repetidas y las cargas perezosas"""
+        lineas = [f'{self.total} consultas' + (f' (presupuesto: {maximo})' if maximo is not None else '')]
+        repetidas = self.repetidas()
+        for consulta in repetidas:
+            tipo = 'carga perezosa' if consulta['perezosa'] else 'consulta repetida'
+            lineas.append(f"  {consulta['cantidad']}x {tipo} en {consulta['ubicacion']}: {consulta['forma'][:300]}")
+        reportadas = {(consulta['forma'], consulta['ubicacion']) for consulta in repetidas}
+        for consulta in self.perezosas():
+            if (consulta['forma'], consulta['ubicacion']) not in reportadas:
+                lineas.append(f"  {consulta['cantidad']}x carga perezosa en {consulta['ubicacion']}: {consulta['forma'][:300]}")
+        return '\n'.join(lineas)
+
+
+def _registrar_sql(execute, sql, params, many, context):
+    detector = _actual.get()
+    if detector is not None:
+        detector.registrar(sql)
+    return execute(sql, params, many, context)
+
+
+def _instalar(conexion):
+    if _registrar_sql not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(_registrar_sql)
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    _instalar(connection)
+
+
+connection_created.connect(_conexion_creada, dispatch_uid='detector_n1_sql')
+
+
+@contextmanager
+def detectar(repeticiones=None):
+    """
+    Registra las consultas del bloque
+
+    Uso::
+
+        with detectar() as detector:
+            ...
+        print(detector.informe())
+    """
+    for conexion in connections.all(initialized_only=True):
+        _instalar(conexion)
+    detector = Detector(repeticiones)
+    token = _actual.set(detector)
+    try:
+        yield detector
+    finally:
+        _actual.reset(token)
+
+
+def presupuesto_consultas(maximo):
+    """
+    Declara la cantidad máxima de consultas de una vista
+
+    Se aplica sobre la vista ya decorada con ``api_view``::
+
+        @presupuesto_consultas(10)
+        @api_view(['GET'])
+        def vista(request): ...
+    """
+    def decorador(vista):
+        vista.presupuesto_consultas = maximo
+        return vista
+    return decorador
+
+
+class DetectorN1Middleware:
+    """
+    Detecta consultas N+1 y presupuestos excedidos en cada request
+
+    Configuración:
+    - DETECTOR_N1: activa el detector (solo para desarrollo: cuesta un traceback por consulta)
+    - DETECTOR_N1_REPETICIONES: repeticiones desde la misma línea que cuentan como N+1
+    - DETECTOR_N1_ESTRICTO: lanza PresupuestoExcedido en lugar de registrar una advertencia
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        # Desactivado (por defecto) se quita de la cadena de middlewares
+        if not getattr(settings, 'DETECTOR_N1', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        with detectar() as detector:
+            response = self.get_response(request)
+        self.reportar(request, detector)
+        return response
+
+    async def __acall__(self, request):
+        # sync_to_async copia el contexto: las consultas de sus hilos llegan al mismo detector
+        with detectar() as detector:
+            response = await self.get_response(request)
+        self.reportar(request, detector)
+        return response
+
+    @staticmethod
+    def reportar(request, detector):
+        maximo = getattr(request, 'presupuesto_consultas', None)
+        if detector.repetidas() or (maximo is not None and detector.total > maximo):
+            informe = f'{request.method} {request.path}: {detector.informe(maximo)}'
+            if getattr(settings, 'DETECTOR_N1_ESTRICTO', False):
+                raise PresupuestoExcedido(informe)
+            logger.warning(informe)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.presupuesto_consultas = getattr(view_func, 'presupuesto_consultas', None)
+
+
+class ConsultasTestMixin:
+    """Aserciones de consultas para TestCase"""
+
+    @contextmanager
+    def assertPresupuestoConsultas(self, maximo=None, vista=None, repeticiones=None):
+        """
+        Falla si el bloque hace más de ``maximo`` consultas (o del presupuesto
+        declarado en ``vista``) o si repite una forma de consulta desde la misma línea
+
+        Args:
+            maximo: Cantidad máxima de consultas
+            vista: Vista decorada con ``presupuesto_consultas`` (si no se da ``maximo``)
+            repeticiones: Repeticiones que cuentan como N+1 (por defecto DETECTOR_N1_REPETICIONES)
+        """
+        if maximo is None and vista is not None:
+            maximo = getattr(vista, 'presupuesto_consultas', None)
+        with detectar(repeticiones) as detector:
+            yield detector
+        if detector.repetidas() or (maximo is not None and detector.total > maximo):
+            raise self.failureException(detector.informe(maximo))
@@ -0,0 +1,565 @@
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.db.models import Count, Sum, Max, Min, F, Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .catalogos import catalogos
+from .models import (
+    Examen, Pregunta, Respuesta, EstadisticaPersona, EstadisticaPersonaEstado, EstadisticaDiaria,
+    EstadisticaDiariaPendiente, EstadoExamen, AreaEstudio, NivelExamen
+)
+
+# Aporte de un examen a las estadísticas de su persona
+AporteExamen = namedtuple('AporteExamen', ['persona_id', 'estado_id', 'calificacion'])
+
+
+class EstadisticasPersonaService:
+    """
+    Mantiene las estadísticas de exámenes por persona (cantidad, suma y promedio
+    de calificación, cantidad por estado).
+
+    Solo cuentan los exámenes activos, igual que el dashboard de ``mainview``.
+    Las señales de ``Examen`` aplican los cambios como deltas dentro de la misma
+    transacción del guardado/borrado; ``rebuild`` recalcula desde cero.
+    """
+
+    @staticmethod
+    def aporte(persona_id, is_active, estado_id, calificacion):
+        """Aporte de un examen, o None si no cuenta para las estadísticas"""
+        if not persona_id or not is_active:
+            return None
+        return AporteExamen(persona_id, estado_id, calificacion)
+
+    @classmethod
+    def aporte_examen(cls, examen):
+        return cls.aporte(examen.persona_id, examen.is_active, examen.estado_id, examen.calificacion)
+
+    @classmethod
+    def aplicar(cls, anterior, nuevo):
+        """
+        Aplica el cambio de un examen a las estadísticas
+
+        Args:
+            anterior: AporteExamen antes del cambio (None si no contaba)
+            nuevo: AporteExamen después del cambio (None si ya no cuenta)
+        """
+
+        if anterior == nuevo:
+            return
+
+        with transaction.atomic():
+            if anterior:
+                cls._sumar(anterior, -1)
+            if nuevo:
+                cls._sumar(nuevo, 1)
+
+    @staticmethod
+    def _sumar(aporte, signo):
+        # Las filas solo se crean al sumar: al restar (p. ej. durante el borrado en
+        # cascada de una persona) no se deben recrear filas que ya se eliminaron
+        if signo > 0:
+            EstadisticaPersona.objects.get_or_create(persona_id=aporte.persona_id)
+        calificado = aporte.calificacion is not None
+        EstadisticaPersona.objects.filter(persona_id=aporte.persona_id).update(
+            total_examenes=F('total_examenes') + signo,
+            examenes_calificados=F('examenes_calificados') + (signo if calificado else 0),
+            suma_calificacion=F('suma_calificacion') + (signo * aporte.calificacion if calificado else 0)
+        )
+
+        if aporte.estado_id:
+            if signo > 0:
+                EstadisticaPersonaEstado.objects.get_or_create(persona_id=aporte.persona_id, estado_id=aporte.estado_id)
+            EstadisticaPersonaEstado.objects.filter(
+                persona_id=aporte.persona_id, estado_id=aporte.estado_id
+            ).update(cantidad=F('cantidad') + signo)
+
+    @staticmethod
+    def calcular(persona_ids=None):
+        """
+        Calcula las estadísticas directamente desde la tabla de exámenes
+
+        Returns:
+            Dict {persona_id: {'total_examenes', 'examenes_calificados', 'suma_calificacion', 'por_estado'}}
+        """
+
+        examenes = Examen.objects.filter(is_active=True)
+        if persona_ids is not None:
+            examenes = examenes.filter(persona_id__in=persona_ids)
+
+        resultado = {}
+        totales = examenes.values('persona_id').annotate(
+            total_examenes=Count('id'),
+            examenes_calificados=Count('id', filter=Q(calificacion__isnull=False)),
+            suma_calificacion=Sum('calificacion')
+        ).order_by()
+        for fila in totales:
+            resultado[fila['persona_id']] = {
+                'total_examenes': fila['total_examenes'],
+                'examenes_calificados': fila['examenes_calificados'],
+                'suma_calificacion': fila['suma_calificacion'] or 0,
+                'por_estado': {}
+            }
+
+        por_estado = examenes.filter(estado__isnull=False).values('persona_id', 'estado_id').annotate(
+            cantidad=Count('id')
+        ).order_by()
+        for fila in por_estado:
+            resultado[fila['persona_id']]['por_estado'][fila['estado_id']] = fila['cantidad']
+
+        return resultado
+
+    @staticmethod
+    def leer(persona_ids=None):
+        """Lee las estadísticas almacenadas con la misma estructura que ``calcular``"""
+
+        estadisticas = EstadisticaPersona.objects.all()
+        estados = EstadisticaPersonaEstado.objects.filter(cantidad__gt=0)
+        if persona_ids is not None:
+            estadisticas = estadisticas.filter(persona_id__in=persona_ids)
+            estados = estados.filter(persona_id__in=persona_ids)
+
+        resultado = {}
+        for e in estadisticas.values('persona_id', 'total_examenes', 'examenes_calificados', 'suma_calificacion'):
+            if not e['total_examenes']:
+                continue
+            persona_id = e.pop('persona_id')
+            resultado[persona_id] = dict(e, por_estado={})
+        for fila in estados.values('persona_id', 'estado_id', 'cantidad'):
+            resultado.setdefault(fila['persona_id'], {
+                'total_examenes': 0, 'examenes_calificados': 0, 'suma_calificacion': 0, 'por_estado': {}
+            })['por_estado'][fila['estado_id']] = fila['cantidad']
+
+        return resultado
+
+    @classmethod
+    def rebuild(cls, persona_ids=None):
+        """
+        Reconstruye las estadísticas desde cero (todas o solo las de ``persona_ids``)
+
+        Returns:
+            Cantidad de personas con estadísticas reconstruidas
+        """
+
+        calculadas = cls.calcular(persona_ids)
+        if persona_ids is not None:
+            # Las personas sin exámenes también quedan con su fila (en cero)
+            for persona_id in persona_ids:
+                calculadas.setdefault(persona_id, {
+                    'total_examenes': 0, 'examenes_calificados': 0, 'suma_calificacion': 0, 'por_estado': {}
+                })
+
+        with transaction.atomic():
+            estadisticas = EstadisticaPersona.objects.all()
+            estados = EstadisticaPersonaEstado.objects.all()
+            if persona_ids is not None:
+                estadisticas = estadisticas.filter(persona_id__in=persona_ids)
+                estados = estados.filter(persona_id__in=persona_ids)
+            estadisticas.delete()
+            estados.delete()
+
+            EstadisticaPersona.objects.bulk_create([
+                EstadisticaPersona(
+                    persona_id=persona_id,
+                    total_examenes=datos['total_examenes'],
+                    examenes_calificados=datos['examenes_calificados'],
+                    suma_calificacion=datos['suma_calificacion']
+                )
+                for persona_id, datos in calculadas.items()
+            ], batch_size=1000)
+            EstadisticaPersonaEstado.objects.bulk_create([
+                EstadisticaPersonaEstado(persona_id=persona_id, estado_id=estado_id, cantidad=cantidad)
+                for persona_id, datos in calculadas.items()
+                for estado_id, cantidad in datos['por_estado'].items()
+            ], batch_size=1000)
+
+        return len(calculadas)
+
+    @classmethod
+    def drift(cls, persona_ids=None):
+        """
+        Compara las estadísticas almacenadas con las calculadas
+
+        Returns:
+            Dict {persona_id: (almacenado, calculado)} solo con las personas que difieren
+        """
+
+        calculadas = cls.calcular(persona_ids)
+        almacenadas = cls.leer(persona_ids)
+
+        return {
+            persona_id: (almacenadas.get(persona_id), calculadas.get(persona_id))
+            for persona_id in set(calculadas) | set(almacenadas)
+            if almacenadas.get(persona_id) != calculadas.get(persona_id)
+        }
+
+    @classmethod
+    def obtener(cls, persona_id):
+        """
+        Estadísticas de una persona para el dashboard (una consulta por clave primaria)
+
+        Si la persona aún no tiene fila de estadísticas se calculan desde los exámenes
+        sin escribir nada (la fila la crean las señales o ``reconstruir_estadisticas``).
+        """
+
+        estadistica = EstadisticaPersona.objects.filter(persona_id=persona_id).first()
+        if estadistica is None:
+            estadistica = cls.calculada(persona_id)
+
+        return cls.resumen(estadistica)
+
+    @classmethod
+    def calculada(cls, persona_id):
+        """EstadisticaPersona sin guardar con los valores calculados, o None si no tiene exámenes"""
+        datos = cls.calcular([persona_id]).get(persona_id)
+        if datos is None:
+            return None
+        return EstadisticaPersona(
+            persona_id=persona_id,
+            total_examenes=datos['total_examenes'],
+            examenes_calificados=datos['examenes_calificados'],
+            suma_calificacion=datos['suma_calificacion']
+        )
+
+    @classmethod
+    async def aobtener(cls, persona_id):
+        """Versión async de ``obtener`` (el cálculo, si hace falta, corre en un hilo)"""
+        estadistica = await EstadisticaPersona.objects.filter(persona_id=persona_id).afirst()
+        if estadistica is None:
+            estadistica = await sync_to_async(cls.calculada)(persona_id)
+        return cls.resumen(estadistica)
+
+    @staticmethod
+    def resumen(estadistica):
+        if estadistica is None:
+            return {'cantidad': 0, 'promedio': 0}
+
+        return {
+            'cantidad': estadistica.total_examenes,
+            'promedio': estadistica.promedio_calificacion
+        }
+
+
+# Dimensiones de las distribuciones del dashboard: (campo, modelo del catálogo, clave del nombre)
+DIMENSIONES = (
+    ('estado_id', EstadoExamen, 'estado__nombre'),
+    ('area_estudio_id', AreaEstudio, 'area_estudio__nombre'),
+    ('nivel_id', NivelExamen, 'nivel__nombre'),
+)
+
+# Sumas parciales de una celda; se pueden acumular entre celdas (y entre días)
+SUMAS = (
+    'total_examenes', 'examenes_calificados', 'suma_calificacion',
+    'suma_puntaje_obtenido', 'con_puntaje_obtenido', 'suma_puntaje_maximo', 'con_puntaje_maximo',
+    'total_preguntas', 'total_respuestas', 'respuestas_correctas',
+)
+
+
+def _cantidad(queryset, campo_examen):
+    """Subquery con la cantidad de filas de ``queryset`` (correlacionado con OuterRef) por examen"""
+    return Coalesce(Subquery(queryset.order_by().values(campo_examen).annotate(c=Count('id')).values('c')), 0)
+
+
+class EstadisticasExamenesService:
+    """
+    Estadísticas de exámenes para dashboards (totales, promedios y distribuciones
+    por estado, área y nivel).
+
+    ``calcular`` resuelve todo en una sola consulta: en PostgreSQL con
+    ``GROUPING SETS``; en otros motores agrupando por (estado, área, nivel) y
+    sumando las celdas en memoria. Las cantidades de preguntas y respuestas se
+    cuentan con subconsultas por examen, sin multiplicar las filas de exámenes.
+
+    ``rango`` lee las fechas cerradas de ``EstadisticaDiaria`` y solo calcula en
+    vivo el día en curso, así que su costo no depende del volumen de exámenes.
+    Las señales de ``Examen`` marcan como pendientes los días cerrados de los
+    exámenes que se modifican o borran, y ``refrescar_pendientes`` (el cron) los
+    recalcula. Los cambios que no pasan por las señales (``QuerySet.update``,
+    preguntas y respuestas) solo se reflejan al recalcular esos días.
+    """
+
+    @staticmethod
+    def _filas(examenes_queryset):
+        """Una fila por examen con lo necesario para agregar"""
+        return examenes_queryset.order_by().annotate(
+            n_preguntas=_cantidad(Pregunta.objects.filter(examen_id=OuterRef('pk')), 'examen_id'),
+            n_respuestas=_cantidad(
+                Respuesta.objects.filter(pregunta__examen_id=OuterRef('pk')), 'pregunta__examen_id'
+            ),
+            n_correctas=_cantidad(
+                Respuesta.objects.filter(pregunta__examen_id=OuterRef('pk'), es_correcta=True), 'pregunta__examen_id'
+            ),
+        )
+
+    @classmethod
+    def agrupar(cls, examenes_queryset, *campos, **expresiones):
+        """
+        Celdas de sumas parciales agrupadas por ``campos`` (y ``expresiones`` anotadas)
+
+        Returns:
+            QuerySet de dicts con los campos de agrupación, SUMAS, ``calificacion_maxima``
+            y ``calificacion_minima``
+        """
+        return cls._filas(examenes_queryset).annotate(**expresiones).values(*campos, *expresiones).annotate(
+            total_examenes=Count('id'),
+            examenes_calificados=Count('calificacion'),
+            suma_calificacion=Coalesce(Sum('calificacion'), 0),
+            calificacion_maxima=Max('calificacion'),
+            calificacion_minima=Min('calificacion'),
+            suma_puntaje_obtenido=Sum('puntaje_obtenido'),
+            con_puntaje_obtenido=Count('puntaje_obtenido'),
+            suma_puntaje_maximo=Sum('puntaje_maximo'),
+            con_puntaje_maximo=Count('puntaje_maximo'),
+            total_preguntas=Sum('n_preguntas'),
+            total_respuestas=Sum('n_respuestas'),
+            respuestas_correctas=Sum('n_correctas'),
+        ).order_by()
+
+    @classmethod
+    def _grouping_sets(cls, examenes_queryset):
+        """Totales y subtotales por estado, área y nivel en una consulta (PostgreSQL)"""
+        campos = [campo for campo, _, _ in DIMENSIONES]
+        sql, params = cls._filas(examenes_queryset).values(
+            *campos, 'calificacion', 'puntaje_obtenido', 'puntaje_maximo', 'n_preguntas', 'n_respuestas', 'n_correctas'
+        ).query.sql_with_params()
+
+        conjuntos = ', '.join(f'(e.{campo})' for campo in campos)
+        sql = f"""
+            SELECT {', '.join(f'GROUPING(e.{campo})' for campo in campos)}, {', '.join(f'e.{campo}' for campo in campos)},
+                   COUNT(*), COUNT(e.calificacion), COALESCE(SUM(e.calificacion), 0),
+                   MAX(e.calificacion), MIN(e.calificacion),
+                   SUM(e.puntaje_obtenido), COUNT(e.puntaje_obtenido),
+                   SUM(e.puntaje_maximo), COUNT(e.puntaje_maximo),
+                   CAST(SUM(e.n_preguntas) AS bigint), CAST(SUM(e.n_respuestas) AS bigint),
+                   CAST(SUM(e.n_correctas) AS bigint)
+            FROM ({sql}) e
+            GROUP BY GROUPING SETS ((), {conjuntos})
+        """
+        columnas = SUMAS[:3] + ('calificacion_maxima', 'calificacion_minima') + SUMAS[3:]
+
+        grupos = {'total': cls._celda_vacia(), **{campo: {} for campo in campos}}
+        with connections[examenes_queryset.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            for fila in cursor.fetchall():
+                n = len(campos)
+                agrupado, valores, celda = fila[:n], fila[n:2 * n], dict(zip(columnas, fila[2 * n:]))
+                # GROUPING() = 0 en la dimensión por la que se agrupó la fila
+                dimension = [campo for campo, bit in zip(campos, agrupado) if not bit]
+                if dimension:
+                    grupos[dimension[0]][valores[campos.index(dimension[0])]] = celda
+                else:
+                    grupos['total'] = celda
+        return grupos
+
+    @staticmethod
+    def _celda_vacia():
+        return dict({suma: 0 for suma in SUMAS}, calificacion_maxima=None, calificacion_minima=None)
+
+    @classmethod
+    def _acumular(cls, destino, celda):
+        for suma in SUMAS:
+            # SUM() de conteos devuelve numeric en PostgreSQL: se dejan como enteros
+            valor = celda[suma] or 0
+            destino[suma] += valor if suma.startswith('suma_puntaje') else int(valor)
+        for clave, mejor in (('calificacion_maxima', max), ('calificacion_minima', min)):
+            if celda[clave] is not None:
+                destino[clave] = celda[clave] if destino[clave] is None else mejor(destino[clave], celda[clave])
+
+    @classmethod
+    def enrollar(cls, celdas):
+        """Totales y subtotales por estado, área y nivel a partir de celdas más finas"""
+        grupos = {'total': cls._celda_vacia(), **{campo: {} for campo, _, _ in DIMENSIONES}}
+        for celda in celdas:
+            cls._acumular(grupos['total'], celda)
+            for campo, _, _ in DIMENSIONES:
+                cls._acumular(grupos[campo].setdefault(celda[campo], cls._celda_vacia()), celda)
+        return grupos
+
+    @staticmethod
+    def _promedio(suma, cantidad):
+        return suma / cantidad if cantidad else None
+
+    @classmethod
+    def armar(cls, grupos):
+        """Estructura de ``statistics`` del reporte a partir de los totales y subtotales"""
+        total = grupos['total']
+        stats = {
+            'total_examenes': total['total_examenes'],
+            'promedio_calificacion': cls._promedio(total['suma_calificacion'], total['examenes_calificados']),
+            'calificacion_maxima': total['calificacion_maxima'],
+            'calificacion_minima': total['calificacion_minima'],
+            'promedio_puntaje_obtenido': cls._promedio(total['suma_puntaje_obtenido'], total['con_puntaje_obtenido']),
+            'promedio_puntaje_maximo': cls._promedio(total['suma_puntaje_maximo'], total['con_puntaje_maximo']),
+            'total_preguntas_generadas': total['total_preguntas'],
+            'total_respuestas': total['total_respuestas'],
+            'respuestas_correctas_total': total['respuestas_correctas'],
+            'porcentaje_aciertos_general': (
+                total['respuestas_correctas'] / total['total_respuestas'] * 100 if total['total_respuestas'] else 0.0
+            ),
+        }
+
+        for (campo, modelo, clave), nombre in zip(DIMENSIONES, ('estados', 'areas', 'niveles')):
+            # Se agrupa por nombre, como la distribución original (values('estado__nombre'))
+            por_nombre = {}
+            for pk, celda in grupos[campo].items():
+                if not celda['total_examenes']:
+                    continue
+                obj = catalogos.get(modelo, pk)
+                cls._acumular(por_nombre.setdefault(obj.nombre if obj else None, cls._celda_vacia()), celda)
+
+            distribucion = []
+            for nombre_catalogo, celda in por_nombre.items():
+                item = {clave: nombre_catalogo, 'cantidad': celda['total_examenes']}
+                if campo != 'estado_id':
+                    item['promedio_calificacion'] = cls._promedio(celda['suma_calificacion'], celda['examenes_calificados'])
+                distribucion.append(item)
+            distribucion.sort(key=lambda item: -item['cantidad'])
+            stats[f'distribucion_{nombre}'] = distribucion
+
+        return stats
+
+    @classmethod
+    def calcular(cls, examenes_queryset):
+        """
+        Estadísticas de los exámenes del queryset en una sola consulta
+
+        Args:
+            examenes_queryset: QuerySet de Examen (se ignoran su orden y prefetch)
+
+        Returns:
+            Dict con la estructura de ``statistics`` del reporte
+        """
+        if connections[examenes_queryset.db].vendor == 'postgresql':
+            grupos = cls._grouping_sets(examenes_queryset)
+        else:
+            campos = [campo for campo, _, _ in DIMENSIONES]
+            grupos = cls.enrollar(cls.agrupar(examenes_queryset, *campos))
+        return cls.armar(grupos)
+
+    # ESTADÍSTICAS DIARIAS
+
+    @staticmethod
+    def _inicio_dia(fecha):
+        return timezone.make_aware(datetime.combine(fecha, time.min))
+
+    @staticmethod
+    def dia(fecha_examen, created_at):
+        """Día (local) al que pertenece un examen en ``EstadisticaDiaria``"""
+        fecha = fecha_examen or created_at
+        if fecha is None:
+            return None
+        return timezone.localtime(fecha).date() if timezone.is_aware(fecha) else fecha.date()
+
+    @staticmethod
+    def marcar_pendientes(*dias):
+        """Marca los días cerrados (anteriores a hoy) para que el cron los recalcule"""
+        hoy = timezone.localdate()
+        cerrados = {dia for dia in dias if dia is not None and dia < hoy}
+        if cerrados:
+            EstadisticaDiariaPendiente.objects.bulk_create(
+                [EstadisticaDiariaPendiente(fecha=dia) for dia in cerrados], ignore_conflicts=True
+            )
+
+    @classmethod
+    def refrescar_pendientes(cls):
+        """
+        Recalcula los días marcados por ``marcar_pendientes`` y quita las marcas
+
+        Las marcas se borran en la misma transacción: un día que se vuelve a marcar
+        mientras tanto queda pendiente para la próxima ejecución.
+
+        Returns:
+            Cantidad de días recalculados
+        """
+        with transaction.atomic():
+            pendientes = EstadisticaDiariaPendiente.objects.select_for_update()
+            dias = sorted(pendientes.values_list('fecha', flat=True))
+            if not dias:
+                return 0
+            EstadisticaDiariaPendiente.objects.filter(fecha__in=dias).delete()
+            # Días consecutivos en un solo recálculo
+            desde = anterior = dias[0]
+            for dia in dias[1:] + [None]:
+                if dia is not None and dia == anterior + timedelta(days=1):
+                    anterior = dia
+                    continue
+                cls.refrescar_diarias(desde, anterior)
+                desde = anterior = dia
+        return len(dias)
+
+    @classmethod
+    def examenes_del_periodo(cls, desde=None, hasta=None):
+        """
+        Exámenes activos cuya fecha (``fecha_examen`` o, si no tiene, ``created_at``)
+        cae entre ``desde`` y ``hasta`` (días completos, ambos incluidos)
+        """
+        examenes = Examen.objects.filter(is_active=True)
+        if desde is not None:
+            inicio = cls._inicio_dia(desde)
+            examenes = examenes.filter(
+                Q(fecha_examen__gte=inicio) | Q(fecha_examen__isnull=True, created_at__gte=inicio)
+            )
+        if hasta is not None:
+            fin = cls._inicio_dia(hasta + timedelta(days=1))
+            examenes = examenes.filter(
+                Q(fecha_examen__lt=fin) | Q(fecha_examen__isnull=True, created_at__lt=fin)
+            )
+        return examenes
+
+    @classmethod
+    def refrescar_diarias(cls, desde, hasta):
+        """
+        Recalcula las filas de ``EstadisticaDiaria`` de los días entre ``desde`` y ``hasta``
+
+        Returns:
+            Cantidad de filas creadas
+        """
+        celdas = cls.agrupar(
+            cls.examenes_del_periodo(desde, hasta),
+            'area_estudio_id', 'nivel_id', 'estado_id',
+            fecha=TruncDate(Coalesce('fecha_examen', 'created_at'))
+        )
+        with transaction.atomic():
+            EstadisticaDiaria.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+            creadas = EstadisticaDiaria.objects.bulk_create([
+                EstadisticaDiaria(**dict(celda, **{suma: celda[suma] or 0 for suma in SUMAS}))
+                for celda in celdas
+            ], batch_size=1000)
+        return len(creadas)
+
+    @classmethod
+    def rango(cls, desde=None, hasta=None, estado_id=None, area_estudio_id=None, nivel_id=None):
+        """
+        Estadísticas de los exámenes activos de un rango de días para el dashboard
+
+        Los días anteriores a hoy se suman desde ``EstadisticaDiaria``; solo los
+        exámenes de hoy en adelante se calculan sobre la tabla de exámenes.
+
+        Returns:
+            Dict con la misma estructura que ``calcular``
+        """
+        hoy = timezone.localdate()
+        filtros = {
+            campo: valor for campo, valor in (
+                ('estado_id', estado_id), ('area_estudio_id', area_estudio_id), ('nivel_id', nivel_id)
+            ) if valor is not None
+        }
+
+        celdas = []
+        if desde is None or desde < hoy:
+            diarias = EstadisticaDiaria.objects.filter(fecha__lt=hoy, **filtros)
+            if desde is not None:
+                diarias = diarias.filter(fecha__gte=desde)
+            if hasta is not None:
+                diarias = diarias.filter(fecha__lte=hasta)
+            celdas.extend(diarias.values(
+                'estado_id', 'area_estudio_id', 'nivel_id', 'calificacion_maxima', 'calificacion_minima', *SUMAS
+            ))
+        if hasta is None or hasta >= hoy:
+            actuales = cls.examenes_del_periodo(max(desde or hoy, hoy), hasta).filter(**filtros)
+            celdas.extend(cls.agrupar(actuales, *(campo for campo, _, _ in DIMENSIONES)))
+
+        return cls.armar(cls.enrollar(celdas))
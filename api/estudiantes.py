@@ -0,0 +1,76 @@
+import io
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .autenticacion import CachedTokenAuthentication
+from .importacion import ImportacionEstudiantesService, ErrorImportacion, leer_csv
+
+
+def _lineas_progreso(filas, tamano_lote):
+    """Una línea NDJSON por lote importado y una línea final con los errores"""
+    progreso, error = None, None
+    try:
+        # Sin pool de procesos: no se hace fork del worker web
+        for progreso in ImportacionEstudiantesService.importar(filas, tamano_lote=tamano_lote, procesos=0):
+            yield json.dumps({
+                'procesadas': progreso['procesadas'],
+                'creados': progreso['creados'],
+                'errores': len(progreso['errores']),
+                'filas_por_segundo': round(progreso['filas_por_segundo'], 1),
+            }) + '\n'
+    except UnicodeDecodeError as ex:
+        # La respuesta ya empezó con 200: el error va en la línea final. Los lotes
+        # anteriores ya quedaron guardados y el lote en curso se descarta
+        error = f'El archivo no es UTF-8 válido: {ex}'
+    final = {
+        'terminado': error is None,
+        'procesadas': progreso['procesadas'] if progreso else 0,
+        'creados': progreso['creados'] if progreso else 0,
+        'segundos': round(progreso['segundos'], 3) if progreso else 0,
+        'errores': [{'linea': linea, 'mensaje': mensaje} for linea, mensaje in (progreso['errores'] if progreso else [])],
+    }
+    if error:
+        final['error'] = error
+    yield json.dumps(final, ensure_ascii=False) + '\n'
+
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def importar_estudiantes(request):
+    """
+    Importa estudiantes desde un CSV (solo personal administrativo)
+
+    Body (multipart):
+    - archivo: CSV UTF-8 con las columnas nombre1, apellido1, correo
+      (opcionales: nombre2, apellido2, cedula, telefono, password)
+    - lote: Filas por transacción (opcional, 500 por defecto)
+
+    Responde en streaming (NDJSON) con el progreso de cada lote; la última línea
+    trae el total y los errores por número de línea (``terminado`` es false y
+    ``error`` trae el motivo si el archivo deja de ser UTF-8 válido a la mitad).
+    Para archivos grandes conviene el comando ``importar_estudiantes``, que hashea
+    las contraseñas en un pool de procesos.
+    """
+    archivo = request.FILES.get('archivo')
+    if archivo is None:
+        return Response({'result': False, 'message': 'Falta el archivo CSV'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        tamano_lote = max(1, min(int(request.data.get('lote') or 500), 5000))
+    except (TypeError, ValueError):
+        return Response({'result': False, 'message': 'Lote no válido'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        filas = leer_csv(io.TextIOWrapper(archivo.file, encoding='utf-8-sig', newline=''))
+    except (ErrorImportacion, UnicodeDecodeError) as ex:
+        return Response({'result': False, 'message': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return StreamingHttpResponse(
+        _lineas_progreso(filas, tamano_lote),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
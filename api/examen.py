@@ -1,13 +1,27 @@
 from django.db.models import (
-    Prefetch, Count, Avg, Sum, Max, Min,
-    Case, When, Value, IntegerField, Q
+    Prefetch, prefetch_related_objects, Count, Sum,
+    Value, DecimalField, Q, OuterRef, Subquery
 )
+from django.conf import settings
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models.functions import Coalesce
 from decimal import Decimal
 import json
 from datetime import datetime, timedelta
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
+from rest_framework.permissions import IsAdminUser
+from .autenticacion import CachedTokenAuthentication
+from .paginacion import KeysetPaginator, CursorInvalido
+from .catalogos import catalogos
+from .serializacion import ExamValuesSerializer
+from .renderizado import render_response, renderer_classes_disponibles
+from .condicional import calcular_etag, respuesta_condicional, agregar_etag
+from .estadisticas import EstadisticasExamenesService
+from .resultados import url_resultado
+from .instrumentacion import fase
+from .detector import presupuesto_consultas
+from .proyeccion import COMPLETA, Proyeccion, ProyeccionInvalida
 from .models import (
     Examen, Pregunta, Respuesta, GeneracionIA,
     AreaEstudio, TemaAreaEstudio, NivelExamen,
@@ -15,11 +29,18 @@ from .models import (
 )
 
 
+# Cantidad de exámenes cargados por bloque en el reporte NDJSON
+NDJSON_CHUNK_SIZE = 100
+
+# Serializadores disponibles: instancias del ORM o tuplas de values_list
+SERIALIZER_BACKENDS = ('orm', 'values')
+
+
 class ExamReportService:
     """Servicio para generar reportes completos de exámenes optimizados para React"""
 
     @staticmethod
-    def get_exam_complete_data(exam_id=None, persona_id=None, filters=None):
+    def get_exam_complete_data(exam_id=None, persona_id=None, filters=None, proyeccion=None):
         """
         Obtiene datos completos de exámenes con todas las relaciones optimizadas
 
@@ -27,70 +48,77 @@ class ExamReportService:
             exam_id: ID específico del examen (opcional)
             persona_id: ID de la persona para filtrar sus exámenes (opcional)
             filters: Diccionario con filtros adicionales (opcional)
+            proyeccion: Proyeccion con los campos y relaciones a devolver (opcional);
+                las relaciones no pedidas no se cargan y las columnas no pedidas se difieren
 
         Returns:
             Dict con datos estructurados para React
         """
 
+        proyeccion = proyeccion or COMPLETA
+
+        # Los catálogos (estado, nivel, área, tipo...) no se unen con JOIN:
+        # se asignan desde el registro en memoria al serializar
+        catalogos.sync()
+
         # Base queryset con select_related para relaciones one-to-one/foreign-key
-        base_query = Examen.objects.select_related(
-            'persona',
-            'estado',
-            'calificado_por',
-            'nivel',
-            'area_estudio'
-        ).prefetch_related(
+        # (con el usuario: Persona.__str__ (nombre_completo) lee user.username)
+        # (select_related() sin argumentos uniría todas las FK: solo se llama si hay alguna)
+        relacionadas = [
+            f'{relacion}__user' for relacion in ('persona', 'calificado_por') if proyeccion.incluye(relacion)
+        ]
+        base_query = Examen.objects.select_related(*relacionadas) if relacionadas else Examen.objects.all()
+
+        prefetch = []
+        if proyeccion.incluye('preguntas'):
             # Prefetch optimizado para preguntas con sus respuestas
-            Prefetch(
+            prefetch.append(Prefetch(
                 'preguntas',
-                queryset=Pregunta.objects.select_related(
-                    'tipo', 'estado'
-                ).prefetch_related(
-                    Prefetch(
-                        'respuestas',
-                        queryset=Respuesta.objects.select_related('es_vof')
-                    )
-                ).order_by('id')
-            ),
+                queryset=Pregunta.objects.prefetch_related(ExamReportService.prefetch_respuestas()).order_by('id')
+            ))
+        if proyeccion.incluye('temas'):
             # Prefetch para temas del área de estudio
-            'tema',
+            prefetch.append(Prefetch('tema', queryset=TemaAreaEstudio.objects.order_by('id')))
+        if proyeccion.incluye('generacion_ia'):
             # Prefetch para generación IA si existe
-            Prefetch(
+            prefetch.append(Prefetch(
                 'generacionia',
-                queryset=GeneracionIA.objects.select_related(
-                    'area', 'temas', 'nivel'
-                )
-            )
-        ).annotate(
-            # Agregaciones útiles para el reporte
-            total_preguntas=Count('preguntas', distinct=True),
-            total_respuestas=Count('preguntas__respuestas', distinct=True),
-            respuestas_correctas=Count(
-                'preguntas__respuestas',
-                filter=Q(preguntas__respuestas__es_correcta=True),
-                distinct=True
-            ),
-            porcentaje_aciertos=Case(
-                When(
-                    total_respuestas__gt=0,
-                    then=(Count(
-                        'preguntas__respuestas',
-                        filter=Q(preguntas__respuestas__es_correcta=True),
-                        distinct=True
-                    ) * 100.0) / Count('preguntas__respuestas', distinct=True)
-                ),
-                default=Value(0.0),
-                output_field=IntegerField()
-            ),
-            puntaje_total_preguntas=Coalesce(
-                Sum('preguntas__puntaje'), Decimal('0.00')
-            ),
-            puntaje_total_respuestas=Coalesce(
-                Sum('preguntas__respuestas__puntaje'), Decimal('0.00')
-            )
+                queryset=GeneracionIA.objects.select_related('temas')
+            ))
+
+        # Agregaciones útiles para el reporte (solo las métricas pedidas)
+        anotaciones = ExamReportService.exam_metrics_annotations()
+        base_query = base_query.prefetch_related(*prefetch).annotate(
+            **{metrica: anotaciones[metrica] for metrica in proyeccion.metricas}
         )
+        if not proyeccion.completa:
+            base_query = base_query.only(*proyeccion.columnas)
 
         # Aplicar filtros específicos
+        base_query = ExamReportService.apply_filters(base_query, exam_id, persona_id, filters)
+
+        return base_query.order_by('-created_at', '-id')
+
+    @staticmethod
+    def prefetch_respuestas():
+        """Prefetch de las respuestas de cada pregunta en orden, con la persona de es_vof y su usuario"""
+        return Prefetch('respuestas', queryset=Respuesta.objects.select_related('es_vof__user').order_by('id'))
+
+    @staticmethod
+    def apply_filters(base_query, exam_id=None, persona_id=None, filters=None):
+        """
+        Aplica al queryset de exámenes los mismos filtros del reporte
+
+        Args:
+            base_query: QuerySet de Examen
+            exam_id: ID específico del examen (opcional)
+            persona_id: ID de la persona para filtrar sus exámenes (opcional)
+            filters: Diccionario con filtros adicionales (opcional)
+
+        Returns:
+            QuerySet filtrado
+        """
+
         if exam_id:
             base_query = base_query.filter(id=exam_id)
 
@@ -98,14 +126,21 @@ class ExamReportService:
             base_query = base_query.filter(persona_id=persona_id)
 
         if filters:
+            # Los filtros por nombre de catálogo se resuelven a id en memoria
             if filters.get('estado'):
-                base_query = base_query.filter(estado__nombre=filters['estado'])
+                base_query = base_query.filter(
+                    estado_id=catalogos.id_por_nombre(EstadoExamen, filters['estado']) or 0
+                )
 
             if filters.get('area_estudio'):
-                base_query = base_query.filter(area_estudio__nombre=filters['area_estudio'])
+                base_query = base_query.filter(
+                    area_estudio_id=catalogos.id_por_nombre(AreaEstudio, filters['area_estudio']) or 0
+                )
 
             if filters.get('nivel'):
-                base_query = base_query.filter(nivel__nombre=filters['nivel'])
+                base_query = base_query.filter(
+                    nivel_id=catalogos.id_por_nombre(NivelExamen, filters['nivel']) or 0
+                )
 
             if filters.get('fecha_desde'):
                 base_query = base_query.filter(fecha_examen__gte=filters['fecha_desde'])
@@ -116,104 +151,215 @@ class ExamReportService:
             if filters.get('calificacion_minima'):
                 base_query = base_query.filter(calificacion__gte=filters['calificacion_minima'])
 
-        return base_query.order_by('-created_at')
+        return base_query
 
     @staticmethod
-    def serialize_exam_data(examenes_queryset):
+    def exam_metrics_annotations():
+        """
+        Métricas por examen calculadas con subconsultas correlacionadas
+
+        Cada métrica se agrega sobre las preguntas (o respuestas) de un solo examen,
+        por lo que la consulta principal no multiplica examen × pregunta × respuesta
+        ni necesita DISTINCT, y ``puntaje_total_preguntas`` no se infla por la
+        cantidad de respuestas de cada pregunta.
+
+        Returns:
+            Dict de anotaciones para ``QuerySet.annotate``
+        """
+
+        preguntas = Pregunta.objects.filter(examen=OuterRef('pk')).order_by().values('examen')
+        respuestas = Respuesta.objects.filter(pregunta__examen=OuterRef('pk')).order_by().values('pregunta__examen')
+
+        def agregado(queryset, expresion, default):
+            return Coalesce(
+                Subquery(queryset.annotate(valor=expresion).values('valor')[:1]),
+                default
+            )
+
+        return {
+            'total_preguntas': agregado(preguntas, Count('id'), 0),
+            'total_respuestas': agregado(respuestas, Count('id'), 0),
+            'respuestas_correctas': agregado(respuestas.filter(es_correcta=True), Count('id'), 0),
+            'puntaje_total_preguntas': agregado(
+                preguntas, Sum('puntaje'), Value(Decimal('0.00'), output_field=DecimalField())
+            ),
+            'puntaje_total_respuestas': agregado(
+                respuestas, Sum('puntaje'), Value(Decimal('0.00'), output_field=DecimalField())
+            ),
+        }
+
+    @staticmethod
+    def get_serializer_backend(backend=None):
+        """Valida el serializador solicitado; por defecto usa settings.EXAM_SERIALIZER_BACKEND"""
+        if backend not in SERIALIZER_BACKENDS:
+            backend = getattr(settings, 'EXAM_SERIALIZER_BACKEND', 'orm')
+        return backend if backend in SERIALIZER_BACKENDS else 'orm'
+
+    @classmethod
+    def serialize(cls, examenes_queryset, backend=None, proyeccion=None):
+        """
+        Serializa los exámenes con el serializador indicado
+
+        Args:
+            examenes_queryset: QuerySet de exámenes obtenido de get_exam_complete_data
+            backend: ``orm`` (instancias de modelo) o ``values`` (tuplas de values_list)
+            proyeccion: La misma Proyeccion usada en get_exam_complete_data (opcional)
+        """
+        if cls.get_serializer_backend(backend) == 'values':
+            return ExamValuesSerializer.serialize(examenes_queryset, proyeccion)
+        examenes, _ = cls.load_exams(examenes_queryset)
+        with fase('serializacion'):
+            return cls.serialize_exam_data(examenes, proyeccion)
+
+    @classmethod
+    def serialize_page(cls, examenes_queryset, cursor=None, page_size=None, backend=None, proyeccion=None):
+        """
+        Pagina por cursor y serializa una página de exámenes
+
+        Returns:
+            Tupla (lista de exámenes serializados, cursor siguiente o None)
+        """
+        paginator = KeysetPaginator(page_size)
+        if cls.get_serializer_backend(backend) == 'values':
+            with fase('consulta'):
+                filas, next_cursor = paginator.paginate(
+                    ExamValuesSerializer.exam_rows(examenes_queryset, proyeccion), cursor
+                )
+            return ExamValuesSerializer.serialize_rows(filas, proyeccion), next_cursor
+        examenes, next_cursor = cls.load_exams(examenes_queryset, paginator, cursor)
+        with fase('serializacion'):
+            return cls.serialize_exam_data(examenes, proyeccion), next_cursor
+
+    @staticmethod
+    def load_exams(examenes_queryset, paginator=None, cursor=None):
+        """
+        Lee los exámenes y luego ejecuta cada prefetch por separado
+
+        Es lo mismo que evaluar el queryset, pero la consulta base y cada prefetch
+        quedan medidos como fases distintas (Server-Timing). Al paginar, los
+        prefetch no incluyen la fila extra que se pide para calcular el cursor.
+
+        Returns:
+            Tupla (lista de exámenes con sus relaciones cargadas, cursor siguiente o None)
+        """
+        lookups = examenes_queryset._prefetch_related_lookups
+        base_query = examenes_queryset.prefetch_related(None)
+        with fase('consulta'):
+            if paginator is None:
+                examenes, next_cursor = list(base_query), None
+            else:
+                examenes, next_cursor = paginator.split_page(list(paginator.page_queryset(base_query, cursor)))
+
+        for lookup in lookups:
+            with fase(f'prefetch_{getattr(lookup, "prefetch_to", lookup)}'):
+                prefetch_related_objects(examenes, lookup)
+        return examenes, next_cursor
+
+    @staticmethod
+    def serialize_exam_data(examenes_queryset, proyeccion=None):
         """
         Serializa los datos del examen en formato JSON optimizado para React
 
         Args:
             examenes_queryset: QuerySet de exámenes obtenido de get_exam_complete_data
+            proyeccion: La misma Proyeccion usada en get_exam_complete_data (opcional)
 
         Returns:
             Dict con estructura JSON para React
         """
 
-        examenes_data = []
-
-        for examen in examenes_queryset:
-            # Información básica del examen
-            examen_data = {
-                'id': examen.id,
-                'titulo': examen.titulo,
-                'descripcion': examen.descripcion,
-                'fecha_examen': examen.fecha_examen.isoformat() if examen.fecha_examen else None,
-                'fecha_creacion': examen.fecha_creacion.isoformat() if hasattr(examen, 'fecha_creacion') else None,
-                'duracion_minutos': int(examen.duracion.total_seconds() / 60) if examen.duracion else None,
-                'puntaje_maximo': float(examen.puntaje_maximo) if examen.puntaje_maximo else 0.0,
-                'puntaje_obtenido': float(examen.puntaje_obtenido) if examen.puntaje_obtenido else 0.0,
-                'calificacion': examen.calificacion,
-
-                # Métricas calculadas
-                'total_preguntas': examen.total_preguntas,
-                'total_respuestas': examen.total_respuestas,
-                'respuestas_correctas': examen.respuestas_correctas,
-                'porcentaje_aciertos': float(examen.porcentaje_aciertos) if examen.porcentaje_aciertos else 0.0,
-                'puntaje_total_preguntas': float(examen.puntaje_total_preguntas),
-                'puntaje_total_respuestas': float(examen.puntaje_total_respuestas),
-
-                # Información de la persona
-                'persona': {
-                    'id': examen.persona.id,
-                    'nombre_completo': f"{examen.persona.nombres} {examen.persona.apellidos}" if hasattr(examen.persona,
-                                                                                                         'nombres') else str(
-                        examen.persona),
-                    'email': getattr(examen.persona, 'email', None),
-                } if examen.persona else None,
-
-                # Estado del examen
-                'estado': {
-                    'id': examen.estado.id,
-                    'nombre': examen.estado.nombre,
-                    'descripcion': examen.estado.descripcion
-                } if examen.estado else None,
-
-                # Calificado por
-                'calificado_por': {
-                    'id': examen.calificado_por.id,
-                    'nombre_completo': f"{examen.calificado_por.nombres} {examen.calificado_por.apellidos}" if hasattr(
-                        examen.calificado_por, 'nombres') else str(examen.calificado_por),
-                } if examen.calificado_por else None,
-
-                # Nivel del examen
-                'nivel': {
-                    'id': examen.nivel.id,
-                    'nombre': examen.nivel.nombre,
-                    'descripcion': examen.nivel.descripcion
-                } if examen.nivel else None,
-
-                # Área de estudio
-                'area_estudio': {
-                    'id': examen.area_estudio.id,
-                    'nombre': examen.area_estudio.nombre,
-                    'descripcion': examen.area_estudio.descripcion
-                } if examen.area_estudio else None,
-
-                # Temas relacionados
-                'temas': [
-                    {
-                        'id': tema.id,
-                        'nombre': tema.nombre,
-                        'descripcion': tema.descripcion,
-                        'area': tema.area.nombre if tema.area else None
-                    }
-                    for tema in examen.tema.all()
-                ],
-
-                # Información de generación IA (si existe)
-                'generacion_ia': None,
-
-                # Preguntas completas con respuestas
-                'preguntas': []
-            }
+        return [
+            ExamReportService.serialize_exam(examen, proyeccion)
+            for examen in examenes_queryset
+        ]
 
-            # Agregar información de generación IA si existe
+    @staticmethod
+    def serialize_exam(examen, proyeccion=None):
+        """
+        Serializa un único examen (con sus preguntas y respuestas)
+
+        Args:
+            examen: Instancia de Examen obtenida de get_exam_complete_data
+            proyeccion: La misma Proyeccion usada en get_exam_complete_data (opcional)
+
+        Returns:
+            Dict con la estructura JSON del examen
+        """
+
+        proyeccion = proyeccion or COMPLETA
+        catalogos.attach(examen, *proyeccion.catalogos)
+
+        # Información básica del examen y métricas calculadas
+        examen_data = {clave: valor(examen) for clave, valor in proyeccion.escalares}
+
+        # Información de la persona
+        if proyeccion.incluye('persona'):
+            examen_data['persona'] = {
+                'id': examen.persona.id,
+                'nombre_completo': f"{examen.persona.nombres} {examen.persona.apellidos}" if hasattr(examen.persona,
+                                                                                                     'nombres') else str(
+                    examen.persona),
+                'email': getattr(examen.persona, 'email', None),
+            } if examen.persona else None
+
+        # Estado del examen
+        if proyeccion.incluye('estado'):
+            examen_data['estado'] = {
+                'id': examen.estado.id,
+                'nombre': examen.estado.nombre,
+                'descripcion': examen.estado.descripcion
+            } if examen.estado else None
+
+        # Calificado por
+        if proyeccion.incluye('calificado_por'):
+            examen_data['calificado_por'] = {
+                'id': examen.calificado_por.id,
+                'nombre_completo': f"{examen.calificado_por.nombres} {examen.calificado_por.apellidos}" if hasattr(
+                    examen.calificado_por, 'nombres') else str(examen.calificado_por),
+            } if examen.calificado_por else None
+
+        # Nivel del examen
+        if proyeccion.incluye('nivel'):
+            examen_data['nivel'] = {
+                'id': examen.nivel.id,
+                'nombre': examen.nivel.nombre,
+                'descripcion': examen.nivel.descripcion
+            } if examen.nivel else None
+
+        # Área de estudio
+        if proyeccion.incluye('area_estudio'):
+            examen_data['area_estudio'] = {
+                'id': examen.area_estudio.id,
+                'nombre': examen.area_estudio.nombre,
+                'descripcion': examen.area_estudio.descripcion
+            } if examen.area_estudio else None
+
+        # Temas relacionados
+        if proyeccion.incluye('temas'):
+            temas = examen.tema.all()
+            for tema in temas:
+                catalogos.attach(tema, 'area')
+            examen_data['temas'] = [
+                {
+                    'id': tema.id,
+                    'nombre': tema.nombre,
+                    'descripcion': tema.descripcion,
+                    'area': tema.area.nombre if tema.area else None
+                }
+                for tema in temas
+            ]
+
+        # Información de generación IA (si existe)
+        if proyeccion.incluye('generacion_ia'):
+            examen_data['generacion_ia'] = None
             if hasattr(examen, 'generacionia') and examen.generacionia:
                 gen_ia = examen.generacionia
+                catalogos.attach(gen_ia, 'area', 'nivel')
                 examen_data['generacion_ia'] = {
                     'id': gen_ia.id,
-                    'resultadojson': gen_ia.resultadojson,
+                    # El resultado (puede pesar cientos de KB) se sirve aparte, comprimido
+                    'resultado_url': url_resultado(gen_ia.id),
+                    'resultado_hash': gen_ia.resultado_hash or None,
                     'area': {
                         'id': gen_ia.area.id,
                         'nombre': gen_ia.area.nombre
@@ -229,46 +375,65 @@ class ExamReportService:
                     'fecha_generacion': gen_ia.fecha_creacion.isoformat() if hasattr(gen_ia, 'fecha_creacion') else None
                 }
 
-            # Serializar preguntas con respuestas
-            for pregunta in examen.preguntas.all():
-                pregunta_data = {
-                    'id': pregunta.id,
-                    'enunciado': pregunta.enunciado,
-                    'puntaje': float(pregunta.puntaje) if pregunta.puntaje else 0.0,
-                    'tipo': {
-                        'id': pregunta.tipo.id,
-                        'nombre': pregunta.tipo.nombre,
-                        'descripcion': pregunta.tipo.descripcion
-                    } if pregunta.tipo else None,
-                    'estado': {
-                        'id': pregunta.estado.id,
-                        'nombre': pregunta.estado.nombre,
-                        'descripcion': pregunta.estado.descripcion
-                    } if pregunta.estado else None,
-                    'respuestas': []
-                }
+        # Preguntas completas con respuestas
+        if proyeccion.incluye('preguntas'):
+            examen_data['preguntas'] = ExamReportService.serialize_preguntas(examen)
 
-                # Serializar respuestas
-                for respuesta in pregunta.respuestas.all():
-                    respuesta_data = {
-                        'id': respuesta.id,
-                        'texto': respuesta.texto,
-                        'es_correcta': respuesta.es_correcta,
-                        'justificacion': respuesta.justificacion,
-                        'puntaje': float(respuesta.puntaje) if respuesta.puntaje else 0.0,
-                        'es_vof': {
-                            'id': respuesta.es_vof.id,
-                            'nombre_completo': f"{respuesta.es_vof.nombres} {respuesta.es_vof.apellidos}" if hasattr(
-                                respuesta.es_vof, 'nombres') else str(respuesta.es_vof),
-                        } if respuesta.es_vof else None
-                    }
-                    pregunta_data['respuestas'].append(respuesta_data)
+        return examen_data
 
-                examen_data['preguntas'].append(pregunta_data)
+    @staticmethod
+    def serialize_preguntas(examen):
+        """Serializa las preguntas (ya cargadas con prefetch) de un examen con sus respuestas"""
+        return [ExamReportService.serialize_pregunta(pregunta) for pregunta in examen.preguntas.all()]
 
-            examenes_data.append(examen_data)
+    @staticmethod
+    def serialize_pregunta(pregunta):
+        """
+        Serializa una pregunta con sus respuestas
 
-        return examenes_data
+        Args:
+            pregunta: Instancia de Pregunta con ``respuestas`` cargadas con prefetch
+                (y ``es_vof__user`` con select_related)
+
+        Returns:
+            Dict con la estructura JSON de la pregunta
+        """
+
+        catalogos.attach(pregunta, 'tipo', 'estado')
+        pregunta_data = {
+            'id': pregunta.id,
+            'enunciado': pregunta.enunciado,
+            'puntaje': float(pregunta.puntaje) if pregunta.puntaje else 0.0,
+            'tipo': {
+                'id': pregunta.tipo.id,
+                'nombre': pregunta.tipo.nombre,
+                'descripcion': pregunta.tipo.descripcion
+            } if pregunta.tipo else None,
+            'estado': {
+                'id': pregunta.estado.id,
+                'nombre': pregunta.estado.nombre,
+                'descripcion': pregunta.estado.descripcion
+            } if pregunta.estado else None,
+            'respuestas': []
+        }
+
+        # Serializar respuestas
+        for respuesta in pregunta.respuestas.all():
+            respuesta_data = {
+                'id': respuesta.id,
+                'texto': respuesta.texto,
+                'es_correcta': respuesta.es_correcta,
+                'justificacion': respuesta.justificacion,
+                'puntaje': float(respuesta.puntaje) if respuesta.puntaje else 0.0,
+                'es_vof': {
+                    'id': respuesta.es_vof.id,
+                    'nombre_completo': f"{respuesta.es_vof.nombres} {respuesta.es_vof.apellidos}" if hasattr(
+                        respuesta.es_vof, 'nombres') else str(respuesta.es_vof),
+                } if respuesta.es_vof else None
+            }
+            pregunta_data['respuestas'].append(respuesta_data)
+
+        return pregunta_data
 
     @staticmethod
     def get_exam_statistics(examenes_queryset):
@@ -282,64 +447,12 @@ class ExamReportService:
             Dict con estadísticas agregadas
         """
 
-        stats = examenes_queryset.aggregate(
-            total_examenes=Count('id'),
-            promedio_calificacion=Avg('calificacion'),
-            calificacion_maxima=Max('calificacion'),
-            calificacion_minima=Min('calificacion'),
-            promedio_puntaje_obtenido=Avg('puntaje_obtenido'),
-            promedio_puntaje_maximo=Avg('puntaje_maximo'),
-            total_preguntas_generadas=Sum('preguntas__id', distinct=True),
-            total_respuestas=Count('preguntas__respuestas', distinct=True),
-            respuestas_correctas_total=Count(
-                'preguntas__respuestas',
-                filter=Q(preguntas__respuestas__es_correcta=True),
-                distinct=True
-            )
-        )
-
-        # Calcular porcentaje de aciertos general
-        if stats['total_respuestas'] and stats['total_respuestas'] > 0:
-            stats['porcentaje_aciertos_general'] = (
-                                                           stats['respuestas_correctas_total'] / stats[
-                                                       'total_respuestas']
-                                                   ) * 100
-        else:
-            stats['porcentaje_aciertos_general'] = 0.0
-
-        # Distribución por estado
-        estados_distribucion = examenes_queryset.values(
-            'estado__nombre'
-        ).annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
-
-        # Distribución por área de estudio
-        areas_distribucion = examenes_queryset.values(
-            'area_estudio__nombre'
-        ).annotate(
-            cantidad=Count('id'),
-            promedio_calificacion=Avg('calificacion')
-        ).order_by('-cantidad')
-
-        # Distribución por nivel
-        niveles_distribucion = examenes_queryset.values(
-            'nivel__nombre'
-        ).annotate(
-            cantidad=Count('id'),
-            promedio_calificacion=Avg('calificacion')
-        ).order_by('-cantidad')
-
-        stats.update({
-            'distribucion_estados': list(estados_distribucion),
-            'distribucion_areas': list(areas_distribucion),
-            'distribucion_niveles': list(niveles_distribucion)
-        })
-
-        return stats
+        # Una sola consulta (GROUPING SETS en PostgreSQL) para totales y distribuciones
+        return EstadisticasExamenesService.calcular(examenes_queryset)
 
     @classmethod
-    def generate_complete_report(cls, exam_id=None, persona_id=None, filters=None):
+    def generate_complete_report(cls, exam_id=None, persona_id=None, filters=None, cursor=None, page_size=None,
+                                 backend=None, proyeccion=None):
         """
         Genera un reporte completo listo para ser enviado a React
 
@@ -347,64 +460,148 @@ class ExamReportService:
             exam_id: ID específico del examen (opcional)
             persona_id: ID de la persona para filtrar sus exámenes (opcional)
             filters: Diccionario con filtros adicionales (opcional)
+            cursor: Cursor de la página a obtener (opcional)
+            page_size: Tamaño de página; si se omite junto con el cursor no se pagina
+            backend: Serializador a usar (``orm`` o ``values``); por defecto EXAM_SERIALIZER_BACKEND
+            proyeccion: Proyeccion con los campos y relaciones de cada examen (opcional)
 
         Returns:
             Dict con reporte completo estructurado
         """
 
         # Obtener datos de exámenes
-        examenes_queryset = cls.get_exam_complete_data(exam_id, persona_id, filters)
+        examenes_queryset = cls.get_exam_complete_data(exam_id, persona_id, filters, proyeccion)
 
-        # Serializar datos
-        examenes_data = cls.serialize_exam_data(examenes_queryset)
+        # Serializar datos (paginando por cursor si se solicita)
+        if cursor or page_size:
+            examenes_data, next_cursor = cls.serialize_page(examenes_queryset, cursor, page_size, backend, proyeccion)
+        else:
+            examenes_data, next_cursor = cls.serialize(examenes_queryset, backend, proyeccion), None
 
         # Calcular estadísticas
-        statistics = cls.get_exam_statistics(examenes_queryset)
+        with fase('estadisticas'):
+            statistics = cls.get_exam_statistics(examenes_queryset)
 
-        # Estructura final del reporte
-        report = {
-            'metadata': {
-                'generated_at': datetime.now().isoformat(),
-                'total_records': len(examenes_data),
-                'filters_applied': filters or {},
-                'exam_id_filter': exam_id,
-                'persona_id_filter': persona_id
-            },
+        return cls.build_report(exam_id, persona_id, filters, examenes_data, next_cursor, statistics, proyeccion)
+
+    @classmethod
+    def build_report(cls, exam_id, persona_id, filters, examenes_data, next_cursor, statistics, proyeccion=None):
+        """
+        Estructura final del reporte a partir de los exámenes ya serializados
+
+        Si la proyección no incluye el estado, los contadores de completados y
+        calificados del resumen son None.
+        """
+        con_estado = (proyeccion or COMPLETA).incluye('estado')
+        return {
+            'metadata': cls.build_metadata(exam_id, persona_id, filters, len(examenes_data)),
             'examenes': examenes_data,
+            'pagination': {
+                'next': next_cursor,
+                'page_size': len(examenes_data)
+            },
             'statistics': statistics,
-            'summary': {
-                'total_examenes': len(examenes_data),
-                'examenes_completados': len(
-                    [e for e in examenes_data if e.get('estado', {}).get('nombre') == 'EXAMEN COMPLETADO']),
-                'examenes_calificados': len(
-                    [e for e in examenes_data if e.get('estado', {}).get('nombre') == 'EXAMEN CALIFICADO']),
-                'promedio_general_calificacion': statistics.get('promedio_calificacion', 0),
-                'areas_mas_frecuentes': statistics.get('distribucion_areas', [])[:5]  # Top 5 áreas
-            }
+            'summary': cls.build_summary(
+                statistics,
+                total_examenes=len(examenes_data),
+                examenes_completados=len(
+                    [e for e in examenes_data if (e.get('estado') or {}).get('nombre') == 'EXAMEN COMPLETADO']
+                ) if con_estado else None,
+                examenes_calificados=len(
+                    [e for e in examenes_data if (e.get('estado') or {}).get('nombre') == 'EXAMEN CALIFICADO']
+                ) if con_estado else None
+            )
+        }
+
+    @classmethod
+    def stream_complete_report(cls, exam_id=None, persona_id=None, filters=None, chunk_size=100, proyeccion=None):
+        """
+        Genera el reporte completo en formato NDJSON (un objeto JSON por línea)
+
+        Los exámenes se recorren por bloques de ``chunk_size`` con ``iterator()``,
+        de modo que los prefetch de preguntas/respuestas se hacen por bloque y la
+        memoria usada no depende de la cantidad de exámenes. Cada examen se emite
+        en su propia línea y al final se envía un registro con ``metadata``,
+        ``statistics`` y ``summary``.
+
+        Args:
+            exam_id: ID específico del examen (opcional)
+            persona_id: ID de la persona para filtrar sus exámenes (opcional)
+            filters: Diccionario con filtros adicionales (opcional)
+            chunk_size: Cantidad de exámenes cargados por bloque
+            proyeccion: Proyeccion con los campos y relaciones de cada examen (opcional)
+
+        Yields:
+            Líneas de texto JSON terminadas en salto de línea
+        """
+
+        examenes_queryset = cls.get_exam_complete_data(exam_id, persona_id, filters, proyeccion)
+        con_estado = (proyeccion or COMPLETA).incluye('estado')
+
+        total = completados = calificados = 0
+
+        for examen in examenes_queryset.iterator(chunk_size=chunk_size):
+            examen_data = cls.serialize_exam(examen, proyeccion)
+            estado = (examen_data.get('estado') or {}).get('nombre')
+            total += 1
+            if estado == 'EXAMEN COMPLETADO':
+                completados += 1
+            elif estado == 'EXAMEN CALIFICADO':
+                calificados += 1
+            yield cls.dump_ndjson_line({'examen': examen_data})
+
+        statistics = cls.get_exam_statistics(examenes_queryset)
+
+        yield cls.dump_ndjson_line({
+            'metadata': cls.build_metadata(exam_id, persona_id, filters, total),
+            'statistics': statistics,
+            'summary': cls.build_summary(
+                statistics,
+                total_examenes=total,
+                examenes_completados=completados if con_estado else None,
+                examenes_calificados=calificados if con_estado else None
+            )
+        })
+
+    @staticmethod
+    def dump_ndjson_line(data):
+        """Serializa un registro como una línea NDJSON"""
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+    @staticmethod
+    def build_metadata(exam_id, persona_id, filters, total_records):
+        """Construye el bloque ``metadata`` del reporte"""
+        return {
+            'generated_at': datetime.now().isoformat(),
+            'total_records': total_records,
+            'filters_applied': filters or {},
+            'exam_id_filter': exam_id,
+            'persona_id_filter': persona_id
         }
 
-        return report
+    @staticmethod
+    def build_summary(statistics, total_examenes, examenes_completados, examenes_calificados):
+        """Construye el bloque ``summary`` del reporte a partir de los contadores"""
+        return {
+            'total_examenes': total_examenes,
+            'examenes_completados': examenes_completados,
+            'examenes_calificados': examenes_calificados,
+            'promedio_general_calificacion': statistics.get('promedio_calificacion', 0),
+            'areas_mas_frecuentes': statistics.get('distribucion_areas', [])[:5]  # Top 5 áreas
+        }
 
 
-# Vista de ejemplo para usar el servicio
 class ExamReportAPIView:
     """Vista de API para obtener reportes de exámenes"""
 
-    def get_exam_report(self, request, exam_id=None):
+    def get_filters(self, request):
         """
-        Endpoint para obtener reporte completo de exámenes
+        Obtiene los filtros del reporte a partir de los query parameters
 
-        Query parameters:
-        - persona_id: ID de la persona
-        - estado: Estado del examen
-        - area_estudio: Área de estudio
-        - nivel: Nivel del examen
-        - fecha_desde: Fecha desde (YYYY-MM-DD)
-        - fecha_hasta: Fecha hasta (YYYY-MM-DD)
-        - calificacion_minima: Calificación mínima
+        Returns:
+            Tupla (persona_id, filters)
         """
 
-        # Obtener parámetros de filtro
         filters = {}
         persona_id = request.GET.get('persona_id')
 
@@ -439,19 +636,77 @@ class ExamReportAPIView:
             except ValueError:
                 pass
 
+        return persona_id, filters
+
+    def get_exam_report(self, request, exam_id=None):
+        """
+        Endpoint para obtener reporte completo de exámenes
+
+        Query parameters:
+        - persona_id: ID de la persona
+        - estado: Estado del examen
+        - area_estudio: Área de estudio
+        - nivel: Nivel del examen
+        - fecha_desde: Fecha desde (YYYY-MM-DD)
+        - fecha_hasta: Fecha hasta (YYYY-MM-DD)
+        - calificacion_minima: Calificación mínima
+        - formato: ``ndjson`` para recibir el reporte en streaming (un examen por línea)
+        - cursor: Cursor de la página siguiente (devuelto en ``pagination.next``)
+        - page_size: Cantidad de exámenes por página (máximo ``MAX_PAGE_SIZE``)
+        - serializer: ``orm`` o ``values`` para comparar ambos serializadores
+        - fields: campos y relaciones de cada examen (``id,titulo,calificacion``)
+        - include: relaciones a agregar (``estado,temas``); las no pedidas no se consultan
+
+        Responde con ``ETag``; con un ``If-None-Match`` vigente devuelve 304.
+        """
+
+        # Obtener parámetros de filtro
+        persona_id, filters = self.get_filters(request)
+        try:
+            proyeccion = Proyeccion.desde_request(request)
+        except ProyeccionInvalida as e:
+            return JsonResponse({'error': True, 'message': str(e)}, status=400)
+
+        # Validación condicional (If-None-Match) antes de armar el reporte
+        catalogos.sync()
+        etag = calcular_etag(
+            request,
+            ExamReportService.apply_filters(Examen.objects.all(), exam_id, persona_id, filters),
+            exam_id, persona_id
+        )
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return agregar_etag(no_modificado, etag)
+
+        if request.GET.get('formato') == 'ndjson':
+            return agregar_etag(StreamingHttpResponse(
+                ExamReportService.stream_complete_report(
+                    exam_id=exam_id,
+                    persona_id=persona_id,
+                    filters=filters if filters else None,
+                    chunk_size=NDJSON_CHUNK_SIZE,
+                    proyeccion=proyeccion
+                ),
+                content_type='application/x-ndjson; charset=utf-8'
+            ), etag)
+
         try:
             # Generar reporte completo
             report = ExamReportService.generate_complete_report(
                 exam_id=exam_id,
                 persona_id=persona_id,
-                filters=filters if filters else None
+                filters=filters if filters else None,
+                cursor=request.GET.get('cursor'),
+                page_size=KeysetPaginator.clamp_page_size(request.GET.get('page_size')),
+                backend=request.GET.get('serializer'),
+                proyeccion=proyeccion
             )
 
-            return JsonResponse(
-                report,
-                encoder=DjangoJSONEncoder,
-                json_dumps_params={'ensure_ascii': False, 'indent': 2}
-            )
+            # JSON compacto o MessagePack según Accept, comprimido según Accept-Encoding
+            return agregar_etag(render_response(request, report), etag)
+
+        except CursorInvalido as e:
+            return JsonResponse({'error': True, 'message': str(e)}, status=400)
 
         except Exception as e:
             return JsonResponse({
@@ -461,18 +716,44 @@ class ExamReportAPIView:
             }, status=500)
 
 
-# Ejemplo de uso en views.py
-"""
-from django.http import JsonResponse
-from .services import ExamReportService
-
+# ETag, catálogos, consulta base, 4 prefetch y estadísticas
+# (con los catálogos ya en memoria): no depende del tamaño de página
+@presupuesto_consultas(10)
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+@renderer_classes(renderer_classes_disponibles())
 def exam_report_view(request, exam_id=None):
+    """
+    Reporte completo de exámenes (solo personal administrativo).
+    """
     service = ExamReportAPIView()
     return service.get_exam_report(request, exam_id)
 
-# En urls.py
-urlpatterns = [
-    path('api/examenes/reporte/', exam_report_view, name='exam_report_all'),
-    path('api/examenes/reporte/<int:exam_id>/', exam_report_view, name='exam_report_single'),
-]
-"""
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+@renderer_classes(renderer_classes_disponibles())
+def exam_statistics_view(request):
+    """
+    Estadísticas de exámenes activos para el dashboard (solo personal administrativo).
+
+    Query parameters: fecha_desde, fecha_hasta (YYYY-MM-DD, días completos),
+    estado, area_estudio y nivel (por nombre). Los días cerrados se leen de
+    EstadisticaDiaria (``manage.py refrescar_estadisticas_diarias``).
+    """
+    _, filters = ExamReportAPIView().get_filters(request)
+    catalogos.sync()
+
+    def catalogo(modelo, clave):
+        return (catalogos.id_por_nombre(modelo, filters[clave]) or 0) if filters.get(clave) else None
+
+    statistics = EstadisticasExamenesService.rango(
+        desde=filters.get('fecha_desde'),
+        hasta=filters.get('fecha_hasta'),
+        estado_id=catalogo(EstadoExamen, 'estado'),
+        area_estudio_id=catalogo(AreaEstudio, 'area_estudio'),
+        nivel_id=catalogo(NivelExamen, 'nivel'),
+    )
+    return render_response(request, statistics)
@@ -0,0 +1,268 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .autenticacion import CachedTokenAuthentication
+from .catalogos import catalogos
+from .examen import ExamReportService, ExamReportAPIView
+from .models import (
+    Examen, Pregunta, Respuesta, EstadoExamen, NivelExamen, AreaEstudio, TipoPregunta
+)
+from .serializacion import _nombre_persona
+
+# Dependencia opcional: sin pyarrow solo está disponible la exportación a CSV
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+CSV = 'csv'
+PARQUET = 'parquet'
+ARROW = 'arrow'
+FORMATOS = {
+    CSV: ('text/csv; charset=utf-8', 'csv'),
+    PARQUET: ('application/vnd.apache.parquet', 'parquet'),
+    ARROW: ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# Exámenes leídos por bloque: cada bloque son tres consultas y un row group de Parquet
+EXAMENES_POR_LOTE = 200
+
+# Una fila por respuesta (examen × pregunta × respuesta); los exámenes sin preguntas y las
+# preguntas sin respuestas tienen una fila con las columnas siguientes vacías
+COLUMNAS = (
+    ('examen_id', 'int64'),
+    ('titulo', 'string'),
+    ('persona_id', 'int64'),
+    ('persona', 'string'),
+    ('estado', 'string'),
+    ('nivel', 'string'),
+    ('area_estudio', 'string'),
+    ('fecha_examen', 'timestamp'),
+    ('duracion_minutos', 'int64'),
+    ('puntaje_maximo', 'float64'),
+    ('puntaje_obtenido', 'float64'),
+    ('calificacion', 'int64'),
+    ('pregunta_id', 'int64'),
+    ('enunciado', 'string'),
+    ('tipo_pregunta', 'string'),
+    ('pregunta_puntaje', 'float64'),
+    ('respuesta_id', 'int64'),
+    ('respuesta_texto', 'string'),
+    ('es_correcta', 'bool'),
+    ('seleccionada', 'bool'),
+    ('respuesta_puntaje', 'float64'),
+)
+
+
+def _decimal(valor):
+    return float(valor) if valor is not None else None
+
+
+def _nombre(modelo, pk):
+    obj = catalogos.get(modelo, pk)
+    return obj.nombre if obj else None
+
+
+def lotes(examenes_queryset, examenes_por_lote=EXAMENES_POR_LOTE):
+    """
+    Filas planas de los exámenes, sus preguntas y sus respuestas, por bloques de exámenes
+
+    Los exámenes se recorren por id (paginación keyset) y de cada bloque se leen
+    las preguntas y las respuestas con ``values_list``: la memoria depende del
+    tamaño del bloque, no de la cantidad de exámenes.
+
+    Args:
+        examenes_queryset: QuerySet de Examen ya filtrado (se ignoran su orden y prefetch)
+        examenes_por_lote: Exámenes por bloque
+
+    Yields:
+        Listas de tuplas con los valores de ``COLUMNAS``
+    """
+    catalogos.sync()
+    examenes = examenes_queryset.select_related(None).prefetch_related(None).order_by('id').values_list(
+        'id', 'titulo', 'persona_id', 'persona__nombre1', 'persona__apellido1', 'persona__apellido2',
+        'persona__user__username', 'estado_id', 'nivel_id', 'area_estudio_id', 'fecha_examen', 'duracion',
+        'puntaje_maximo', 'puntaje_obtenido', 'calificacion'
+    )
+    ultimo_id = 0
+    while True:
+        bloque = list(examenes.filter(id__gt=ultimo_id)[:examenes_por_lote])
+        if not bloque:
+            return
+        ids = [fila[0] for fila in bloque]
+
+        respuestas = {}
+        for respuesta_id, pregunta_id, texto, es_correcta, seleccionada, puntaje in Respuesta.objects.filter(
+            pregunta__examen_id__in=ids
+        ).order_by('id').values_list('id', 'pregunta_id', 'texto', 'es_correcta', 'seleccionada', 'puntaje'):
+            respuestas.setdefault(pregunta_id, []).append(
+                (respuesta_id, texto, es_correcta, seleccionada, _decimal(puntaje))
+            )
+        preguntas = {}
+        for pregunta_id, examen_id, enunciado, tipo_id, puntaje in Pregunta.objects.filter(
+            examen_id__in=ids
+        ).order_by('id').values_list('id', 'examen_id', 'enunciado', 'tipo_id', 'puntaje'):
+            preguntas.setdefault(examen_id, []).append(
+                (pregunta_id, enunciado, _nombre(TipoPregunta, tipo_id), _decimal(puntaje))
+            )
+
+        filas = []
+        for (examen_id, titulo, persona_id, nombre1, apellido1, apellido2, username, estado_id, nivel_id,
+             area_id, fecha_examen, duracion, puntaje_maximo, puntaje_obtenido, calificacion) in bloque:
+            examen = (
+                examen_id, titulo, persona_id,
+                _nombre_persona(nombre1, apellido1, apellido2, username) if persona_id else None,
+                _nombre(EstadoExamen, estado_id), _nombre(NivelExamen, nivel_id), _nombre(AreaEstudio, area_id),
+                fecha_examen, int(duracion.total_seconds() / 60) if duracion else None,
+                _decimal(puntaje_maximo), _decimal(puntaje_obtenido), calificacion,
+            )
+            for pregunta in preguntas.get(examen_id) or [(None,) * 4]:
+                for respuesta in respuestas.get(pregunta[0]) or [(None,) * 5]:
+                    filas.append(examen + pregunta + respuesta)
+        yield filas
+        ultimo_id = ids[-1]
+
+
+class _Eco:
+    """Archivo que devuelve lo escrito (csv.writer sin acumular en memoria)"""
+
+    def write(self, valor):
+        return valor
+
+
+def csv_stream(lotes_filas):
+    """
+    CSV (con BOM, para que las planillas detecten UTF-8) a partir de ``lotes``
+
+    Yields:
+        Texto de cada bloque de filas
+    """
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow([nombre for nombre, _ in COLUMNAS])
+    for filas in lotes_filas:
+        yield ''.join(escritor.writerow(fila) for fila in filas)
+
+
+class _Sumidero:
+    """Destino de pyarrow que acumula los bytes escritos hasta que se retiran con ``vaciar``"""
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+        self.closed = False
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+def esquema():
+    """Esquema Arrow de ``COLUMNAS``"""
+    tipos = {
+        'int64': pyarrow.int64(),
+        'float64': pyarrow.float64(),
+        'bool': pyarrow.bool_(),
+        'string': pyarrow.string(),
+        'timestamp': pyarrow.timestamp('us', tz='UTC'),
+    }
+    return pyarrow.schema([(nombre, tipos[tipo]) for nombre, tipo in COLUMNAS])
+
+
+def record_batch(filas, esquema_arrow):
+    """Bloque de filas como RecordBatch columnar"""
+    columnas = list(zip(*filas)) if filas else [()] * len(COLUMNAS)
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(columna, type=campo.type) for columna, campo in zip(columnas, esquema_arrow)],
+        schema=esquema_arrow
+    )
+
+
+def arrow_stream(lotes_filas, formato=PARQUET):
+    """
+    Parquet (un row group por bloque) o Arrow IPC stream a partir de ``lotes``
+
+    Cada bloque se convierte a columnas, se escribe y sus bytes se entregan antes
+    de leer el siguiente; el pie del Parquet se envía al final.
+
+    Yields:
+        Bytes del archivo
+    """
+    if pyarrow is None:
+        raise RuntimeError('La exportación a Parquet/Arrow necesita el paquete pyarrow')
+    esquema_arrow = esquema()
+    sumidero = _Sumidero()
+    if formato == PARQUET:
+        escritor = pyarrow.parquet.ParquetWriter(sumidero, esquema_arrow, compression='zstd')
+    else:
+        escritor = pyarrow.ipc.new_stream(sumidero, esquema_arrow)
+    with escritor:
+        for filas in lotes_filas:
+            if filas:
+                escritor.write_batch(record_batch(filas, esquema_arrow))
+            yield sumidero.vaciar()
+    yield sumidero.vaciar()
+
+
+def exportar(lotes_filas, formato):
+    """Generador del archivo en ``formato`` (texto para CSV, bytes para Parquet/Arrow)"""
+    if formato == CSV:
+        return csv_stream(lotes_filas)
+    return arrow_stream(lotes_filas, formato)
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAdminUser])
+def exportar_examenes(request):
+    """
+    Exporta exámenes, preguntas y respuestas como filas planas (solo personal administrativo)
+
+    La respuesta se genera en streaming por bloques de exámenes, así que la memoria
+    no depende de la cantidad de exámenes exportados.
+
+    Query parameters:
+    - formato: ``csv`` (por defecto), ``parquet`` o ``arrow`` (Arrow IPC stream)
+    - persona_id, estado, area_estudio, nivel, fecha_desde, fecha_hasta y
+      calificacion_minima: los mismos filtros del reporte
+    """
+    formato = request.GET.get('formato') or CSV
+    if formato not in FORMATOS:
+        return Response(
+            {'error': f"Formato no válido: {formato}. Formatos: {', '.join(FORMATOS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if formato != CSV and pyarrow is None:
+        return Response(
+            {'error': f'La exportación a {formato} no está disponible (falta el paquete pyarrow)'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    persona_id, filters = ExamReportAPIView().get_filters(request)
+    catalogos.sync()
+    examenes = ExamReportService.apply_filters(Examen.objects.all(), None, persona_id, filters)
+
+    tipo, extension = FORMATOS[formato]
+    response = StreamingHttpResponse(exportar(lotes(examenes), formato), content_type=tipo)
+    response['Content-Disposition'] = f'attachment; filename="examenes.{extension}"'
+    return response
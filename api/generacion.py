@@ -0,0 +1,144 @@
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from core.models import Persona
+from .autenticacion import CachedTokenAuthentication
+from .catalogos import catalogos
+from .models import AreaEstudio, NivelExamen, TemaAreaEstudio, GeneracionIA
+from .resultados import serializar, calcular_hash, descomprimir
+from .trabajos import TrabajoGeneracionService
+
+
+def _entero(valor):
+    try:
+        return int(valor) if valor not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+@api_view(['POST'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def solicitar_generacion(request):
+    """
+    Encola la generación de un examen con IA y devuelve el id del trabajo
+
+    Body:
+    - area: ID del área de estudio
+    - tema: ID del tema (opcional)
+    - nivel: ID del nivel (opcional)
+
+    El examen lo genera un worker (``manage.py worker_generacion``); el estado se
+    consulta en ``generaciones/<id>/``.
+    """
+    catalogos.sync()
+    area_id = _entero(request.data.get('area'))
+    tema_id = _entero(request.data.get('tema'))
+    nivel_id = _entero(request.data.get('nivel'))
+
+    if catalogos.get(AreaEstudio, area_id) is None:
+        return Response({'result': False, 'message': 'Área de estudio no válida'}, status=status.HTTP_400_BAD_REQUEST)
+    if nivel_id is not None and catalogos.get(NivelExamen, nivel_id) is None:
+        return Response({'result': False, 'message': 'Nivel no válido'}, status=status.HTTP_400_BAD_REQUEST)
+    if tema_id is not None and not TemaAreaEstudio.objects.filter(id=tema_id, area_id=area_id).exists():
+        return Response({'result': False, 'message': 'Tema no válido'}, status=status.HTTP_400_BAD_REQUEST)
+
+    persona_id = Persona.objects.filter(user=request.user).values_list('id', flat=True).first()
+    if persona_id is None:
+        return Response({'result': False, 'message': 'El usuario no tiene persona'}, status=status.HTTP_400_BAD_REQUEST)
+
+    trabajo = TrabajoGeneracionService.encolar(persona_id, area_id, tema_id, nivel_id)
+    return Response({'id': trabajo.id, 'estado': trabajo.estado}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def estado_generacion(request, trabajo_id):
+    """Estado de un trabajo de generación del usuario (una sola consulta)"""
+    trabajo = TrabajoGeneracionService.estado(trabajo_id, request.user.id)
+    if trabajo is None:
+        return Response({'result': False, 'message': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(trabajo, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication])
+@permission_classes([IsAuthenticated])
+def resultado_generacion(request, generacion_id):
+    """
+    Resultado (JSON) de una generación IA del usuario
+
+    Si el cliente acepta la codificación con la que está guardado (``Accept-Encoding``
+    con gzip o zstd) se envían los bytes comprimidos tal cual, con ``Content-Encoding``;
+    si no, se descomprime. El ETag es el SHA-256 del JSON, con la codificación como
+    sufijo en la respuesta codificada (``"<hash>-gzip"``): con un ``If-None-Match``
+    vigente devuelve 304 sin leer el resultado.
+    """
+    generaciones = GeneracionIA.objects.filter(id=generacion_id)
+    if not request.user.is_staff:
+        generaciones = generaciones.filter(persona__user_id=request.user.id)
+    fila = generaciones.values_list('resultado_hash', 'resultado_codificacion').first()
+    if fila is None:
+        return Response({'result': False, 'message': 'Generación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    resultado_hash, codificacion = fila
+    # Solo las filas comprimidas tienen hash (las legadas lo calculan al servirse)
+    codificada = bool(resultado_hash) and acepta_codificacion(request, codificacion)
+
+    if resultado_hash:
+        etag = etag_resultado(resultado_hash, codificacion if codificada else None)
+        no_modificado = get_conditional_response(request, etag=etag)
+        if no_modificado is not None:
+            return agregar_cabeceras(no_modificado, etag)
+
+    comprimido, resultadojson = generaciones.values_list('resultado_comprimido', 'resultadojson').get()
+    if comprimido is None and resultadojson is None:
+        return Response({'result': False, 'message': 'La generación no tiene resultado'}, status=status.HTTP_404_NOT_FOUND)
+
+    if comprimido is not None and codificada:
+        response = HttpResponse(bytes(comprimido), content_type='application/json')
+        response['Content-Encoding'] = codificacion
+        return agregar_cabeceras(response, etag)
+
+    if comprimido is not None:
+        try:
+            contenido = descomprimir(comprimido, codificacion)
+        except RuntimeError as ex:
+            # Fila zstd en un host sin el paquete zstandard: solo se puede enviar tal cual
+            return Response({'result': False, 'message': str(ex)}, status=status.HTTP_406_NOT_ACCEPTABLE)
+    else:
+        # Fila no migrada con comprimir_resultados
+        contenido = serializar(resultadojson)
+    etag = etag_resultado(resultado_hash or calcular_hash(contenido))
+    if not resultado_hash:
+        no_modificado = get_conditional_response(request, etag=etag)
+        if no_modificado is not None:
+            return agregar_cabeceras(no_modificado, etag)
+    response = HttpResponse(contenido, content_type='application/json')
+    return agregar_cabeceras(response, etag)
+
+
+def etag_resultado(resultado_hash, codificacion=None):
+    """ETag fuerte del resultado: cada representación (identity, gzip, zstd) tiene el suyo"""
+    return f'"{resultado_hash}-{codificacion}"' if codificacion else f'"{resultado_hash}"'
+
+
+def acepta_codificacion(request, codificacion):
+    """True si el ``Accept-Encoding`` del request incluye ``codificacion`` (sin q=0)"""
+    for parte in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        if nombre.strip().lower() == codificacion:
+            return parametros.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def agregar_cabeceras(response, etag):
+    response['ETag'] = etag
+    # El contenido depende del usuario y de la codificación aceptada; no cambia nunca
+    patch_cache_control(response, private=True, max_age=3600)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
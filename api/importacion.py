@@ -0,0 +1,209 @@
+import csv
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core.funciones import asignarUsernames, baseUsername, normalizarTexto
+from core.models import Persona
+
+# Columnas del CSV (encabezado obligatorio). Las demás columnas se ignoran
+COLUMNAS_REQUERIDAS = ('nombre1', 'apellido1', 'correo')
+COLUMNAS_OPCIONALES = ('nombre2', 'apellido2', 'cedula', 'telefono', 'password')
+
+CORREO_RE = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+
+
+class ErrorImportacion(ValueError):
+    """Fila del CSV que no se puede importar"""
+
+
+def leer_csv(archivo):
+    """
+    Valida el encabezado de un CSV de estudiantes y recorre sus filas sin cargarlo
+    completo en memoria
+
+    Returns:
+        Generador de tuplas (número de línea, dict de la fila)
+
+    Raises:
+        ErrorImportacion: Si faltan columnas obligatorias (antes de leer las filas)
+    """
+    lector = csv.DictReader(archivo)
+    encabezado = {c.strip().lower() for c in (lector.fieldnames or [])}
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in encabezado]
+    if faltantes:
+        raise ErrorImportacion(f'Faltan columnas en el CSV: {", ".join(faltantes)}')
+    return (
+        (lector.line_num, {(k or '').strip().lower(): (v or '').strip() for k, v in fila.items() if k is not None})
+        for fila in lector
+    )
+
+
+def normalizar_fila(fila):
+    """Valida y normaliza una fila (nombres con normalizarTexto, correo en minúsculas)"""
+    datos = {c: fila.get(c, '') for c in COLUMNAS_REQUERIDAS + COLUMNAS_OPCIONALES}
+    for campo in ('nombre1', 'nombre2', 'apellido1', 'apellido2'):
+        datos[campo] = normalizarTexto(datos[campo])[:100]
+    datos['correo'] = datos['correo'].lower()
+
+    if not datos['nombre1'] or not datos['apellido1']:
+        raise ErrorImportacion('nombre1 y apellido1 son obligatorios')
+    if not CORREO_RE.match(datos['correo']) or len(datos['correo']) > 100:
+        raise ErrorImportacion(f'Correo no válido: {datos["correo"]}')
+    if len(datos['cedula']) > 10 or len(datos['telefono']) > 20:
+        raise ErrorImportacion('Cédula o teléfono demasiado largos')
+    return datos
+
+
+def _hashear(password):
+    # Se ejecuta en los procesos del pool; sin contraseña queda una no utilizable
+    return make_password(password or None)
+
+
+class ImportacionEstudiantesService:
+    """
+    Alta masiva de estudiantes (User + Persona + Token) desde un CSV
+
+    Las filas se procesan por lotes: una consulta para descartar correos ya
+    registrados, una para asignar usernames libres, las contraseñas se hashean
+    (en paralelo en un pool de procesos desde el comando) y los tres modelos se
+    insertan con ``bulk_create`` en una transacción por lote.
+    """
+
+    @staticmethod
+    def correos_existentes(correos):
+        """Correos (en minúsculas) que ya tienen persona; usa el índice UPPER(correo)"""
+        return {
+            correo.lower()
+            for correo in Persona.objects.annotate(correo_upper=Upper('correo')).filter(
+                correo_upper__in=[c.upper() for c in correos]
+            ).values_list('correo', flat=True)
+        }
+
+    @staticmethod
+    def insertar(validas, hashes):
+        """
+        Inserta User, Persona y Token de las filas en una transacción
+
+        Returns:
+            Cantidad de estudiantes creados
+
+        Raises:
+            IntegrityError: Si algún correo o username ya existe (se revierte todo)
+        """
+        with transaction.atomic():
+            usernames = asignarUsernames([baseUsername(d['nombre1'], d['apellido1']) for _, d in validas])
+            ahora = timezone.now()
+            users = User.objects.bulk_create([
+                User(
+                    username=username, password=hash_, email=datos['correo'],
+                    first_name=datos['nombre1'], last_name=datos['apellido1'], date_joined=ahora
+                )
+                for username, hash_, (_, datos) in zip(usernames, hashes, validas)
+            ])
+            Persona.objects.bulk_create([
+                Persona(
+                    user=user, nombre1=datos['nombre1'], nombre2=datos['nombre2'],
+                    apellido1=datos['apellido1'], apellido2=datos['apellido2'], correo=datos['correo'],
+                    cedula=datos['cedula'] or None, telefono=datos['telefono'] or None
+                )
+                for user, (_, datos) in zip(users, validas)
+            ])
+            # bulk_create no llama a Token.save(), que es quien genera la key
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+        return len(users)
+
+    @classmethod
+    def importar_lote(cls, filas, pool):
+        """
+        Inserta un lote de filas ya normalizadas
+
+        Si otro proceso registra un correo o username durante el lote, el lote se
+        reintenta fila por fila y solo las filas en conflicto quedan como error.
+
+        Args:
+            filas: Lista de (línea, datos normalizados)
+            pool: ProcessPoolExecutor para hashear las contraseñas (o None)
+
+        Returns:
+            Tupla (creados, errores) con errores como lista de (línea, mensaje)
+        """
+        errores = []
+        existentes = cls.correos_existentes([datos['correo'] for _, datos in filas])
+        vistos, validas = set(), []
+        for linea, datos in filas:
+            if datos['correo'] in existentes or datos['correo'] in vistos:
+                errores.append((linea, f'El correo {datos["correo"]} ya está registrado'))
+                continue
+            vistos.add(datos['correo'])
+            validas.append((linea, datos))
+        if not validas:
+            return 0, errores
+
+        passwords = [datos['password'] for _, datos in validas]
+        if pool is not None:
+            hashes = list(pool.map(_hashear, passwords, chunksize=max(1, len(passwords) // 32)))
+        else:
+            hashes = [_hashear(password) for password in passwords]
+
+        try:
+            return cls.insertar(validas, hashes), errores
+        except IntegrityError:
+            pass
+
+        creados = 0
+        for fila, hash_ in zip(validas, hashes):
+            try:
+                creados += cls.insertar([fila], [hash_])
+            except IntegrityError as ex:
+                errores.append((fila[0], f'No se pudo registrar {fila[1]["correo"]}: {ex}'))
+        return creados, errores
+
+    @classmethod
+    def importar(cls, filas, tamano_lote=500, procesos=0):
+        """
+        Importa estudiantes desde un iterable de (línea, fila) como el de ``leer_csv``
+
+        Args:
+            tamano_lote: Filas insertadas por transacción
+            procesos: Procesos para hashear contraseñas (0 = sin pool, None = uno por CPU).
+                El pool es solo para el comando: no se crean procesos desde una petición web
+
+        Yields:
+            Dict de progreso tras cada lote: ``procesadas``, ``creados``, ``errores``
+            (lista acumulada de (línea, mensaje)), ``segundos`` y ``filas_por_segundo``
+        """
+        progreso = {'procesadas': 0, 'creados': 0, 'errores': [], 'segundos': 0.0, 'filas_por_segundo': 0.0}
+        inicio = time.perf_counter()
+        filas = iter(filas)
+        pool = ProcessPoolExecutor(max_workers=procesos) if procesos != 0 else None
+        try:
+            while True:
+                lote = list(islice(filas, tamano_lote))
+                if not lote:
+                    break
+                normalizadas = []
+                for linea, fila in lote:
+                    try:
+                        normalizadas.append((linea, normalizar_fila(fila)))
+                    except ErrorImportacion as ex:
+                        progreso['errores'].append((linea, str(ex)))
+                if normalizadas:
+                    creados, errores = cls.importar_lote(normalizadas, pool)
+                    progreso['creados'] += creados
+                    progreso['errores'].extend(errores)
+                progreso['procesadas'] += len(lote)
+                progreso['segundos'] = time.perf_counter() - inicio
+                progreso['filas_por_segundo'] = progreso['procesadas'] / progreso['segundos']
+                yield progreso
+        finally:
+            if pool is not None:
+                pool.shutdown()
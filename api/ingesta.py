@@ -0,0 +1,353 @@
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from datetime import timedelta
+
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Q
+
+from .catalogos import catalogos
+from .models import (
+    Examen, Pregunta, Respuesta, GeneracionIA,
+    EstadoExamen, TipoPregunta, NivelExamen, EstadoPregunta
+)
+
+# Estados con los que se crean los exámenes y preguntas ingestados (si existen en el catálogo)
+ESTADO_EXAMEN_INICIAL = 'PENDIENTE'
+ESTADO_PREGUNTA_INICIAL = 'ACTIVA'
+
+# Máximo de los puntajes (DecimalField max_digits=5, decimal_places=2), incluida la
+# suma de las preguntas que se guarda en Examen.puntaje_maximo
+PUNTAJE_MAXIMO = Decimal('999.99')
+
+# Estructura esperada de GeneracionIA.resultado
+ESQUEMA_EXAMEN = {
+    'tipo': 'objeto',
+    'campos': {
+        'titulo': {'tipo': 'texto', 'requerido': True, 'max': 255},
+        'descripcion': {'tipo': 'texto'},
+        'nivel': {'tipo': 'texto'},
+        'duracion_minutos': {'tipo': 'entero'},
+        'preguntas': {
+            'tipo': 'lista', 'requerido': True, 'min': 1,
+            'items': {
+                'tipo': 'objeto',
+                'campos': {
+                    'enunciado': {'tipo': 'texto', 'requerido': True},
+                    'tipo': {'tipo': 'texto'},
+                    'puntaje': {'tipo': 'numero', 'max': PUNTAJE_MAXIMO},
+                    'respuestas': {
+                        'tipo': 'lista',
+                        'items': {
+                            'tipo': 'objeto',
+                            'campos': {
+                                'texto': {'tipo': 'texto', 'requerido': True, 'max': 255},
+                                'es_correcta': {'tipo': 'booleano'},
+                                'justificacion': {'tipo': 'texto'},
+                                'puntaje': {'tipo': 'numero', 'max': PUNTAJE_MAXIMO},
+                            }
+                        }
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+class ErrorIngesta(ValueError):
+    """El resultado no cumple el esquema o referencia catálogos inexistentes"""
+
+
+def compilar_esquema(esquema):
+    """
+    Convierte un esquema (ver ``ESQUEMA_EXAMEN``) en una función de validación
+
+    El esquema se recorre una sola vez; la función resultante solo ejecuta las
+    comprobaciones ya armadas, por lo que validar miles de documentos no vuelve
+    a interpretar el esquema.
+
+    Returns:
+        Función ``validar(valor, ruta='$')`` que devuelve el valor normalizado
+        (números como Decimal, textos sin espacios extremos) o lanza ErrorIngesta
+    """
+
+    tipo = esquema['tipo']
+
+    if tipo == 'objeto':
+        campos = [
+            (nombre, compilar_esquema(sub), sub.get('requerido', False))
+            for nombre, sub in esquema['campos'].items()
+        ]
+
+        def validar(valor, ruta='$'):
+            if not isinstance(valor, dict):
+                raise ErrorIngesta(f'{ruta}: se esperaba un objeto')
+            resultado = {}
+            for nombre, validar_campo, requerido in campos:
+                sub = valor.get(nombre)
+                if sub is None:
+                    if requerido:
+                        raise ErrorIngesta(f'{ruta}.{nombre}: campo requerido')
+                    resultado[nombre] = None
+                else:
+                    resultado[nombre] = validar_campo(sub, f'{ruta}.{nombre}')
+            return resultado
+
+    elif tipo == 'lista':
+        validar_item = compilar_esquema(esquema['items'])
+        minimo = esquema.get('min', 0)
+
+        def validar(valor, ruta='$'):
+            if not isinstance(valor, list):
+                raise ErrorIngesta(f'{ruta}: se esperaba una lista')
+            if len(valor) < minimo:
+                raise ErrorIngesta(f'{ruta}: se esperaban al menos {minimo} elementos')
+            return [validar_item(item, f'{ruta}[{i}]') for i, item in enumerate(valor)]
+
+    elif tipo == 'texto':
+        maximo = esquema.get('max')
+        requerido = esquema.get('requerido', False)
+
+        def validar(valor, ruta='$'):
+            if not isinstance(valor, str):
+                raise ErrorIngesta(f'{ruta}: se esperaba un texto')
+            valor = valor.strip()
+            if requerido and not valor:
+                raise ErrorIngesta(f'{ruta}: no puede estar vacío')
+            if maximo and len(valor) > maximo:
+                raise ErrorIngesta(f'{ruta}: supera {maximo} caracteres')
+            return valor
+
+    elif tipo == 'numero':
+        maximo = esquema.get('max')
+
+        def validar(valor, ruta='$'):
+            if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+                raise ErrorIngesta(f'{ruta}: se esperaba un número')
+            try:
+                numero = Decimal(str(valor))
+            except InvalidOperation:
+                raise ErrorIngesta(f'{ruta}: se esperaba un número')
+            if not numero.is_finite() or numero < 0 or (maximo is not None and numero > maximo):
+                raise ErrorIngesta(f'{ruta}: número fuera de rango')
+            return numero.quantize(Decimal('0.01'))
+
+    elif tipo == 'entero':
+        def validar(valor, ruta='$'):
+            if isinstance(valor, bool) or not isinstance(valor, int):
+                raise ErrorIngesta(f'{ruta}: se esperaba un entero')
+            return valor
+
+    elif tipo == 'booleano':
+        def validar(valor, ruta='$'):
+            if not isinstance(valor, bool):
+                raise ErrorIngesta(f'{ruta}: se esperaba true o false')
+            return valor
+
+    else:
+        raise ValueError(f'Tipo de esquema desconocido: {tipo}')
+
+    return validar
+
+
+validar_examen = compilar_esquema(ESQUEMA_EXAMEN)
+
+
+class IngestaGeneracionService:
+    """
+    Convierte ``GeneracionIA.resultado`` en filas de Examen, Pregunta y Respuesta
+
+    Cada generación se ingesta en una sola transacción: un INSERT del examen, un
+    ``bulk_create`` de todas sus preguntas y otro de todas sus respuestas. Los
+    catálogos (tipo de pregunta, nivel, estados) se resuelven por nombre desde
+    el registro en memoria, sin consultas por pregunta.
+    """
+
+    @staticmethod
+    def _catalogo(modelo, nombre, ruta):
+        obj = catalogos.get_by_nombre(modelo, nombre.upper())
+        if obj is None:
+            raise ErrorIngesta(f'{ruta}: "{nombre}" no existe en {modelo._meta.verbose_name}')
+        return obj
+
+    @classmethod
+    def preparar(cls, generacion):
+        """
+        Valida el resultado de la generación y resuelve sus catálogos
+
+        Returns:
+            Dict con el examen normalizado y su ``puntaje_maximo``; cada pregunta lleva ``tipo_id``
+
+        Raises:
+            ErrorIngesta
+        """
+
+        # Examen.persona es obligatoria; la generación la pierde si se borra la persona (SET_NULL)
+        if generacion.persona_id is None:
+            raise ErrorIngesta('$: la generación no tiene persona')
+
+        datos = generacion.resultado
+        if isinstance(datos, str):
+            try:
+                datos = json.loads(datos)
+            except ValueError as e:
+                raise ErrorIngesta(f'$: JSON inválido ({e})')
+
+        examen = validar_examen(datos)
+        examen['puntaje_maximo'] = sum((p['puntaje'] or Decimal('0') for p in examen['preguntas']), Decimal('0'))
+        if examen['puntaje_maximo'] > PUNTAJE_MAXIMO:
+            raise ErrorIngesta(f'$.preguntas: el puntaje total supera {PUNTAJE_MAXIMO}')
+
+        if examen['nivel']:
+            examen['nivel_id'] = cls._catalogo(NivelExamen, examen['nivel'], '$.nivel').id
+        else:
+            examen['nivel_id'] = generacion.nivel_id
+
+        for i, pregunta in enumerate(examen['preguntas']):
+            pregunta['tipo_id'] = (
+                cls._catalogo(TipoPregunta, pregunta['tipo'], f'$.preguntas[{i}].tipo').id
+                if pregunta['tipo'] else None
+            )
+        return examen
+
+    @classmethod
+    def ingestar(cls, generacion):
+        """
+        Crea el examen de una generación y lo vincula en ``GeneracionIA.examen``
+
+        Args:
+            generacion: Instancia de GeneracionIA sin examen
+
+        Returns:
+            Examen creado, o None si la generación ya tenía examen
+
+        Raises:
+            ErrorIngesta: si el resultado no es válido (no se crea nada)
+        """
+        catalogos.sync()
+        return cls.crear(generacion, cls.preparar(generacion))
+
+    @staticmethod
+    def crear(generacion, datos):
+        """Inserta el examen ya validado por ``preparar`` (una transacción)"""
+
+        estado_examen = catalogos.id_por_nombre(EstadoExamen, ESTADO_EXAMEN_INICIAL)
+        estado_pregunta = catalogos.id_por_nombre(EstadoPregunta, ESTADO_PREGUNTA_INICIAL)
+
+        with transaction.atomic():
+            # Bloquea la generación para que dos procesos no la ingesten a la vez
+            bloqueada = GeneracionIA.objects.select_for_update().filter(
+                pk=generacion.pk, examen__isnull=True
+            ).exists()
+            if not bloqueada:
+                return None
+
+            preguntas_datos = datos['preguntas']
+            examen = Examen.objects.create(
+                persona_id=generacion.persona_id,
+                titulo=datos['titulo'],
+                descripcion=datos['descripcion'],
+                duracion=timedelta(minutes=datos['duracion_minutos']) if datos['duracion_minutos'] else None,
+                puntaje_maximo=datos['puntaje_maximo'],
+                estado_id=estado_examen,
+                nivel_id=datos['nivel_id'],
+                area_estudio_id=generacion.area_id,
+                created_by_id=generacion.created_by_id,
+            )
+            if generacion.temas_id:
+                examen.tema.add(generacion.temas_id)
+
+            preguntas = Pregunta.objects.bulk_create([
+                Pregunta(
+                    examen=examen,
+                    enunciado=p['enunciado'],
+                    tipo_id=p['tipo_id'],
+                    puntaje=p['puntaje'] or Decimal('0'),
+                    estado_id=estado_pregunta,
+                )
+                for p in preguntas_datos
+            ])
+
+            Respuesta.objects.bulk_create([
+                Respuesta(
+                    pregunta=pregunta,
+                    texto=r['texto'],
+                    es_correcta=bool(r['es_correcta']),
+                    justificacion=r['justificacion'],
+                    puntaje=r['puntaje'] or Decimal('0'),
+                )
+                for pregunta, p in zip(preguntas, preguntas_datos)
+                for r in (p['respuestas'] or [])
+            ])
+
+            generacion.examen = examen
+            generacion.save(update_fields=['examen', 'updated_at'])
+
+        return examen
+
+    @staticmethod
+    def pendientes():
+        """Generaciones con resultado que todavía no tienen examen"""
+        return GeneracionIA.objects.filter(
+            Q(resultado_comprimido__isnull=False) | Q(resultadojson__isnull=False), examen__isnull=True
+        )
+
+    @classmethod
+    def ingestar_lote(cls, generaciones=None, tamano_lote=100, limite=None, progreso=None):
+        """
+        Ingesta muchas generaciones, leyéndolas por lotes ordenados por id
+
+        Cada generación usa su propia transacción: una generación inválida (o que
+        la base rechaza) se registra como error y no detiene el resto.
+
+        Args:
+            generaciones: QuerySet de GeneracionIA (por defecto ``pendientes()``)
+            tamano_lote: Generaciones leídas por consulta
+            limite: Máximo de generaciones a procesar
+            progreso: Función que recibe el dict de resultados tras cada lote
+
+        Returns:
+            Dict con ``procesadas``, ``examenes``, ``preguntas``, ``respuestas``,
+            ``errores`` (lista de (generacion_id, mensaje)), ``segundos`` y ``por_segundo``
+        """
+
+        if generaciones is None:
+            generaciones = cls.pendientes()
+        # El resultado se lee junto con cada lote (el manager lo difiere por defecto)
+        generaciones = generaciones.defer(None).order_by('id')
+
+        resultado = {
+            'procesadas': 0, 'examenes': 0, 'preguntas': 0, 'respuestas': 0,
+            'errores': [], 'segundos': 0.0, 'por_segundo': 0.0,
+        }
+        inicio = time.perf_counter()
+        ultimo_id = 0
+
+        while limite is None or resultado['procesadas'] < limite:
+            cantidad = tamano_lote if limite is None else min(tamano_lote, limite - resultado['procesadas'])
+            lote = list(generaciones.filter(id__gt=ultimo_id)[:cantidad])
+            if not lote:
+                break
+
+            catalogos.sync()
+            for generacion in lote:
+                resultado['procesadas'] += 1
+                try:
+                    datos = cls.preparar(generacion)
+                    examen = cls.crear(generacion, datos)
+                except (ErrorIngesta, IntegrityError, DataError) as e:
+                    resultado['errores'].append((generacion.id, str(e)))
+                    continue
+                if examen is not None:
+                    resultado['examenes'] += 1
+                    resultado['preguntas'] += len(datos['preguntas'])
+                    resultado['respuestas'] += sum(len(p['respuestas'] or []) for p in datos['preguntas'])
+            ultimo_id = lote[-1].id
+
+            resultado['segundos'] = time.perf_counter() - inicio
+            resultado['por_segundo'] = resultado['procesadas'] / resultado['segundos'] if resultado['segundos'] else 0.0
+            if progreso:
+                progreso(resultado)
+
+        return resultado
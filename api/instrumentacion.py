@@ -0,0 +1,302 @@
+import hmac
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+
+from .autenticacion import CachedTokenAuthentication
+
+# Instrumentación por request: cantidad de consultas, tiempo de SQL y tiempo total
+# de cada fase (consulta base, prefetch, serialización, estadísticas, codificación).
+#
+# Solo se mide una fracción de los requests (INSTRUMENTACION_MUESTREO, entre 0 y 1).
+# En los requests no muestreados ``fase`` devuelve un contexto vacío y el wrapper
+# de SQL solo lee una ContextVar, así que con el muestreo en 0 el costo es despreciable.
+# Las mediciones se devuelven en el encabezado Server-Timing y se acumulan en
+# histogramas por proceso, expuestos en formato Prometheus en /metrics.
+
+# Límites (en segundos) de los buckets de los histogramas de duración
+BUCKETS_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites de los buckets del histograma de cantidad de consultas por fase
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+_actual = ContextVar('instrumentacion_medicion', default=None)
+
+
+class Medicion:
+    """Tiempos y consultas de un request muestreado"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.sql = 0.0
+        self.fases = {}
+        self.abiertas = []
+
+    def registrar_sql(self, segundos):
+        self.consultas += 1
+        self.sql += segundos
+        # Una consulta cuenta para todas las fases abiertas (las fases se pueden anidar)
+        for nombre in self.abiertas:
+            datos = self.fases[nombre]
+            datos[1] += 1
+            datos[2] += segundos
+
+    def server_timing(self, total):
+        """Valor del encabezado Server-Timing (duraciones en milisegundos)"""
+        partes = [
+            f'{nombre};dur={datos[0] * 1000:.1f};desc="{datos[1]} consultas en {datos[2] * 1000:.1f} ms"'
+            for nombre, datos in self.fases.items()
+        ]
+        partes.append(f'sql;dur={self.sql * 1000:.1f};desc="{self.consultas} consultas"')
+        partes.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(partes)
+
+
+class _Fase:
+    __slots__ = ('medicion', 'nombre', 'inicio')
+
+    def __init__(self, medicion, nombre):
+        self.medicion = medicion
+        self.nombre = nombre
+
+    def __enter__(self):
+        # [segundos, consultas, segundos de SQL]; una fase repetida acumula
+        self.medicion.fases.setdefault(self.nombre, [0.0, 0, 0.0])
+        self.medicion.abiertas.append(self.nombre)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.medicion.fases[self.nombre][0] += time.perf_counter() - self.inicio
+        self.medicion.abiertas.remove(self.nombre)
+        return False
+
+
+class _FaseNula:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_FASE_NULA = _FaseNula()
+
+
+def fase(nombre):
+    """
+    Contexto que mide una fase del request actual
+
+    Uso::
+
+        with fase('estadisticas'):
+            ...
+
+    Si el request no está muestreado no mide nada.
+    """
+    medicion = _actual.get()
+    if medicion is None:
+        return _FASE_NULA
+    return _Fase(medicion, nombre)
+
+
+def _medir_sql(execute, sql, params, many, context):
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.registrar_sql(time.perf_counter() - inicio)
+
+
+def _instalar(conexion):
+    if _medir_sql not in conexion.execute_wrappers:
+        conexion.execute_wrappers.append(_medir_sql)
+
+
+def _conexion_creada(sender, connection, **kwargs):
+    _instalar(connection)
+
+
+# Cada conexión nueva (de cualquier hilo) lleva el wrapper de medición
+connection_created.connect(_conexion_creada, dispatch_uid='instrumentacion_sql')
+
+
+class Histograma:
+    """Histograma acumulado (formato Prometheus) por combinación de etiquetas"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}
+
+    def observar(self, etiquetas, valor):
+        serie = self.series.get(etiquetas)
+        if serie is None:
+            serie = self.series[etiquetas] = {'buckets': [0] * len(self.buckets), 'suma': 0, 'cantidad': 0}
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                serie['buckets'][i] += 1
+        serie['suma'] += valor
+        serie['cantidad'] += 1
+
+    def exportar(self, nombre, claves):
+        lineas = [f'# TYPE {nombre} histogram']
+        for etiquetas, serie in sorted(self.series.items()):
+            base = ','.join(f'{clave}="{valor}"' for clave, valor in zip(claves, etiquetas))
+            for limite, cantidad in zip(self.buckets, serie['buckets']):
+                lineas.append(f'{nombre}_bucket{{{base},le="{limite}"}} {cantidad}')
+            lineas.append(f'{nombre}_bucket{{{base},le="+Inf"}} {serie["cantidad"]}')
+            lineas.append(f'{nombre}_sum{{{base}}} {serie["suma"]}')
+            lineas.append(f'{nombre}_count{{{base}}} {serie["cantidad"]}')
+        return lineas
+
+
+_lock = threading.Lock()
+_duracion = Histograma(BUCKETS_SEGUNDOS)
+_sql = Histograma(BUCKETS_SEGUNDOS)
+_consultas = Histograma(BUCKETS_CONSULTAS)
+
+
+def _acumular(vista, medicion, total):
+    with _lock:
+        for nombre, (segundos, consultas, sql) in medicion.fases.items():
+            _duracion.observar((vista, nombre), segundos)
+            _sql.observar((vista, nombre), sql)
+            _consultas.observar((vista, nombre), consultas)
+        _duracion.observar((vista, 'total'), total)
+        _sql.observar((vista, 'total'), medicion.sql)
+        _consultas.observar((vista, 'total'), medicion.consultas)
+
+
+def exportar_metricas():
+    """Histogramas de fases y métricas de codificación en formato de texto de Prometheus"""
+    from .renderizado import metricas_codificacion  # renderizado usa ``fase`` de este módulo
+    claves = ('vista', 'fase')
+    with _lock:
+        lineas = (
+            _duracion.exportar('evalup_fase_duracion_segundos', claves)
+            + _sql.exportar('evalup_fase_sql_segundos', claves)
+            + _consultas.exportar('evalup_fase_consultas', claves)
+        )
+
+    codificacion = metricas_codificacion()
+    for campo in ('respuestas', 'segundos', 'bytes'):
+        lineas.append(f'# TYPE evalup_codificacion_{campo}_total counter')
+        for formato, metrica in sorted(codificacion.items()):
+            lineas.append(f'evalup_codificacion_{campo}_total{{formato="{formato}"}} {metrica[campo]}')
+    return '\n'.join(lineas) + '\n'
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide una fracción de los requests y agrega el encabezado Server-Timing
+
+    Funciona en WSGI y en ASGI: con una cadena async no obliga a Django a pasar
+    las vistas async por el hilo único de las vistas sync. Con el muestreo en 0
+    se quita de la cadena de middlewares al iniciar el proceso.
+
+    Configuración:
+    - INSTRUMENTACION_MUESTREO: fracción de requests medidos (0 desactiva, 1 mide todos)
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_MUESTREO', 0):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def iniciar():
+        """Medición del request si está muestreado, si no None"""
+        muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0)
+        if not muestreo or (muestreo < 1 and random.random() >= muestreo):
+            return None
+        return Medicion()
+
+    @staticmethod
+    def terminar(request, response, medicion):
+        total = time.perf_counter() - medicion.inicio
+        response['Server-Timing'] = medicion.server_timing(total)
+        vista = getattr(request.resolver_match, 'url_name', None) or 'otra'
+        _acumular(vista, medicion, total)
+        return response
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        medicion = self.iniciar()
+        if medicion is None:
+            return self.get_response(request)
+
+        # Conexiones abiertas antes de importar este módulo
+        for conexion in connections.all(initialized_only=True):
+            _instalar(conexion)
+
+        token = _actual.set(medicion)
+        try:
+            response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self.terminar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion = self.iniciar()
+        if medicion is None:
+            return await self.get_response(request)
+
+        # Las consultas corren en hilos de sync_to_async, que copian el contexto (y la
+        # medición); sus conexiones se abren después de importar este módulo
+        token = _actual.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        return self.terminar(request, response, medicion)
+
+
+def _acceso_metricas(request):
+    """
+    True si el request trae el token de INSTRUMENTACION_METRICS_TOKEN
+    (``Authorization: Bearer <token>``, para el scraper) o el token de un usuario staff
+    """
+    esperado = getattr(settings, 'INSTRUMENTACION_METRICS_TOKEN', '')
+    partes = request.headers.get('Authorization', '').split()
+    if len(partes) == 2 and partes[0].lower() == 'bearer':
+        return bool(esperado) and hmac.compare_digest(partes[1].encode(), esperado.encode())
+    try:
+        autenticado = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return autenticado is not None and autenticado[0].is_staff
+
+
+def metrics_view(request):
+    """
+    Histogramas de instrumentación en formato Prometheus
+
+    Requiere el token de INSTRUMENTACION_METRICS_TOKEN o un usuario staff (no
+    depende de la IP: detrás de un proxy local todos los clientes son 127.0.0.1);
+    los valores son del proceso que atiende el request.
+    """
+    if not _acceso_metricas(request):
+        raise Http404
+    return HttpResponse(exportar_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,37 +3,64 @@ from rest_framework import status
 from .models import Persona, Examen, Pregunta, Respuesta
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from .autenticacion import CachedTokenAuthentication
 from .examen import ExamReportService
+from .estadisticas import EstadisticasPersonaService
+from .renderizado import render_response, renderer_classes_disponibles
+from .condicional import calcular_etag, respuesta_condicional, agregar_etag
+from .detector import presupuesto_consultas
+from .proyeccion import Proyeccion
 
+# ETag, persona, estadísticas, catálogos, consulta base y 4 prefetch
+# (con los catálogos ya en memoria): no depende del tamaño de página
+@presupuesto_consultas(10)
 @api_view(['GET'])
-@authentication_classes([TokenAuthentication])
+@authentication_classes([CachedTokenAuthentication])
 @permission_classes([IsAuthenticated])
+@renderer_classes(renderer_classes_disponibles())
 def get_examenes(request):
     """
-    Obtiene todos los exámenes disponibles.
+    Obtiene los exámenes disponibles, paginados por cursor.
+
+    Query parameters:
+    - cursor: Cursor de la página siguiente (devuelto en ``next``)
+    - page_size: Cantidad de exámenes por página
+    - serializer: ``orm`` o ``values`` (por defecto EXAM_SERIALIZER_BACKEND)
+    - fields / include: campos y relaciones de cada examen (``fields=id,titulo,calificacion&include=estado``);
+      las relaciones no pedidas no se consultan
+
+    Responde con ``ETag``; si el cliente envía un ``If-None-Match`` vigente se
+    devuelve 304 sin armar el árbol de exámenes.
     """
     user = request.user  # ← Usuario obtenido del token
     try:
-        persona = Persona.objects.get(user=user)
-        examenes = Examen.objects.filter(persona=persona, is_active=True)
-        cantidad = examenes.count()
-        sumacalificacion = 0
-        if not examenes.exists():
-            cantidad = 0
-            return Response({'examenes': examenes, 'cantidad': cantidad, 'promedio': 0}, status=status.HTTP_200_OK)
+        proyeccion = Proyeccion.desde_request(request)
 
-        # SE OBTIENE EL PROMEDIO DE CALIFICACION DE LOS EXAMENES DEL ESTUDIANTE
-        for e in examenes:
-            sumacalificacion += e.calificacion
+        # SE VALIDA CONTRA LOS EXAMENES DEL ESTUDIANTE (INCLUYE LOS INACTIVOS, DE LOS QUE DEPENDEN LAS ESTADISTICAS)
+        etag = calcular_etag(request, Examen.objects.filter(persona__user_id=user.id), user.id)
+        no_modificado = respuesta_condicional(request, etag)
+        if no_modificado is not None:
+            return agregar_etag(no_modificado, etag)
 
-        promedio = sumacalificacion / cantidad
+        persona = Persona.objects.get(user=user)
+        # SE OBTIENE LA CANTIDAD Y EL PROMEDIO DE CALIFICACION DE LOS EXAMENES DEL ESTUDIANTE
+        estadisticas = EstadisticasPersonaService.obtener(persona.id)
+        cantidad = estadisticas['cantidad']
+        promedio = estadisticas['promedio']
+        if not cantidad:
+            return agregar_etag(render_response(request, {'examenes': [], 'cantidad': 0, 'promedio': 0, 'next': None}, status=status.HTTP_200_OK), etag)
 
-        examenes = ExamReportService.get_exam_complete_data(persona_id=persona.id).filter(is_active=True)
-        jsonexamenes = ExamReportService.serialize_exam_data(examenes)
+        examenes = ExamReportService.get_exam_complete_data(persona_id=persona.id, proyeccion=proyeccion).filter(is_active=True)
+        jsonexamenes, next_cursor = ExamReportService.serialize_page(
+            examenes,
+            cursor=request.GET.get('cursor'),
+            page_size=request.GET.get('page_size'),
+            backend=request.GET.get('serializer'),
+            proyeccion=proyeccion
+        )
 
-        return Response({'examenes': jsonexamenes, 'cantidad':cantidad, 'promedio': promedio}, status=status.HTTP_200_OK)
+        return agregar_etag(render_response(request, {'examenes': jsonexamenes, 'cantidad':cantidad, 'promedio': promedio, 'next': next_cursor}, status=status.HTTP_200_OK), etag)
     except Exception as ex:
         return Response({'error': str(ex)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.analisis import calcular, np
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el cálculo vectorizado del análisis de ítems (api.analisis.calcular) sobre '
+        'respuestas simuladas en memoria, por defecto 1 millón de presentaciones de preguntas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--respuestas', type=int, default=1_000_000,
+                            help='Presentaciones de preguntas (celdas estudiante × ítem)')
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--preguntas', type=int, default=20, help='Preguntas por examen')
+        parser.add_argument('--opciones', type=int, default=4, help='Opciones por pregunta')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def simular(self, options):
+        """Argumentos de ``calcular`` con un modelo logístico de habilidad y dificultad"""
+        azar = np.random.default_rng(options['semilla'])
+        n_celdas, n_items, n_opciones = options['respuestas'], options['items'], max(2, options['opciones'])
+        n_filas = max(1, n_celdas // max(1, options['preguntas']))
+
+        fila = np.repeat(np.arange(n_filas), options['preguntas'])[:n_celdas]
+        fila = np.concatenate([fila, np.full(n_celdas - len(fila), n_filas - 1)])
+        item = azar.integers(0, n_items, n_celdas)
+        habilidad = azar.normal(size=n_filas)
+        dificultad = azar.normal(size=n_items)
+        acierta = azar.random(n_celdas) < 1 / (1 + np.exp(-(habilidad[fila] - dificultad[item])))
+        # La opción 0 de cada ítem es la correcta; quien no acierta marca un distractor al azar
+        marcada = np.where(acierta, 0, azar.integers(1, n_opciones, n_celdas))
+
+        celda = np.repeat(np.arange(n_celdas), n_opciones)
+        k = np.tile(np.arange(n_opciones), n_celdas)
+        return {
+            'fila': fila, 'item': item, 'celda': celda, 'opcion': item[celda] * n_opciones + k,
+            'es_correcta': k == 0, 'seleccionada': k == marcada[celda],
+            'n_filas': n_filas, 'n_items': n_items, 'n_opciones': n_items * n_opciones,
+        }
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('El análisis de ítems necesita el paquete numpy')
+
+        argumentos = self.simular(options)
+        self.stdout.write(
+            f"{len(argumentos['fila'])} presentaciones de {argumentos['n_items']} ítems en "
+            f"{argumentos['n_filas']} exámenes ({len(argumentos['opcion'])} opciones presentadas)"
+        )
+
+        tiempos = []
+        for _ in range(max(1, options['repeticiones'])):
+            inicio = time.perf_counter()
+            resultado = calcular(**argumentos)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        discriminacion = resultado['discriminacion'][~np.isnan(resultado['discriminacion'])]
+        self.stdout.write(
+            f"calcular: mediana {statistics.median(tiempos):.1f} ms | min {min(tiempos):.1f} ms | "
+            f"dificultad media {np.nanmean(resultado['dificultad']):.3f} | "
+            f"discriminación media {discriminacion.mean() if len(discriminacion) else float('nan'):.3f}"
+        )
@@ -0,0 +1,96 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Sum, Q, Case, When, Value, IntegerField
+from django.db.models.functions import Coalesce
+
+from api.examen import ExamReportService
+from api.models import Examen
+
+CAMPOS = (
+    'total_preguntas', 'total_respuestas', 'respuestas_correctas',
+    'puntaje_total_preguntas', 'puntaje_total_respuestas',
+)
+
+
+def anotaciones_join():
+    """Forma anterior de las métricas: agregados sobre el JOIN examen × pregunta × respuesta"""
+    return {
+        'total_preguntas': Count('preguntas', distinct=True),
+        'total_respuestas': Count('preguntas__respuestas', distinct=True),
+        'respuestas_correctas': Count(
+            'preguntas__respuestas',
+            filter=Q(preguntas__respuestas__es_correcta=True),
+            distinct=True
+        ),
+        'porcentaje_aciertos': Case(
+            When(
+                total_respuestas__gt=0,
+                then=(Count(
+                    'preguntas__respuestas',
+                    filter=Q(preguntas__respuestas__es_correcta=True),
+                    distinct=True
+                ) * 100.0) / Count('preguntas__respuestas', distinct=True)
+            ),
+            default=Value(0.0),
+            output_field=IntegerField()
+        ),
+        'puntaje_total_preguntas': Coalesce(Sum('preguntas__puntaje'), Decimal('0.00')),
+        'puntaje_total_respuestas': Coalesce(Sum('preguntas__respuestas__puntaje'), Decimal('0.00')),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Compara el tiempo y los resultados de las métricas por examen calculadas con JOIN '
+            '(forma anterior) y con subconsultas correlacionadas (forma actual)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--limite', type=int, default=None,
+                            help='Cantidad máxima de exámenes a incluir (por defecto todos)')
+
+    def medir(self, anotaciones, ids, repeticiones):
+        tiempos = []
+        filas = {}
+        for _ in range(repeticiones):
+            queryset = Examen.objects.filter(id__in=ids).annotate(**anotaciones).values_list('id', *CAMPOS)
+            inicio = time.perf_counter()
+            filas = {fila[0]: fila[1:] for fila in queryset}
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos), sorted(tiempos)[len(tiempos) // 2], filas
+
+    def handle(self, *args, **options):
+        repeticiones = max(1, options['repeticiones'])
+        ids = Examen.objects.order_by('-id').values_list('id', flat=True)
+        if options['limite']:
+            ids = ids[:options['limite']]
+        ids = list(ids)
+
+        self.stdout.write(f'Exámenes: {len(ids)} | repeticiones: {repeticiones} | motor: {connection.vendor}')
+
+        join_min, join_med, join_filas = self.medir(anotaciones_join(), ids, repeticiones)
+        sub_min, sub_med, sub_filas = self.medir(ExamReportService.exam_metrics_annotations(), ids, repeticiones)
+
+        self.stdout.write(f'JOIN + DISTINCT:  min {join_min * 1000:.1f} ms | mediana {join_med * 1000:.1f} ms')
+        self.stdout.write(f'Subconsultas:     min {sub_min * 1000:.1f} ms | mediana {sub_med * 1000:.1f} ms')
+        if sub_min:
+            self.stdout.write(f'Aceleración (min): x{join_min / sub_min:.2f}')
+
+        # Verificación de resultados campo por campo
+        diferencias = {campo: 0 for campo in CAMPOS}
+        for examen_id in ids:
+            for campo, anterior, actual in zip(CAMPOS, join_filas.get(examen_id, ()), sub_filas.get(examen_id, ())):
+                if Decimal(anterior or 0) != Decimal(actual or 0):
+                    diferencias[campo] += 1
+
+        for campo, cantidad in diferencias.items():
+            estado = 'OK' if not cantidad else f'{cantidad} examen(es) difieren'
+            self.stdout.write(f'  {campo}: {estado}')
+
+        if diferencias['puntaje_total_preguntas']:
+            self.stdout.write(
+                'Nota: con JOIN, puntaje_total_preguntas suma el puntaje de cada pregunta una vez '
+                'por cada respuesta; la forma con subconsultas suma cada pregunta una sola vez.'
+            )
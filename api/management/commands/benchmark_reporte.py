@@ -0,0 +1,157 @@
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.examen import ExamReportService, exam_report_view
+from api.mainview import get_examenes
+from api.models import Examen, Pregunta, Respuesta
+from api.paginacion import KeysetPaginator
+from core.models import Persona
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempo, consultas y memoria pico de ExamReportService (get_exam_complete_data, '
+        'serialize_exam_data, get_exam_statistics) y de los endpoints de mainview y del reporte; '
+        'guarda los resultados en JSON para comparar corridas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=50, help='Exámenes por página')
+        parser.add_argument('--persona', type=int, help='Persona de mainview (por defecto la de más exámenes)')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--comparar', help='Archivo JSON de una corrida anterior para comparar')
+
+    def medir(self, funcion, repeticiones):
+        """
+        Ejecuta ``funcion`` ``repeticiones`` veces midiendo el tiempo y una vez más
+        con tracemalloc (que hace más lento el código) para la memoria pico
+
+        Returns:
+            Dict con min/mediana/p95 en ms, consultas y memoria pico en KiB
+        """
+        funcion()  # Calentamiento (catálogos, caché de tokens, conexiones)
+        tiempos, consultas = [], 0
+        for _ in range(repeticiones):
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = len(capturadas.captured_queries)
+
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        tiempos.sort()
+        return {
+            'min_ms': round(tiempos[0], 3),
+            'mediana_ms': round(statistics.median(tiempos), 3),
+            'p95_ms': round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 3),
+            'consultas': consultas,
+            'memoria_pico_kib': round(pico / 1024, 1),
+        }
+
+    def casos(self, options):
+        """Casos a medir como (nombre, función sin argumentos)"""
+        page_size = KeysetPaginator.clamp_page_size(options['page_size'])
+        persona_id = options['persona'] or Examen.objects.values('persona_id').annotate(
+            cantidad=Count('id')
+        ).order_by('-cantidad').values_list('persona_id', flat=True).first()
+        if persona_id is None:
+            raise CommandError('No hay exámenes: genere datos con manage.py generar_datos_sinteticos')
+        persona = Persona.objects.select_related('user').get(id=persona_id)
+
+        def pagina():
+            queryset = ExamReportService.get_exam_complete_data()
+            return list(KeysetPaginator(page_size).page_queryset(queryset))
+
+        examenes = pagina()
+        factory = APIRequestFactory()
+        # El reporte solo exige is_staff: basta un usuario en memoria
+        staff = User(username='benchmark', is_staff=True, is_active=True)
+
+        def reporte():
+            request = factory.get('/api/examenes/reporte/', {'page_size': page_size})
+            force_authenticate(request, user=staff)
+            response = exam_report_view(request)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        def mainview():
+            request = factory.get('/api/mainview/', {'page_size': page_size})
+            force_authenticate(request, user=persona.user)
+            response = get_examenes(request)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        return (
+            ('get_exam_complete_data (página con prefetch)', pagina),
+            ('serialize_exam_data (página ya leída)', lambda: ExamReportService.serialize_exam_data(examenes)),
+            ('get_exam_statistics (todos los exámenes)',
+             lambda: ExamReportService.get_exam_statistics(ExamReportService.get_exam_complete_data())),
+            ('endpoint reporte', reporte),
+            ('endpoint mainview', mainview),
+        )
+
+    def handle(self, *args, **options):
+        repeticiones = max(1, options['repeticiones'])
+        resultado = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'motor': connection.vendor,
+            'datos': {
+                'examenes': Examen.objects.count(),
+                'preguntas': Pregunta.objects.count(),
+                'respuestas': Respuesta.objects.count(),
+            },
+            'parametros': {'repeticiones': repeticiones, 'page_size': options['page_size']},
+            'casos': {},
+        }
+        self.stdout.write(f"Datos: {resultado['datos']} | motor: {connection.vendor} | repeticiones: {repeticiones}")
+
+        for nombre, funcion in self.casos(options):
+            medicion = self.medir(funcion, repeticiones)
+            resultado['casos'][nombre] = medicion
+            self.stdout.write(
+                f"{nombre:<48} mediana {medicion['mediana_ms']:>9.1f} ms | p95 {medicion['p95_ms']:>9.1f} ms | "
+                f"{medicion['consultas']:>4} consultas | pico {medicion['memoria_pico_kib']:>9.1f} KiB"
+            )
+
+        if options['comparar']:
+            self.comparar(resultado, options['comparar'])
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+    def comparar(self, resultado, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                anterior = json.load(archivo)
+        except (OSError, ValueError) as ex:
+            raise CommandError(f'No se pudo leer {ruta}: {ex}')
+
+        self.stdout.write(f"Comparación con {ruta} ({anterior.get('fecha')}, datos {anterior.get('datos')}):")
+        for nombre, actual in resultado['casos'].items():
+            previo = anterior.get('casos', {}).get(nombre)
+            if previo is None:
+                continue
+            factor = actual['mediana_ms'] / previo['mediana_ms'] if previo['mediana_ms'] else 0
+            self.stdout.write(
+                f"{nombre:<48} x{factor:.2f} tiempo | {actual['consultas'] - previo['consultas']:+d} consultas | "
+                f"{actual['memoria_pico_kib'] - previo['memoria_pico_kib']:+.1f} KiB"
+            )
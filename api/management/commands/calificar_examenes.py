@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.calificacion import CalificacionService
+from core.models import Persona
+
+
+class Command(BaseCommand):
+    help = (
+        'Califica los exámenes entregados a partir de las opciones marcadas '
+        '(puntaje_obtenido, calificacion, estado y calificado_por) con un UPDATE por lote'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--examen', type=int, action='append', dest='examenes',
+                            help='ID de examen a calificar (se puede repetir), entre los entregados '
+                                 '(o los recalificables con --recalificar). Por defecto todos.')
+        parser.add_argument('--recalificar', action='store_true',
+                            help='Incluye los exámenes ya calificados automáticamente o por --calificador '
+                                 '(nunca los calificados por otra persona)')
+        parser.add_argument('--calificador', type=int, default=None,
+                            help='ID de la persona que figura en calificado_por (por defecto ninguna)')
+        parser.add_argument('--lote', type=int, default=1000, help='Exámenes por UPDATE')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de exámenes a procesar')
+
+    def progreso(self, r):
+        self.stdout.write(
+            f"{r['procesados']} procesados | {r['calificados']} calificados | {r['por_segundo']:.1f} exámenes/s"
+        )
+
+    def handle(self, *args, **options):
+        if options['calificador'] is not None and not Persona.objects.filter(id=options['calificador']).exists():
+            raise CommandError(f"No existe la persona {options['calificador']}")
+
+        if options['recalificar']:
+            examenes = CalificacionService.calificados(options['calificador'])
+        else:
+            examenes = CalificacionService.pendientes()
+        if options['examenes']:
+            # Solo entre los exámenes calificables: nunca en curso ni inactivos
+            examenes = examenes.filter(id__in=options['examenes'])
+
+        resultado = CalificacionService.calificar_lote(
+            examenes,
+            tamano_lote=max(1, options['lote']),
+            limite=options['limite'],
+            calificado_por_id=options['calificador'],
+            progreso=self.progreso
+        )
+
+        self.stdout.write(
+            f"Total: {resultado['calificados']} de {resultado['procesados']} exámenes calificados "
+            f"en {resultado['segundos']:.2f} s ({resultado['por_segundo']:.1f} exámenes/s, incluidas las estadísticas)"
+        )
+        self.stdout.write(self.style.SUCCESS('Calificación completada'))
@@ -0,0 +1,52 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.examen import ExamReportService, SERIALIZER_BACKENDS
+
+
+class Command(BaseCommand):
+    help = 'Compara CPU, tiempo y consultas de los serializadores de exámenes (orm vs values) y verifica que su salida sea idéntica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persona', type=int, default=None, help='Solo los exámenes de esta persona')
+        parser.add_argument('--limite', type=int, default=200, help='Cantidad de exámenes a serializar')
+        parser.add_argument('--repeticiones', type=int, default=5)
+
+    def medir(self, backend, options):
+        cpu, pared, consultas, salida = [], [], 0, None
+        for _ in range(max(1, options['repeticiones'])):
+            queryset = ExamReportService.get_exam_complete_data(persona_id=options['persona'])
+            queryset = queryset[:options['limite']]
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio_cpu, inicio = time.process_time(), time.perf_counter()
+                salida = ExamReportService.serialize(queryset, backend)
+                cpu.append(time.process_time() - inicio_cpu)
+                pared.append(time.perf_counter() - inicio)
+            consultas = len(capturadas.captured_queries)
+        return min(cpu), min(pared), consultas, salida
+
+    def handle(self, *args, **options):
+        resultados = {backend: self.medir(backend, options) for backend in SERIALIZER_BACKENDS}
+
+        for backend, (cpu, pared, consultas, salida) in resultados.items():
+            self.stdout.write(
+                f'{backend:>6}: {len(salida)} exámenes | CPU {cpu * 1000:.1f} ms | '
+                f'tiempo {pared * 1000:.1f} ms | {consultas} consultas'
+            )
+
+        cpu_orm, cpu_values = resultados['orm'][0], resultados['values'][0]
+        if cpu_orm:
+            self.stdout.write(f'CPU ahorrado con values: {(1 - cpu_values / cpu_orm) * 100:.1f}%')
+
+        salidas = {
+            backend: json.dumps(r[3], cls=DjangoJSONEncoder, sort_keys=True)
+            for backend, r in resultados.items()
+        }
+        if salidas['orm'] != salidas['values']:
+            raise CommandError('La salida de los serializadores no es idéntica')
+        self.stdout.write(self.style.SUCCESS('La salida de ambos serializadores es idéntica'))
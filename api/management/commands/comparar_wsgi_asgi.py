@@ -0,0 +1,97 @@
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Rutas equivalentes en cada despliegue
+RUTAS = {
+    'mainview': ('/api/mainview/', '/api/async/mainview/'),
+    'reporte': ('/api/examenes/reporte/?page_size=20', '/api/async/examenes/reporte/?page_size=20'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga comparando el despliegue WSGI (vistas sync) con el ASGI (vistas async). '
+        'Los servidores deben estar levantados, por ejemplo: '
+        '"gunicorn EvalUp.wsgi -w 4 -b :8000" y "uvicorn EvalUp.asgi:application --workers 4 --port 8001"'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000', help='URL base del despliegue WSGI')
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001', help='URL base del despliegue ASGI')
+        parser.add_argument('--token', required=True, help='Token de autenticación (de un administrador para el reporte)')
+        parser.add_argument('--endpoint', choices=sorted(RUTAS), default='mainview')
+        parser.add_argument('--concurrencia', type=int, default=200, help='Clientes simultáneos')
+        parser.add_argument('--requests', type=int, default=5000, help='Total de requests por despliegue')
+
+    def cargar(self, url_base, ruta, token, concurrencia, total):
+        partes = urlsplit(url_base)
+        conexion_clase = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        encabezados = {'Authorization': f'Token {token}', 'Accept': 'application/json'}
+        restantes = iter(range(total))
+        lock = threading.Lock()
+        latencias, errores = [], []
+
+        def cliente():
+            # Una conexión keep-alive por cliente
+            conexion = conexion_clase(partes.hostname, partes.port, timeout=60)
+            try:
+                while True:
+                    with lock:
+                        if next(restantes, None) is None:
+                            return
+                    inicio = time.perf_counter()
+                    error = None
+                    try:
+                        conexion.request('GET', ruta, headers=encabezados)
+                        respuesta = conexion.getresponse()
+                        respuesta.read()
+                        if respuesta.status != 200:
+                            error = f'HTTP {respuesta.status}'
+                    except (OSError, http.client.HTTPException) as ex:
+                        conexion.close()
+                        conexion = conexion_clase(partes.hostname, partes.port, timeout=60)
+                        error = str(ex)
+                    duracion = time.perf_counter() - inicio
+                    with lock:
+                        if error is None:
+                            latencias.append(duracion)
+                        else:
+                            errores.append(error)
+            finally:
+                conexion.close()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            for futuro in [pool.submit(cliente) for _ in range(concurrencia)]:
+                futuro.result()
+        segundos = time.perf_counter() - inicio
+        return latencias, errores, segundos
+
+    def reportar(self, nombre, latencias, errores, segundos):
+        if not latencias:
+            self.stdout.write(f'{nombre}: sin respuestas exitosas ({len(errores)} errores)')
+            return
+        percentiles = statistics.quantiles(latencias, n=100)
+        self.stdout.write(
+            f'{nombre}: {len(latencias) / segundos:.1f} req/s | p50 {percentiles[49] * 1000:.1f} ms | '
+            f'p95 {percentiles[94] * 1000:.1f} ms | p99 {percentiles[98] * 1000:.1f} ms | '
+            f'{len(errores)} errores'
+        )
+
+    def handle(self, *args, **options):
+        ruta_wsgi, ruta_asgi = RUTAS[options['endpoint']]
+        concurrencia = max(1, options['concurrencia'])
+        total = max(concurrencia, options['requests'])
+
+        for nombre, url_base, ruta in (('WSGI', options['wsgi'], ruta_wsgi), ('ASGI', options['asgi'], ruta_asgi)):
+            self.stdout.write(f'{nombre}: {total} requests a {url_base}{ruta} con {concurrencia} clientes...')
+            latencias, errores, segundos = self.cargar(url_base, ruta, options['token'], concurrencia, total)
+            if errores and not latencias:
+                raise CommandError(f'{nombre}: ninguna request fue exitosa ({errores[0]})')
+            self.reportar(nombre, latencias, errores, segundos)
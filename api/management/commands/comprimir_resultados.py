@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import GeneracionIA
+from api.resultados import GZIP, ZSTD, comprimir, zstandard
+
+CAMPOS = ['resultadojson', 'resultado_comprimido', 'resultado_codificacion', 'resultado_hash', 'resultado_tamano']
+
+
+class Command(BaseCommand):
+    help = (
+        'Pasa el resultadojson de las generaciones IA a resultado_comprimido (gzip o zstd) '
+        'y deja resultadojson en NULL; se puede interrumpir y volver a ejecutar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=200, help='Generaciones leídas y actualizadas por transacción')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de generaciones a procesar')
+        parser.add_argument('--codificacion', choices=[GZIP, ZSTD], default=GZIP,
+                            help='zstd solo si todos los hosts de la API tienen el paquete zstandard')
+
+    def handle(self, *args, **options):
+        if options['codificacion'] == ZSTD and zstandard is None:
+            raise CommandError('Para comprimir con zstd hay que instalar el paquete zstandard')
+        lote = max(1, options['lote'])
+        limite = options['limite']
+        pendientes = GeneracionIA.objects.defer(None).filter(
+            resultadojson__isnull=False, resultado_comprimido__isnull=True
+        ).order_by('id')
+
+        procesadas = bytes_json = bytes_comprimidos = 0
+        ultimo_id = 0
+        omitidas = []
+        while limite is None or procesadas < limite:
+            cantidad = lote if limite is None else min(lote, limite - procesadas)
+            # Paginación por id: las filas ya comprimidas dejan de estar pendientes
+            generaciones = list(pendientes.filter(id__gt=ultimo_id)[:cantidad])
+            if not generaciones:
+                break
+
+            comprimidas = []
+            for generacion in generaciones:
+                try:
+                    campos = comprimir(generacion.resultadojson, options['codificacion'])
+                except (TypeError, ValueError) as ex:
+                    # La fila queda pendiente y no detiene el resto
+                    omitidas.append(generacion.id)
+                    self.stderr.write(f'Generación {generacion.id} omitida: {ex}')
+                    continue
+                for campo, valor in campos.items():
+                    setattr(generacion, campo, valor)
+                generacion.resultadojson = None
+                bytes_json += generacion.resultado_tamano
+                bytes_comprimidos += len(generacion.resultado_comprimido)
+                comprimidas.append(generacion)
+
+            with transaction.atomic():
+                GeneracionIA.objects.bulk_update(comprimidas, CAMPOS)
+
+            procesadas += len(generaciones)
+            ultimo_id = generaciones[-1].id
+            self.stdout.write(f'{procesadas} generaciones revisadas (hasta id {ultimo_id})')
+
+        ahorro = (1 - bytes_comprimidos / bytes_json) * 100 if bytes_json else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{procesadas - len(omitidas)} generaciones | {len(omitidas)} omitidas | JSON {bytes_json / 1024:.1f} KiB -> '
+            f'comprimido {bytes_comprimidos / 1024:.1f} KiB ({ahorro:.1f}% menos)'
+        ))
@@ -0,0 +1,128 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from api.condicional import validador_sql
+from api.examen import ExamReportService
+from api.models import Examen, Pregunta, Respuesta, EstadoExamen, AreaEstudio
+from api.paginacion import KeysetPaginator
+from api.sinteticos import generar
+from core.models import Persona
+
+# Tablas que se actualizan con ANALYZE después de generar datos sintéticos
+TABLAS = (Examen, Pregunta, Respuesta, Persona)
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN ANALYZE (EXPLAIN QUERY PLAN fuera de PostgreSQL) para cada forma de '
+        'consulta de ExamReportService y marca las que recorren tablas completas (Seq Scan)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sinteticos', type=int, default=0,
+                            help='Genera N exámenes sintéticos dentro de una transacción que se revierte al final')
+        parser.add_argument('--persona', type=int, help='Persona para las consultas de mainview (por defecto la de más exámenes)')
+        parser.add_argument('--estricto', action='store_true', help='Termina con error si alguna consulta hace Seq Scan')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['sinteticos']:
+                totales = generar(examenes=options['sinteticos'], personas=max(1, options['sinteticos'] // 50))
+                self.stdout.write(f"Datos sintéticos: {totales} (se revierten al terminar)")
+                with connection.cursor() as cursor:
+                    for modelo in TABLAS:
+                        cursor.execute(f'ANALYZE {connection.ops.quote_name(modelo._meta.db_table)}')
+
+            marcadas = []
+            for nombre, consulta in self.formas(options['persona']):
+                plan = self.explicar(consulta)
+                recorridos = self.recorridos_completos(plan)
+                if recorridos:
+                    marcadas.append(nombre)
+                    self.stdout.write(self.style.WARNING(f'[SEQ SCAN: {", ".join(recorridos)}] {nombre}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'[OK] {nombre}'))
+                if recorridos or options['verbosity'] > 1:
+                    self.stdout.write('\n'.join(f'    {linea}' for linea in plan.splitlines()))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Motor: {connection.vendor} | consultas con Seq Scan: {len(marcadas)}')
+        if marcadas and options['estricto']:
+            raise CommandError(f'{len(marcadas)} consulta(s) con Seq Scan')
+
+    def formas(self, persona_id):
+        """Formas de consulta del reporte y de mainview como (nombre, QuerySet o (sql, params))"""
+        if persona_id is None:
+            persona_id = Examen.objects.values('persona_id').annotate(
+                cantidad=Count('id')
+            ).order_by('-cantidad').values_list('persona_id', flat=True).first()
+
+        paginador = KeysetPaginator()
+        mainview = ExamReportService.get_exam_complete_data(persona_id=persona_id).filter(is_active=True)
+        primera = list(paginador.page_queryset(mainview).values_list('created_at', 'id'))
+        ids = [pk for _, pk in primera]
+        cursor = paginador.encode_cursor(*primera[-1]) if primera else None
+
+        yield 'mainview: primera página', paginador.page_queryset(mainview)
+        if cursor:
+            yield 'mainview: página siguiente (cursor)', paginador.page_queryset(mainview, cursor)
+        yield 'mainview: validador del ETag', validador_sql(Examen.objects.filter(persona_id=persona_id))
+
+        reporte = ExamReportService.get_exam_complete_data
+        yield 'reporte: primera página', paginador.page_queryset(reporte())
+        estado = EstadoExamen.objects.values_list('nombre', flat=True).first()
+        if estado:
+            yield 'reporte: por estado', paginador.page_queryset(reporte(filters={'estado': estado}))
+        area = AreaEstudio.objects.values_list('nombre', flat=True).first()
+        if area:
+            yield 'reporte: por área de estudio', paginador.page_queryset(reporte(filters={'area_estudio': area}))
+        fechas = Examen.objects.filter(fecha_examen__isnull=False).order_by('-fecha_examen').values_list(
+            'fecha_examen', flat=True
+        ).first()
+        if fechas:
+            yield 'reporte: por rango de fechas', paginador.page_queryset(reporte(filters={
+                'fecha_desde': fechas.date(), 'fecha_hasta': fechas.date()
+            }))
+
+        preguntas = Pregunta.objects.filter(examen_id__in=ids).order_by('id')
+        yield 'prefetch: preguntas por examen', preguntas
+        yield 'prefetch: respuestas por pregunta', Respuesta.objects.filter(
+            pregunta_id__in=list(preguntas.values_list('id', flat=True))
+        ).order_by('id')
+        yield 'serializador values: respuestas por examen', Respuesta.objects.filter(
+            pregunta__examen_id__in=ids
+        ).order_by('id').values_list('id', 'pregunta_id', 'texto', 'es_correcta')
+
+    @staticmethod
+    def explicar(consulta):
+        """Plan de ejecución como texto"""
+        if connection.vendor == 'postgresql':
+            if isinstance(consulta, tuple):
+                sql, params = consulta
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN ANALYZE {sql}', params)
+                    return '\n'.join(fila[0] for fila in cursor.fetchall())
+            return consulta.explain(analyze=True)
+
+        if isinstance(consulta, tuple):
+            sql, params = consulta
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+        return consulta.explain()
+
+    @staticmethod
+    def recorridos_completos(plan):
+        """Tablas recorridas completas según el plan (PostgreSQL o SQLite)"""
+        if connection.vendor == 'postgresql':
+            return sorted(set(re.findall(r'Seq Scan on (\S+)', plan)))
+        # En SQLite las subconsultas materializadas también aparecen como SCAN: no son tablas
+        derivadas = set(re.findall(r'\b(?:CO-ROUTINE|MATERIALIZE) (\S+)', plan))
+        return sorted({
+            m.group(1) for m in re.finditer(r'\bSCAN (\S+)(.*)$', plan, re.MULTILINE)
+            if 'USING' not in m.group(2) and m.group(1) not in derivadas | {'CONSTANT'}
+        })
@@ -0,0 +1,80 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.catalogos import catalogos
+from api.examen import ExamReportService
+from api.exportacion import FORMATOS, CSV, EXAMENES_POR_LOTE, exportar, lotes, pyarrow
+from api.models import Examen
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha no válida (YYYY-MM-DD): {valor}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta exámenes, preguntas y respuestas como filas planas a CSV, Parquet o Arrow, '
+        'con los mismos filtros del reporte y leyendo por bloques de exámenes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('salida', help='Archivo de destino')
+        parser.add_argument('--formato', choices=list(FORMATOS), default=None,
+                            help='Por defecto según la extensión del archivo (csv si no se reconoce)')
+        parser.add_argument('--persona', type=int, help='ID de la persona')
+        parser.add_argument('--estado', help='Estado del examen (nombre)')
+        parser.add_argument('--area-estudio', help='Área de estudio (nombre)')
+        parser.add_argument('--nivel', help='Nivel del examen (nombre)')
+        parser.add_argument('--fecha-desde', type=_fecha, help='YYYY-MM-DD')
+        parser.add_argument('--fecha-hasta', type=_fecha, help='YYYY-MM-DD')
+        parser.add_argument('--calificacion-minima', type=int)
+        parser.add_argument('--lote', type=int, default=EXAMENES_POR_LOTE, help='Exámenes leídos por bloque')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or next(
+            (f for f, (_, extension) in FORMATOS.items() if options['salida'].endswith(f'.{extension}')), CSV
+        )
+        if formato != CSV and pyarrow is None:
+            raise CommandError(f'La exportación a {formato} necesita el paquete pyarrow')
+
+        filters = {
+            clave: options[clave]
+            for clave in ('estado', 'area_estudio', 'nivel', 'fecha_desde', 'fecha_hasta', 'calificacion_minima')
+            if options[clave] is not None
+        }
+        catalogos.sync()
+        examenes = ExamReportService.apply_filters(Examen.objects.all(), None, options['persona'], filters)
+
+        contadores = {'examenes': 0, 'filas': 0}
+        inicio = time.perf_counter()
+
+        def contar(lotes_filas):
+            for filas in lotes_filas:
+                contadores['filas'] += len(filas)
+                contadores['examenes'] += len({fila[0] for fila in filas})
+                yield filas
+                segundos = time.perf_counter() - inicio
+                self.stdout.write(
+                    f"{contadores['examenes']} exámenes | {contadores['filas']} filas | "
+                    f"{contadores['filas'] / segundos if segundos else 0:.0f} filas/s"
+                )
+
+        partes = exportar(contar(lotes(examenes, max(1, options['lote']))), formato)
+        if formato == CSV:
+            archivo = open(options['salida'], 'w', encoding='utf-8', newline='')
+        else:
+            archivo = open(options['salida'], 'wb')
+        with archivo:
+            for parte in partes:
+                archivo.write(parte)
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{contadores['filas']} filas de {contadores['examenes']} exámenes exportadas a {options['salida']} "
+            f"({formato}) en {segundos:.2f} s ({contadores['filas'] / segundos if segundos else 0:.0f} filas/s)"
+        ))
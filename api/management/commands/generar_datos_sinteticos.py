@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.estadisticas import EstadisticasPersonaService
+from api.sinteticos import DOMINIO_SINTETICO, generar, limpiar
+from core.models import Persona
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera personas, catálogos, exámenes, preguntas y respuestas sintéticos con bulk_create '
+        f'(usuarios @{DOMINIO_SINTETICO}); con la misma semilla los datos son los mismos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--examenes', type=int, default=10000)
+        parser.add_argument('--personas', type=int, default=100)
+        parser.add_argument('--preguntas', type=int, default=30, help='Preguntas por examen')
+        parser.add_argument('--respuestas', type=int, default=4, help='Respuestas por pregunta')
+        parser.add_argument('--dias', type=int, default=365, help='Días hacia atrás en los que se reparten las fechas')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=500, help='Exámenes insertados por transacción')
+        parser.add_argument('--limpiar', action='store_true', help='Borra antes los datos sintéticos existentes')
+        parser.add_argument('--solo-limpiar', action='store_true', help='Solo borra los datos sintéticos')
+
+    def handle(self, *args, **options):
+        if options['limpiar'] or options['solo_limpiar']:
+            borrados = limpiar()
+            self.stdout.write(f'{borrados} usuario(s) sintético(s) borrados con sus datos')
+            if options['solo_limpiar']:
+                return
+
+        inicio = time.perf_counter()
+        try:
+            totales = generar(
+                examenes=max(0, options['examenes']),
+                personas=max(1, options['personas']),
+                preguntas=max(0, options['preguntas']),
+                respuestas=max(0, options['respuestas']),
+                dias=max(1, options['dias']),
+                semilla=options['semilla'],
+                lote=max(1, options['lote']),
+            )
+        except IntegrityError as ex:
+            raise CommandError(f'Ya existen datos con la semilla {options["semilla"]}; use --limpiar ({ex})')
+        segundos = time.perf_counter() - inicio
+
+        # bulk_create no dispara las señales que mantienen las estadísticas por persona
+        EstadisticasPersonaService.rebuild(list(
+            Persona.objects.filter(correo__endswith=f'@{DOMINIO_SINTETICO}').values_list('id', flat=True)
+        ))
+
+        filas = sum(totales.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{totales['personas']} personas, {totales['examenes']} exámenes, {totales['preguntas']} preguntas y "
+            f"{totales['respuestas']} respuestas en {segundos:.1f} s ({filas / segundos if segundos else 0:.0f} filas/s)"
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importacion import ImportacionEstudiantesService, ErrorImportacion, leer_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa estudiantes desde un CSV con las columnas nombre1, apellido1, correo '
+        '(opcionales: nombre2, apellido2, cedula, telefono, password)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV (UTF-8)')
+        parser.add_argument('--lote', type=int, default=500, help='Filas insertadas por transacción')
+        parser.add_argument('--procesos', type=int, default=None,
+                            help='Procesos para hashear contraseñas (por defecto uno por CPU; 0 sin pool)')
+
+    def handle(self, *args, **options):
+        progreso = None
+        try:
+            with open(options['archivo'], newline='', encoding='utf-8-sig') as archivo:
+                for progreso in ImportacionEstudiantesService.importar(
+                    leer_csv(archivo), tamano_lote=max(1, options['lote']), procesos=options['procesos']
+                ):
+                    self.stdout.write(
+                        f"{progreso['procesadas']} filas | {progreso['creados']} creados | "
+                        f"{len(progreso['errores'])} errores | {progreso['filas_por_segundo']:.1f} filas/s"
+                    )
+        except (OSError, UnicodeDecodeError, ErrorImportacion) as ex:
+            raise CommandError(str(ex))
+
+        if progreso is None:
+            self.stdout.write('El archivo no tiene filas')
+            return
+
+        for linea, mensaje in progreso['errores']:
+            self.stderr.write(f'Línea {linea}: {mensaje}')
+        self.stdout.write(self.style.SUCCESS(
+            f"{progreso['creados']} estudiantes creados en {progreso['segundos']:.2f} s "
+            f"({progreso['filas_por_segundo']:.1f} filas/s)"
+        ))
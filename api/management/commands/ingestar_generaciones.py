@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ingesta import IngestaGeneracionService
+from api.models import GeneracionIA
+
+
+class Command(BaseCommand):
+    help = 'Convierte el resultado de las generaciones IA sin examen en Examen, Pregunta y Respuesta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generacion', type=int, action='append', dest='generaciones',
+                            help='ID de generación a ingestar (se puede repetir). Por defecto todas las pendientes.')
+        parser.add_argument('--lote', type=int, default=100, help='Generaciones leídas por consulta')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de generaciones a procesar')
+
+    def progreso(self, r):
+        self.stdout.write(
+            f"{r['procesadas']} procesadas | {r['examenes']} exámenes, {r['preguntas']} preguntas, "
+            f"{r['respuestas']} respuestas | {len(r['errores'])} errores | {r['por_segundo']:.1f} generaciones/s"
+        )
+
+    def handle(self, *args, **options):
+        generaciones = IngestaGeneracionService.pendientes()
+        if options['generaciones']:
+            generaciones = GeneracionIA.objects.filter(id__in=options['generaciones'], examen__isnull=True)
+
+        resultado = IngestaGeneracionService.ingestar_lote(
+            generaciones,
+            tamano_lote=max(1, options['lote']),
+            limite=options['limite'],
+            progreso=self.progreso
+        )
+
+        for generacion_id, mensaje in resultado['errores']:
+            self.stderr.write(f'Generación {generacion_id}: {mensaje}')
+
+        segundos = resultado['segundos']
+        self.stdout.write(
+            f"Total: {resultado['examenes']} exámenes en {segundos:.2f} s "
+            f"({resultado['examenes'] / segundos if segundos else 0:.1f} exámenes/s, "
+            f"{resultado['preguntas'] + resultado['respuestas']} filas de preguntas y respuestas)"
+        )
+        if resultado['errores']:
+            raise CommandError(f"{len(resultado['errores'])} generación(es) con resultado inválido")
+        self.stdout.write(self.style.SUCCESS('Ingesta completada'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.estadisticas import EstadisticasPersonaService
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las estadísticas de exámenes por persona o verifica si difieren de los exámenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--persona', type=int, action='append', dest='personas',
+                            help='ID de persona a procesar (se puede repetir). Por defecto todas.')
+        parser.add_argument('--check', action='store_true',
+                            help='Solo verifica diferencias, sin modificar; termina con error si las hay.')
+
+    def handle(self, *args, **options):
+        personas = options['personas']
+
+        if options['check']:
+            diferencias = EstadisticasPersonaService.drift(personas)
+            for persona_id, (almacenado, calculado) in sorted(diferencias.items()):
+                self.stdout.write(f'Persona {persona_id}: almacenado={almacenado} calculado={calculado}')
+            if diferencias:
+                raise CommandError(f'{len(diferencias)} persona(s) con estadísticas desactualizadas')
+            self.stdout.write(self.style.SUCCESS('Las estadísticas están al día'))
+            return
+
+        total = EstadisticasPersonaService.rebuild(personas)
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas reconstruidas para {total} persona(s)'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.analisis import AnalisisItemsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el análisis de ítems del banco de preguntas (AnalisisItem: dificultad, '
+        'discriminación y elección de cada opción). Por defecto solo los grupos (área, nivel) '
+        'con exámenes, preguntas o respuestas modificados desde el último refresco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todo', action='store_true', help='Recalcula todos los grupos')
+
+    def handle(self, *args, **options):
+        try:
+            resultado = AnalisisItemsService.refrescar(todo=options['todo'])
+        except RuntimeError as ex:
+            raise CommandError(str(ex))
+
+        if resultado['grupos'] == 0:
+            self.stdout.write(self.style.SUCCESS('Sin cambios desde el último refresco'))
+            return
+        grupos = 'todos los grupos' if resultado['grupos'] is None else f"{resultado['grupos']} grupo(s) (área, nivel)"
+        self.stdout.write(
+            f"{grupos}: {resultado['items']} ítems, {resultado['presentaciones']} presentaciones, "
+            f"{resultado['opciones']} opciones | lectura {resultado['segundos_lectura']:.2f} s, "
+            f"cálculo {resultado['segundos_calculo']:.2f} s"
+        )
+        self.stdout.write(self.style.SUCCESS('Análisis de ítems actualizado'))
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from api.estadisticas import EstadisticasExamenesService
+from api.models import Examen
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha no válida (YYYY-MM-DD): {valor}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las estadísticas diarias de exámenes (EstadisticaDiaria). '
+        'Por defecto los dos últimos días cerrados y los días anteriores con exámenes '
+        'modificados desde el último refresco; pensado para un cron diario.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help='Primer día a recalcular (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=_fecha, help='Último día a recalcular (YYYY-MM-DD); por defecto ayer')
+        parser.add_argument('--dias', type=int, default=2, help='Días hacia atrás desde --hasta si no se indica --desde')
+        parser.add_argument('--todo', action='store_true', help='Recalcula desde el examen más antiguo')
+
+    def handle(self, *args, **options):
+        # El día en curso siempre se calcula en vivo (EstadisticasExamenesService.rango)
+        ayer = timezone.localdate() - timedelta(days=1)
+        hasta = min(options['hasta'] or ayer, ayer)
+
+        if options['todo']:
+            primera = Examen.objects.filter(is_active=True).aggregate(
+                primera=Min(Coalesce('fecha_examen', 'created_at'))
+            )['primera']
+            if primera is None:
+                self.stdout.write('No hay exámenes')
+                return
+            desde = timezone.localtime(primera).date()
+        else:
+            desde = options['desde'] or hasta - timedelta(days=max(1, options['dias']) - 1)
+
+        if desde > hasta:
+            raise CommandError(f'Rango vacío: {desde} > {hasta} (solo se guardan días cerrados)')
+
+        filas = EstadisticasExamenesService.refrescar_diarias(desde, hasta)
+        self.stdout.write(self.style.SUCCESS(f'{filas} fila(s) de estadísticas diarias entre {desde} y {hasta}'))
+
+        pendientes = EstadisticasExamenesService.refrescar_pendientes()
+        self.stdout.write(self.style.SUCCESS(f'{pendientes} día(s) con exámenes modificados recalculados'))
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from api.catalogos import catalogos
+from api.models import TrabajoGeneracion, AreaEstudio, NivelExamen
+from api.trabajos import PERDIDO, TrabajoGeneracionService, obtener_generador, nombre_worker
+from core.models import Persona
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de trabajos de generación de exámenes con IA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=4, help='Trabajos procesados en paralelo (hilos)')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--una-vez', action='store_true', dest='una_vez',
+                            help='Termina cuando no quedan trabajos disponibles (en lugar de esperar nuevos)')
+        parser.add_argument('--encolar', type=int, default=0,
+                            help='Encola N trabajos de prueba antes de empezar (pruebas de carga con el generador stub)')
+
+    def encolar_prueba(self, cantidad):
+        persona = Persona.objects.order_by('id').first()
+        area = AreaEstudio.objects.order_by('id').first()
+        if persona is None or area is None:
+            raise CommandError('Se necesita al menos una persona y un área de estudio para encolar trabajos de prueba')
+        nivel = NivelExamen.objects.order_by('id').first()
+        TrabajoGeneracion.objects.bulk_create(
+            [TrabajoGeneracion(persona=persona, area=area, nivel=nivel) for _ in range(cantidad)],
+            batch_size=1000
+        )
+        self.stdout.write(f'{cantidad} trabajos de prueba encolados')
+
+    def trabajar(self, generador, detener, contadores, lock, opciones):
+        worker = nombre_worker()
+        try:
+            while not detener.is_set():
+                close_old_connections()
+                trabajos = TrabajoGeneracionService.reclamar(worker)
+                if not trabajos:
+                    if opciones['una_vez']:
+                        return
+                    detener.wait(opciones['intervalo'])
+                    continue
+                for trabajo in trabajos:
+                    estado = TrabajoGeneracionService.procesar(trabajo, generador)
+                    with lock:
+                        contadores[estado] += 1
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        if options['encolar']:
+            self.encolar_prueba(options['encolar'])
+
+        recuperados = TrabajoGeneracionService.recuperar_abandonados()
+        if recuperados:
+            self.stdout.write(f'{recuperados} trabajos abandonados devueltos a la cola')
+
+        catalogos.sync()
+        generador = obtener_generador()
+        concurrencia = max(1, options['concurrencia'])
+        detener = threading.Event()
+        contadores, lock = Counter(), threading.Lock()
+        inicio = time.perf_counter()
+
+        self.stdout.write(f'Worker iniciado con {concurrencia} hilos y el generador {type(generador).__name__}')
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            futuros = [
+                pool.submit(self.trabajar, generador, detener, contadores, lock, options)
+                for _ in range(concurrencia)
+            ]
+            try:
+                while not all(f.done() for f in futuros):
+                    time.sleep(5 if not options['una_vez'] else 0.2)
+                    if not options['una_vez']:
+                        self.reportar(contadores, lock, inicio)
+                        TrabajoGeneracionService.recuperar_abandonados()
+            except KeyboardInterrupt:
+                self.stdout.write('Deteniendo: se terminan los trabajos en curso...')
+                detener.set()
+            for futuro in futuros:
+                futuro.result()
+
+        self.reportar(contadores, lock, inicio)
+
+    def reportar(self, contadores, lock, inicio):
+        with lock:
+            completados = contadores[TrabajoGeneracion.COMPLETADO]
+            reintentos = contadores[TrabajoGeneracion.PENDIENTE]
+            fallidos = contadores[TrabajoGeneracion.FALLIDO]
+            perdidos = contadores[PERDIDO]
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(
+            f'{completados} completados | {reintentos} reintentos | {fallidos} fallidos | '
+            f'{perdidos} perdidos (devueltos a la cola) | '
+            f'{completados / segundos if segundos else 0:.1f} trabajos/s'
+        )
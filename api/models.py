@@ -1,21 +1,56 @@
-from django.db import models
+import json
+
+from django.db import models, transaction
+from django.utils import timezone
 from core.models import Persona, BaseModel
+from .resultados import comprimir, descomprimir
 
 # ESTUDIANTE SELECCIONA UN ÁREA DE ESTUDIO, UN TEMA Y UN NIVEL PARA GENERAR SU EXAMEN
 # DICHOS DATOS SE GUARDAN EN LA TABLA GENERACION_IA
 # Y SE USAN COMO PROPMPT PARA LA GENERACIÓN DEL EXAMEN
 
+class GeneracionIAManager(models.Manager):
+    # EL RESULTADO (LEGADO Y COMPRIMIDO) NO SE LEE POR DEFECTO: SE CARGA AL ACCEDER A
+    # generacion.resultado O CON GeneracionIA.objects.defer(None)
+    def get_queryset(self):
+        return super().get_queryset().defer('resultadojson', 'resultado_comprimido')
+
 class GeneracionIA(BaseModel):
     persona = models.ForeignKey(Persona, on_delete=models.SET_NULL, null=True, related_name='generaciones_ia')
     area = models.ForeignKey('AreaEstudio', on_delete=models.SET_NULL, null=True)
     temas = models.ForeignKey('TemaAreaEstudio', blank=True, null=True, on_delete=models.SET_NULL)
     nivel = models.ForeignKey('NivelExamen', on_delete=models.SET_NULL, null=True)
+    # LEGADO: LAS FILAS ANTERIORES SE PASAN A resultado_comprimido CON manage.py comprimir_resultados
     resultadojson = models.JSONField(blank=True, null=True)
+    # RESULTADO COMPRIMIDO (GZIP, O ZSTD SI SE PIDE; VER api/resultados.py), HASH SHA-256 Y TAMAÑO DEL JSON SIN COMPRIMIR
+    resultado_comprimido = models.BinaryField(blank=True, null=True)
+    resultado_codificacion = models.CharField(max_length=8, blank=True, default='')
+    resultado_hash = models.CharField(max_length=64, blank=True, default='')
+    resultado_tamano = models.PositiveIntegerField(blank=True, null=True)
     examen = models.OneToOneField('Examen', on_delete=models.SET_NULL, null=True, blank=True)
 
+    objects = GeneracionIAManager()
+
     def __str__(self):
         return f"Generación IA de {self.persona} - {self.area}"
 
+    @property
+    def resultado(self):
+        """Resultado de la generación (descomprimido, o el resultadojson de las filas no migradas)"""
+        if self.resultado_comprimido is not None:
+            return json.loads(descomprimir(self.resultado_comprimido, self.resultado_codificacion))
+        return self.resultadojson
+
+    @resultado.setter
+    def resultado(self, datos):
+        self.resultadojson = None
+        if datos is None:
+            self.resultado_comprimido, self.resultado_codificacion, self.resultado_hash = None, '', ''
+            self.resultado_tamano = None
+            return
+        for campo, valor in comprimir(datos).items():
+            setattr(self, campo, valor)
+
 class PlantillaIA(BaseModel):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True, null=True)
@@ -39,9 +74,26 @@ class Examen(BaseModel):
     area_estudio = models.ForeignKey('AreaEstudio', on_delete=models.SET_NULL, null=True)
     tema = models.ManyToManyField('TemaAreaEstudio', blank=True)
 
+    class Meta:
+        # ÍNDICES PARA LAS CONSULTAS DE mainview Y DEL REPORTE (ORDEN -created_at, -id CON PAGINACIÓN KEYSET)
+        # VERIFICAR LOS PLANES CON: python manage.py explicar_consultas
+        indexes = [
+            models.Index(fields=['persona', '-created_at', '-id'], condition=models.Q(is_active=True),
+                         name='examen_persona_activo_idx'),
+            models.Index(fields=['-created_at', '-id'], name='examen_created_idx'),
+            models.Index(fields=['estado', '-created_at', '-id'], name='examen_estado_created_idx'),
+            models.Index(fields=['area_estudio', '-created_at', '-id'], name='examen_area_created_idx'),
+            models.Index(fields=['fecha_examen'], name='examen_fecha_idx'),
+        ]
+
     def __str__(self):
         return f"Examen de {self.persona}"
 
+    def save(self, *args, **kwargs):
+        # LAS SEÑALES DE ESTADÍSTICAS (api/signals.py) SE EJECUTAN DENTRO DE LA MISMA TRANSACCIÓN
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
 
 class Pregunta(BaseModel):
@@ -51,6 +103,12 @@ class Pregunta(BaseModel):
     puntaje = models.DecimalField(max_digits=5, decimal_places=2, default=0, blank=True, null=True)
     estado = models.ForeignKey('EstadoPregunta', on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        # PREFETCH DE PREGUNTAS POR EXAMEN EN ORDEN DE id
+        indexes = [
+            models.Index(fields=['examen', 'id'], name='pregunta_examen_id_idx'),
+        ]
+
     def __str__(self):
         return self.enunciado or "Pregunta sin enunciado"
 
@@ -61,6 +119,15 @@ class Respuesta(BaseModel):
     justificacion = models.TextField(null=True, blank=True)
     es_vof = models.ForeignKey(Persona, on_delete=models.SET_NULL, null=True, blank=True)
     puntaje = models.DecimalField(max_digits=5, decimal_places=2, default=0, blank=True, null=True)
+    # OPCIÓN MARCADA POR EL ESTUDIANTE AL RENDIR EL EXAMEN (LA CALIFICA api/calificacion.py)
+    seleccionada = models.BooleanField(default=False)
+
+    class Meta:
+        # PREFETCH DE RESPUESTAS POR PREGUNTA EN ORDEN DE id Y CONTEO DE RESPUESTAS CORRECTAS
+        indexes = [
+            models.Index(fields=['pregunta', 'id'], name='respuesta_pregunta_id_idx'),
+            models.Index(fields=['pregunta'], condition=models.Q(es_correcta=True), name='respuesta_correcta_idx'),
+        ]
 
     def __str__(self):
         return self.texto or f"Respuesta a: {self.pregunta} ({self.puntaje or '0'}/{self.pregunta.puntaje})"
@@ -167,11 +234,141 @@ class HistorialExamen(BaseModel):
         return f"Historial de {self.examen}"
 
 
+# ESTADÍSTICAS DE EXÁMENES POR PERSONA
+# SE MANTIENEN AL DÍA DESDE LAS SEÑALES DE EXAMEN (api/signals.py)
+# Y SE RECONSTRUYEN CON: python manage.py reconstruir_estadisticas
 
+class EstadisticaPersona(BaseModel):
+    persona = models.OneToOneField(Persona, on_delete=models.CASCADE, related_name='estadistica_examenes')
+    total_examenes = models.PositiveIntegerField(default=0)
+    examenes_calificados = models.PositiveIntegerField(default=0)
+    suma_calificacion = models.BigIntegerField(default=0)
 
+    @property
+    def promedio_calificacion(self):
+        if not self.examenes_calificados:
+            return 0
+        return self.suma_calificacion / self.examenes_calificados
 
+    def __str__(self):
+        return f"Estadísticas de {self.persona_id}"
+
+class EstadisticaPersonaEstado(BaseModel):
+    persona = models.ForeignKey(Persona, on_delete=models.CASCADE, related_name='estadisticas_estado')
+    estado = models.ForeignKey('EstadoExamen', on_delete=models.CASCADE)
+    cantidad = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('persona', 'estado')
+
+    def __str__(self):
+        return f"{self.persona_id} - {self.estado_id}: {self.cantidad}"
 
 
+# ESTADÍSTICAS DIARIAS DE EXÁMENES POR (FECHA, ÁREA, NIVEL, ESTADO) PARA EL DASHBOARD
+# LA FECHA ES LA DEL EXAMEN (O LA DE CREACIÓN SI NO TIENE); SOLO CUENTAN LOS EXÁMENES ACTIVOS
+# SE ACTUALIZAN CON: python manage.py refrescar_estadisticas_diarias (CRON DIARIO)
 
+class EstadisticaDiaria(BaseModel):
+    fecha = models.DateField()
+    area_estudio = models.ForeignKey('AreaEstudio', on_delete=models.SET_NULL, null=True, blank=True)
+    nivel = models.ForeignKey('NivelExamen', on_delete=models.SET_NULL, null=True, blank=True)
+    estado = models.ForeignKey('EstadoExamen', on_delete=models.SET_NULL, null=True, blank=True)
+    total_examenes = models.PositiveIntegerField(default=0)
+    examenes_calificados = models.PositiveIntegerField(default=0)
+    suma_calificacion = models.BigIntegerField(default=0)
+    calificacion_maxima = models.IntegerField(null=True, blank=True)
+    calificacion_minima = models.IntegerField(null=True, blank=True)
+    suma_puntaje_obtenido = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    con_puntaje_obtenido = models.PositiveIntegerField(default=0)
+    suma_puntaje_maximo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    con_puntaje_maximo = models.PositiveIntegerField(default=0)
+    total_preguntas = models.PositiveIntegerField(default=0)
+    total_respuestas = models.PositiveIntegerField(default=0)
+    respuestas_correctas = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha'], name='estadistica_diaria_fecha_idx'),
+        ]
 
+    def __str__(self):
+        return f"{self.fecha} ({self.area_estudio_id}, {self.nivel_id}, {self.estado_id}): {self.total_examenes}"
 
+
+# DÍAS CERRADOS CON EXÁMENES MODIFICADOS DESPUÉS DE CALCULAR SU EstadisticaDiaria (LOS MARCAN LAS
+# SEÑALES DE Examen); refrescar_estadisticas_diarias LOS RECALCULA Y LOS QUITA
+
+class EstadisticaDiariaPendiente(BaseModel):
+    fecha = models.DateField(unique=True)
+
+    def __str__(self):
+        return f"{self.fecha}"
+
+
+# ANÁLISIS CLÁSICO DE ÍTEMS DEL BANCO DE PREGUNTAS: DIFICULTAD, DISCRIMINACIÓN Y ELECCIÓN DE CADA OPCIÓN
+# UN ÍTEM ES UN ENUNCIADO (NORMALIZADO) DENTRO DE UN (ÁREA, TEMA, NIVEL); VER api/analisis.py
+# SE ACTUALIZA CON: python manage.py refrescar_analisis_items
+
+class AnalisisItem(BaseModel):
+    area_estudio = models.ForeignKey('AreaEstudio', on_delete=models.CASCADE, null=True, blank=True)
+    tema = models.ForeignKey('TemaAreaEstudio', on_delete=models.CASCADE, null=True, blank=True)
+    nivel = models.ForeignKey('NivelExamen', on_delete=models.CASCADE, null=True, blank=True)
+    # SHA-1 DEL ENUNCIADO NORMALIZADO
+    clave = models.CharField(max_length=40)
+    enunciado = models.TextField(blank=True, default='')
+    presentaciones = models.PositiveIntegerField(default=0)
+    # PROPORCIÓN DE ACIERTOS (P-VALUE)
+    dificultad = models.FloatField()
+    # PUNTO BISERIAL CONTRA EL PUNTAJE DEL RESTO DEL EXAMEN (NULL SI NO SE PUEDE CALCULAR)
+    discriminacion = models.FloatField(null=True, blank=True)
+    # [{"texto", "es_correcta", "presentaciones", "proporcion"}] EN ORDEN DE ELECCIÓN
+    opciones = models.JSONField(default=list, blank=True)
+    calculado_en = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['area_estudio', 'nivel', 'tema'], name='analisis_item_grupo_idx'),
+            models.Index(fields=['clave'], name='analisis_item_clave_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ítem {self.clave[:8]} ({self.area_estudio_id}, {self.tema_id}, {self.nivel_id}): p={self.dificultad:.2f}"
+
+
+# COLA DE TRABAJOS DE GENERACIÓN DE EXÁMENES CON IA
+# LA API SOLO ENCOLA; LOS PROCESA: python manage.py worker_generacion
+
+class TrabajoGeneracion(BaseModel):
+    PENDIENTE = 'pending'
+    EN_CURSO = 'running'
+    COMPLETADO = 'done'
+    FALLIDO = 'failed'
+    ESTADOS = (
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (COMPLETADO, 'Completado'),
+        (FALLIDO, 'Fallido'),
+    )
+
+    persona = models.ForeignKey(Persona, on_delete=models.CASCADE, related_name='trabajos_generacion')
+    area = models.ForeignKey('AreaEstudio', on_delete=models.SET_NULL, null=True)
+    temas = models.ForeignKey('TemaAreaEstudio', blank=True, null=True, on_delete=models.SET_NULL)
+    nivel = models.ForeignKey('NivelExamen', on_delete=models.SET_NULL, null=True)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    iniciado_en = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    generacion = models.OneToOneField('GeneracionIA', on_delete=models.SET_NULL, null=True, blank=True, related_name='trabajo')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'disponible_en'], name='trabajo_gen_estado_disp_idx'),
+        ]
+
+    def __str__(self):
+        return f"Trabajo {self.id} ({self.estado})"
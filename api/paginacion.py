@@ -0,0 +1,133 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Tamaño de página por defecto y máximo permitido para los listados de exámenes
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class CursorInvalido(ValueError):
+    """El cursor recibido no pudo ser decodificado"""
+
+
+class KeysetPaginator:
+    """
+    Paginación por cursor (keyset) sobre ``(created_at, id)`` en orden descendente.
+
+    A diferencia de OFFSET, cada página filtra a partir de la última fila de la
+    página anterior, por lo que una página profunda cuesta lo mismo que la primera.
+    El cursor es opaco para el cliente (base64 de ``[created_at, id]``).
+    """
+
+    def __init__(self, page_size=None, default_page_size=DEFAULT_PAGE_SIZE, max_page_size=MAX_PAGE_SIZE):
+        self.page_size = self.clamp_page_size(page_size, default_page_size, max_page_size)
+
+    @staticmethod
+    def clamp_page_size(page_size, default_page_size=DEFAULT_PAGE_SIZE, max_page_size=MAX_PAGE_SIZE):
+        """Normaliza el tamaño de página recibido en los query parameters"""
+        try:
+            page_size = int(page_size)
+        except (TypeError, ValueError):
+            return default_page_size
+        return max(1, min(page_size, max_page_size))
+
+    @staticmethod
+    def encode_cursor(created_at, pk):
+        payload = json.dumps([created_at.isoformat(), pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            created_at, pk = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (ValueError, TypeError):
+            raise CursorInvalido('El cursor de paginación no es válido')
+        if created_at is None:
+            raise CursorInvalido('El cursor de paginación no es válido')
+        return created_at, pk
+
+    def paginate(self, queryset, cursor=None):
+        """
+        Obtiene una página del queryset
+
+        Args:
+            queryset: QuerySet de modelos con ``created_at`` (se reordena por ``-created_at, -id``)
+            cursor: Cursor devuelto por la página anterior (opcional)
+
+        Returns:
+            Tupla (lista de objetos de la página, cursor siguiente o None)
+        """
+
+        items = list(self.page_queryset(queryset, cursor))
+        return self.split_page(items)
+
+    async def apaginate(self, queryset, cursor=None):
+        """Versión async de ``paginate`` (ORM async)"""
+        items = [item async for item in self.page_queryset(queryset, cursor)]
+        return self.split_page(items)
+
+    def page_queryset(self, queryset, cursor=None):
+        """QuerySet de la página: filtra a partir del cursor y pide una fila extra"""
+        queryset = queryset.order_by('-created_at', '-id')
+
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            # El filtro redundante created_at__lte acota el rango del índice
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(id__lt=pk)
+            )
+
+        # Se pide una fila extra para saber si existe una página siguiente
+        return queryset[:self.page_size + 1]
+
+    def split_page(self, items):
+        """Separa la fila extra y arma el cursor siguiente"""
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            last = items[-1]
+            next_cursor = self.encode_cursor(last.created_at, last.id)
+
+        return items, next_cursor
+
+
+class IdKeysetPaginator(KeysetPaginator):
+    """
+    Paginación por cursor sobre ``id`` en orden ascendente
+
+    Para listas que se recorren en su orden de creación, como las preguntas de un
+    examen (índice ``(examen, id)``). El cursor es el base64 del último id.
+    """
+
+    @staticmethod
+    def encode_cursor(pk):
+        return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            return int(base64.urlsafe_b64decode(cursor + padding))
+        except (ValueError, TypeError):
+            raise CursorInvalido('El cursor de paginación no es válido')
+
+    def page_queryset(self, queryset, cursor=None):
+        """QuerySet de la página: filtra a partir del cursor y pide una fila extra"""
+        queryset = queryset.order_by('id')
+        if cursor:
+            queryset = queryset.filter(id__gt=self.decode_cursor(cursor))
+        return queryset[:self.page_size + 1]
+
+    def split_page(self, items):
+        """Separa la fila extra y arma el cursor siguiente"""
+        next_cursor = None
+        if len(items) > self.page_size:
+            items = items[:self.page_size]
+            next_cursor = self.encode_cursor(items[-1].id)
+        return items, next_cursor
@@ -0,0 +1,147 @@
+def _decimal(valor):
+    return float(valor) if valor else 0.0
+
+
+def _porcentaje_aciertos(examen):
+    if not examen.total_respuestas:
+        return 0.0
+    return examen.respuestas_correctas * 100.0 / examen.total_respuestas
+
+
+# Campos escalares del examen en el orden de la respuesta: clave -> (columnas o métricas
+# que necesita, función que obtiene el valor). La función recibe una instancia de Examen
+# o una fila de ``values_list`` (los nombres de los atributos son los mismos).
+ESCALARES = {
+    'id': (('id',), lambda examen: examen.id),
+    'titulo': (('titulo',), lambda examen: examen.titulo),
+    'descripcion': (('descripcion',), lambda examen: examen.descripcion),
+    'fecha_examen': (
+        ('fecha_examen',), lambda examen: examen.fecha_examen.isoformat() if examen.fecha_examen else None
+    ),
+    'fecha_creacion': ((), lambda examen: None),
+    'duracion_minutos': (
+        ('duracion',), lambda examen: int(examen.duracion.total_seconds() / 60) if examen.duracion else None
+    ),
+    'puntaje_maximo': (('puntaje_maximo',), lambda examen: _decimal(examen.puntaje_maximo)),
+    'puntaje_obtenido': (('puntaje_obtenido',), lambda examen: _decimal(examen.puntaje_obtenido)),
+    'calificacion': (('calificacion',), lambda examen: examen.calificacion),
+    'total_preguntas': (('total_preguntas',), lambda examen: examen.total_preguntas),
+    'total_respuestas': (('total_respuestas',), lambda examen: examen.total_respuestas),
+    'respuestas_correctas': (('respuestas_correctas',), lambda examen: examen.respuestas_correctas),
+    'porcentaje_aciertos': (('total_respuestas', 'respuestas_correctas'), _porcentaje_aciertos),
+    'puntaje_total_preguntas': (('puntaje_total_preguntas',), lambda examen: float(examen.puntaje_total_preguntas)),
+    'puntaje_total_respuestas': (('puntaje_total_respuestas',), lambda examen: float(examen.puntaje_total_respuestas)),
+}
+
+# Métricas anotadas por ExamReportService.exam_metrics_annotations (no son columnas)
+METRICAS = (
+    'total_preguntas', 'total_respuestas', 'respuestas_correctas',
+    'puntaje_total_preguntas', 'puntaje_total_respuestas',
+)
+
+# Relaciones del examen en el orden de la respuesta
+RELACIONES = (
+    'persona', 'estado', 'calificado_por', 'nivel', 'area_estudio', 'temas', 'generacion_ia', 'preguntas',
+)
+
+# Relaciones que se resuelven con el registro de catálogos (solo necesitan la columna del id)
+CATALOGOS = ('estado', 'nivel', 'area_estudio')
+
+# Columnas (para ``only``) que necesita cada relación; las de persona son las de Persona.__str__.
+# Temas, generación IA y preguntas se cargan con prefetch
+COLUMNAS_RELACION = {
+    'persona': (
+        'persona', 'persona__nombre1', 'persona__apellido1', 'persona__apellido2', 'persona__user__username',
+    ),
+    'calificado_por': (
+        'calificado_por', 'calificado_por__nombre1', 'calificado_por__apellido1',
+        'calificado_por__apellido2', 'calificado_por__user__username',
+    ),
+    'estado': ('estado',),
+    'nivel': ('nivel',),
+    'area_estudio': ('area_estudio',),
+}
+
+
+class ProyeccionInvalida(ValueError):
+    """Los parámetros ``fields`` o ``include`` tienen nombres desconocidos"""
+
+
+def _lista(valor):
+    return [nombre.strip() for nombre in (valor or '').split(',') if nombre.strip()]
+
+
+class Proyeccion:
+    """
+    Campos y relaciones del examen que se devuelven (sparse fieldsets)
+
+    Determina el JSON y también la consulta: las métricas que se anotan, las
+    columnas que se leen (``only``) y las relaciones que se cargan con
+    select_related/prefetch_related.
+    """
+
+    def __init__(self, escalares=None, relaciones=None):
+        escalares = set(ESCALARES if escalares is None else escalares)
+        relaciones = set(RELACIONES if relaciones is None else relaciones)
+        self.escalares = tuple((clave, valor) for clave, (_, valor) in ESCALARES.items() if clave in escalares)
+        self.relaciones = tuple(relacion for relacion in RELACIONES if relacion in relaciones)
+        self.completa = len(self.escalares) == len(ESCALARES) and len(self.relaciones) == len(RELACIONES)
+
+        necesarias = {columna for clave, _ in self.escalares for columna in ESCALARES[clave][0]}
+        self.metricas = tuple(metrica for metrica in METRICAS if metrica in necesarias)
+        # id y created_at siempre: la paginación por cursor los usa
+        self.columnas = ('id', 'created_at') + tuple(sorted(
+            (necesarias - set(METRICAS) - {'id', 'created_at'})
+            | {columna for relacion in self.relaciones for columna in COLUMNAS_RELACION.get(relacion, ())}
+        ))
+        self.catalogos = tuple(relacion for relacion in CATALOGOS if relacion in self.relaciones)
+
+    def incluye(self, relacion):
+        return relacion in self.relaciones
+
+    @classmethod
+    def desde_parametros(cls, fields=None, include=None):
+        """
+        Proyección a partir de los query parameters ``fields`` e ``include``
+
+        - ``fields``: campos y relaciones a devolver (``id,titulo,calificacion``)
+        - ``include``: relaciones a devolver además de los campos (``estado,temas``)
+
+        Sin ``fields`` se devuelven todos los campos escalares; sin ninguno de los
+        dos, el examen completo.
+
+        Returns:
+            Proyeccion, o None para el examen completo
+
+        Raises:
+            ProyeccionInvalida: si algún nombre no es un campo o una relación
+        """
+        campos, incluir = _lista(fields), _lista(include)
+        if not campos and not incluir:
+            return None
+
+        campos_desconocidos = [c for c in campos if c not in ESCALARES and c not in RELACIONES]
+        if campos_desconocidos:
+            raise ProyeccionInvalida(
+                f"Campos desconocidos en fields: {', '.join(campos_desconocidos)}. "
+                f"Campos: {', '.join(ESCALARES)}. Relaciones: {', '.join(RELACIONES)}"
+            )
+        relaciones_desconocidas = [r for r in incluir if r not in RELACIONES]
+        if relaciones_desconocidas:
+            raise ProyeccionInvalida(
+                f"Relaciones desconocidas en include: {', '.join(relaciones_desconocidas)}. "
+                f"Relaciones: {', '.join(RELACIONES)}"
+            )
+
+        escalares = [c for c in campos if c in ESCALARES] if campos else None
+        relaciones = [c for c in campos if c in RELACIONES] + incluir
+        proyeccion = cls(escalares, relaciones)
+        return None if proyeccion.completa else proyeccion
+
+    @classmethod
+    def desde_request(cls, request):
+        return cls.desde_parametros(request.GET.get('fields'), request.GET.get('include'))
+
+
+# Proyección por defecto: el examen completo
+COMPLETA = Proyeccion()
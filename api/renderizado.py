@@ -0,0 +1,191 @@
+import gzip
+import json
+import threading
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import BaseRenderer
+
+from .instrumentacion import fase
+
+# Dependencias opcionales: si no están instaladas se usa la alternativa estándar
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+
+# Tipos MIME aceptados para cada formato
+TIPOS_MSGPACK = (MSGPACK, 'application/x-msgpack')
+
+# Las respuestas más pequeñas que esto no se comprimen
+COMPRESION_MINIMA = 1024
+
+_encoder = DjangoJSONEncoder()
+_lock = threading.Lock()
+_metricas = {}
+
+
+def _default(obj):
+    # Decimal, datetime, date, timedelta, UUID... con el mismo formato que DjangoJSONEncoder
+    return _encoder.default(obj)
+
+
+def negociar(accept):
+    """
+    Elige el formato de respuesta a partir del encabezado Accept
+
+    Returns:
+        ``JSON`` o ``MSGPACK`` (JSON si no se acepta ninguno de los disponibles)
+    """
+
+    candidatos = []
+    for orden, parte in enumerate((accept or '').split(',')):
+        tipo, *parametros = [p.strip() for p in parte.split(';')]
+        calidad = 1.0
+        for parametro in parametros:
+            if parametro.startswith('q='):
+                try:
+                    calidad = float(parametro[2:])
+                except ValueError:
+                    calidad = 0.0
+        if tipo in TIPOS_MSGPACK and msgpack is not None:
+            candidatos.append((calidad, -orden, MSGPACK))
+        elif tipo in (JSON, 'application/*', '*/*'):
+            candidatos.append((calidad, -orden, JSON))
+
+    candidatos = [c for c in candidatos if c[0] > 0]
+    if not candidatos:
+        return JSON
+    return max(candidatos)[2]
+
+
+def codificar(data, formato=JSON):
+    """
+    Codifica ``data`` en el formato indicado y registra el tiempo de codificación
+
+    JSON se genera minificado (con orjson si está instalado). Decimal y datetime
+    se convierten igual que con DjangoJSONEncoder en todos los formatos.
+
+    Returns:
+        bytes
+    """
+
+    inicio = time.perf_counter()
+    with fase('codificacion'):
+        if formato == MSGPACK:
+            contenido = msgpack.packb(data, default=_default, use_bin_type=True)
+        elif orjson is not None:
+            contenido = orjson.dumps(
+                data, default=_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            )
+        else:
+            contenido = json.dumps(
+                data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+    _registrar(formato, time.perf_counter() - inicio, len(contenido))
+    return contenido
+
+
+def comprimir(contenido, accept_encoding):
+    """
+    Comprime con brotli o gzip según Accept-Encoding
+
+    Returns:
+        Tupla (contenido, content-encoding o None)
+    """
+
+    if len(contenido) < COMPRESION_MINIMA:
+        return contenido, None
+
+    codificaciones = {p.split(';')[0].strip() for p in (accept_encoding or '').split(',')}
+    if brotli is not None and 'br' in codificaciones:
+        with fase('compresion'):
+            return brotli.compress(contenido, quality=4), 'br'
+    if 'gzip' in codificaciones:
+        with fase('compresion'):
+            return gzip.compress(contenido, compresslevel=6), 'gzip'
+    return contenido, None
+
+
+def render_response(request, data, status=200):
+    """
+    Respuesta HTTP con formato negociado (JSON compacto o MessagePack) y compresión
+
+    Se usa en ExamReportAPIView y en mainview.
+    """
+
+    formato = negociar(request.META.get('HTTP_ACCEPT'))
+    contenido, encoding = comprimir(codificar(data, formato), request.META.get('HTTP_ACCEPT_ENCODING'))
+
+    content_type = MSGPACK if formato == MSGPACK else 'application/json; charset=utf-8'
+    response = HttpResponse(contenido, status=status, content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
+
+
+def _registrar(formato, segundos, bytes_generados):
+    with _lock:
+        metrica = _metricas.setdefault(formato, {'respuestas': 0, 'segundos': 0.0, 'bytes': 0})
+        metrica['respuestas'] += 1
+        metrica['segundos'] += segundos
+        metrica['bytes'] += bytes_generados
+
+
+def metricas_codificacion():
+    """Tiempo y bytes de codificación acumulados por formato en este proceso"""
+    with _lock:
+        return {
+            formato: dict(m, promedio_ms=(m['segundos'] / m['respuestas'] * 1000) if m['respuestas'] else 0.0)
+            for formato, m in _metricas.items()
+        }
+
+
+class CompactJSONRenderer(BaseRenderer):
+    """Renderer de DRF con JSON minificado (mismo codificador que render_response)"""
+    media_type = JSON
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return codificar(data, JSON)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renderer de DRF para MessagePack (requiere el paquete msgpack)"""
+    media_type = MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return codificar(data, MSGPACK)
+
+
+def renderer_classes_disponibles():
+    """Renderers de DRF que corresponden a los formatos disponibles"""
+    renderers = [CompactJSONRenderer]
+    if msgpack is not None:
+        renderers.append(MessagePackRenderer)
+    return renderers
@@ -0,0 +1,87 @@
+import gzip
+import hashlib
+import json
+
+from django.urls import reverse
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Almacenamiento comprimido de GeneracionIA.resultado_comprimido.
+#
+# El resultado se guarda como JSON compacto comprimido con gzip, junto con el
+# SHA-256 del JSON sin comprimir. El hash sirve de ETag del endpoint del
+# resultado, y como gzip también es Content-Encoding de HTTP, el endpoint puede
+# enviar los bytes guardados sin descomprimirlos ni volver a codificarlos.
+#
+# zstd (paquete zstandard, opcional) solo se usa si se pide explícitamente: una
+# fila zstd no se puede leer en un host sin el paquete, así que antes hay que
+# instalarlo en todos los hosts que sirven la API.
+
+ZSTD = 'zstd'
+GZIP = 'gzip'
+
+NIVEL_ZSTD = 10
+NIVEL_GZIP = 6
+
+
+def serializar(datos):
+    """JSON compacto en UTF-8 (el contenido que se comprime y sobre el que se calcula el hash)"""
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def calcular_hash(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def comprimir(datos, codificacion=None):
+    """
+    Comprime el resultado de una generación
+
+    Args:
+        datos: Resultado (dict/list) o JSON en texto; un texto que no es JSON
+            (filas legadas) se guarda como string JSON, igual que en ``resultadojson``
+        codificacion: ``gzip`` (por defecto) o ``zstd`` (requiere el paquete zstandard)
+
+    Returns:
+        Dict con los campos de GeneracionIA: ``resultado_comprimido``,
+        ``resultado_codificacion``, ``resultado_hash`` y ``resultado_tamano``
+        (bytes del JSON sin comprimir)
+    """
+    if isinstance(datos, str):
+        try:
+            datos = json.loads(datos)
+        except ValueError:
+            pass
+    contenido = serializar(datos)
+    if codificacion == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('Para comprimir con zstd hay que instalar el paquete zstandard')
+        comprimido = zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(contenido)
+    else:
+        codificacion = GZIP
+        # mtime=0: los mismos datos producen los mismos bytes
+        comprimido = gzip.compress(contenido, compresslevel=NIVEL_GZIP, mtime=0)
+    return {
+        'resultado_comprimido': comprimido,
+        'resultado_codificacion': codificacion,
+        'resultado_hash': calcular_hash(contenido),
+        'resultado_tamano': len(contenido),
+    }
+
+
+def descomprimir(comprimido, codificacion):
+    """JSON (bytes) a partir de los bytes guardados"""
+    comprimido = bytes(comprimido)  # PostgreSQL devuelve memoryview
+    if codificacion == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('El resultado está comprimido con zstd y el paquete zstandard no está instalado')
+        return zstandard.ZstdDecompressor().decompress(comprimido)
+    return gzip.decompress(comprimido)
+
+
+def url_resultado(generacion_id):
+    """URL del endpoint que sirve el resultado de una generación"""
+    return reverse('resultado_generacion', kwargs={'generacion_id': generacion_id})
@@ -0,0 +1,257 @@
+from asgiref.sync import sync_to_async
+
+from .catalogos import catalogos
+from .instrumentacion import fase
+from .proyeccion import COMPLETA, ESCALARES
+from .resultados import url_resultado
+from .models import (
+    Examen, Pregunta, Respuesta, GeneracionIA,
+    EstadoExamen, NivelExamen, AreaEstudio, TipoPregunta, EstadoPregunta
+)
+
+# Columnas de values_list que necesita cada relación del examen (las demás se leen con ``consultas``)
+COLUMNAS_RELACION = {
+    'persona': (
+        'persona_id', 'persona__nombre1', 'persona__apellido1', 'persona__apellido2', 'persona__user__username',
+    ),
+    'calificado_por': (
+        'calificado_por_id', 'calificado_por__nombre1', 'calificado_por__apellido1',
+        'calificado_por__apellido2', 'calificado_por__user__username',
+    ),
+    'estado': ('estado_id',),
+    'nivel': ('nivel_id',),
+    'area_estudio': ('area_estudio_id',),
+}
+
+# Nombre de cada consulta de ``consultas`` (fases de instrumentación prefetch_<nombre>)
+CONSULTAS = ('temas', 'generaciones', 'preguntas', 'respuestas')
+
+# Con al menos esta cantidad de filas relacionadas, aserialize_rows arma el JSON en un hilo
+ARMADO_EN_HILO_MINIMO = 500
+
+
+def _nombre_persona(nombre1, apellido1, apellido2, username):
+    # Mismo formato que Persona.__str__
+    return f"{nombre1} {apellido1} {apellido2} ({username})"
+
+
+def campos_examen(proyeccion=None):
+    """
+    Columnas del examen que se leen con values_list para la proyección (incluye
+    las métricas anotadas por ExamReportService.exam_metrics_annotations)
+    """
+    proyeccion = proyeccion or COMPLETA
+    columnas = {'id', 'created_at'} | {columna for clave, _ in proyeccion.escalares for columna in ESCALARES[clave][0]}
+    return tuple(sorted(columnas)) + tuple(
+        columna for relacion in proyeccion.relaciones for columna in COLUMNAS_RELACION.get(relacion, ())
+    )
+
+
+def _catalogo(modelo, pk):
+    obj = catalogos.get(modelo, pk)
+    if obj is None:
+        return None
+    return {'id': obj.id, 'nombre': obj.nombre, 'descripcion': obj.descripcion}
+
+
+class ExamValuesSerializer:
+    """
+    Serializador alternativo de exámenes basado en ``values_list``.
+
+    Lee exámenes, preguntas y respuestas como tuplas planas (una consulta por
+    tabla, más temas y generación IA) y arma el JSON anidado con diccionarios
+    indexados por id, sin crear instancias de modelos. La salida es idéntica a
+    ``ExamReportService.serialize_exam_data``.
+    """
+
+    @staticmethod
+    def exam_rows(examenes_queryset, proyeccion=None):
+        """
+        QuerySet de filas del examen (namedtuples) a partir de get_exam_complete_data
+
+        Las filas tienen ``id`` y ``created_at``, por lo que se pueden paginar con
+        ``KeysetPaginator`` antes de serializarlas. Con una ``proyeccion`` solo se
+        leen las columnas de los campos y relaciones pedidos.
+        """
+        return examenes_queryset.select_related(None).prefetch_related(None).values_list(
+            *campos_examen(proyeccion), named=True
+        )
+
+    @classmethod
+    def serialize(cls, examenes_queryset, proyeccion=None):
+        with fase('consulta'):
+            filas = list(cls.exam_rows(examenes_queryset, proyeccion))
+        return cls.serialize_rows(filas, proyeccion)
+
+    @classmethod
+    def serialize_rows(cls, filas, proyeccion=None):
+        """
+        Serializa filas obtenidas con ``exam_rows``
+
+        Returns:
+            Lista de dicts con la misma estructura que ``serialize_exam_data``
+        """
+        if not filas:
+            return []
+        relacionadas = []
+        for nombre, consulta in zip(CONSULTAS, cls.consultas([fila.id for fila in filas], proyeccion)):
+            if consulta is None:
+                relacionadas.append([])
+                continue
+            with fase(f'prefetch_{nombre}'):
+                relacionadas.append(list(consulta))
+        with fase('serializacion'):
+            return cls.armar(filas, *relacionadas, proyeccion=proyeccion)
+
+    @classmethod
+    async def aserialize_rows(cls, filas, armado_en_hilo=ARMADO_EN_HILO_MINIMO, proyeccion=None):
+        """
+        Versión async de ``serialize_rows`` para las vistas ASGI
+
+        Las consultas usan el ORM async; el armado del JSON, que es CPU, se ejecuta
+        en un hilo cuando hay al menos ``armado_en_hilo`` filas relacionadas para no
+        bloquear el event loop.
+        """
+        if not filas:
+            return []
+        relacionadas = []
+        for consulta in cls.consultas([fila.id for fila in filas], proyeccion):
+            relacionadas.append([] if consulta is None else [fila async for fila in consulta])
+        if sum(len(r) for r in relacionadas) >= armado_en_hilo:
+            return await sync_to_async(cls.armar, thread_sensitive=False)(filas, *relacionadas, proyeccion=proyeccion)
+        return cls.armar(filas, *relacionadas, proyeccion=proyeccion)
+
+    @staticmethod
+    def consultas(ids, proyeccion=None):
+        """
+        Consultas de las tablas relacionadas con los exámenes ``ids``
+
+        Returns:
+            Tupla de querysets (temas, generaciones, preguntas, respuestas) en el
+            orden que espera ``armar``; None en lugar de las relaciones que la
+            ``proyeccion`` no incluye
+        """
+        proyeccion = proyeccion or COMPLETA
+        # Temas (tabla intermedia del ManyToMany), en el orden del Prefetch('tema') del
+        # serializador ORM: por id del tema, no por el orden en que se asignaron
+        temas = Examen.tema.through.objects.filter(examen_id__in=ids).order_by('temaareaestudio_id').values_list(
+            'examen_id', 'temaareaestudio_id', 'temaareaestudio__nombre',
+            'temaareaestudio__descripcion', 'temaareaestudio__area_id'
+        )
+        generaciones = GeneracionIA.objects.filter(examen_id__in=ids).values_list(
+            'examen_id', 'id', 'resultado_hash', 'area_id', 'temas_id', 'temas__nombre', 'nivel_id'
+        )
+        preguntas = Pregunta.objects.filter(examen_id__in=ids).order_by('id').values_list(
+            'id', 'examen_id', 'enunciado', 'puntaje', 'tipo_id', 'estado_id'
+        )
+        respuestas = Respuesta.objects.filter(pregunta__examen_id__in=ids).order_by('id').values_list(
+            'id', 'pregunta_id', 'texto', 'es_correcta', 'justificacion', 'puntaje',
+            'es_vof_id', 'es_vof__nombre1', 'es_vof__apellido1', 'es_vof__apellido2', 'es_vof__user__username'
+        )
+        return (
+            temas if proyeccion.incluye('temas') else None,
+            generaciones if proyeccion.incluye('generacion_ia') else None,
+            preguntas if proyeccion.incluye('preguntas') else None,
+            respuestas if proyeccion.incluye('preguntas') else None,
+        )
+
+    @staticmethod
+    def armar(filas, temas, generaciones, filas_preguntas, filas_respuestas, proyeccion=None):
+        """Arma el JSON anidado a partir de las filas ya leídas (sin consultas)"""
+
+        proyeccion = proyeccion or COMPLETA
+        ids = [fila.id for fila in filas]
+        examenes = {}
+        preguntas_por_examen = {examen_id: [] for examen_id in ids}
+        temas_por_examen = {examen_id: [] for examen_id in ids}
+
+        for fila in filas:
+            examen_data = examenes[fila.id] = {clave: valor(fila) for clave, valor in proyeccion.escalares}
+
+            if proyeccion.incluye('persona'):
+                examen_data['persona'] = {
+                    'id': fila.persona_id,
+                    'nombre_completo': _nombre_persona(
+                        fila.persona__nombre1, fila.persona__apellido1,
+                        fila.persona__apellido2, fila.persona__user__username
+                    ),
+                    'email': None,
+                } if fila.persona_id else None
+
+            if proyeccion.incluye('estado'):
+                examen_data['estado'] = _catalogo(EstadoExamen, fila.estado_id)
+
+            if proyeccion.incluye('calificado_por'):
+                examen_data['calificado_por'] = {
+                    'id': fila.calificado_por_id,
+                    'nombre_completo': _nombre_persona(
+                        fila.calificado_por__nombre1, fila.calificado_por__apellido1,
+                        fila.calificado_por__apellido2, fila.calificado_por__user__username
+                    ),
+                } if fila.calificado_por_id else None
+
+            if proyeccion.incluye('nivel'):
+                examen_data['nivel'] = _catalogo(NivelExamen, fila.nivel_id)
+            if proyeccion.incluye('area_estudio'):
+                examen_data['area_estudio'] = _catalogo(AreaEstudio, fila.area_estudio_id)
+            if proyeccion.incluye('temas'):
+                examen_data['temas'] = temas_por_examen[fila.id]
+            if proyeccion.incluye('generacion_ia'):
+                examen_data['generacion_ia'] = None
+            if proyeccion.incluye('preguntas'):
+                examen_data['preguntas'] = preguntas_por_examen[fila.id]
+
+        # Temas
+        for examen_id, tema_id, nombre, descripcion, area_id in temas:
+            area = catalogos.get(AreaEstudio, area_id)
+            temas_por_examen[examen_id].append({
+                'id': tema_id,
+                'nombre': nombre,
+                'descripcion': descripcion,
+                'area': area.nombre if area else None
+            })
+
+        # Generación IA
+        for examen_id, gen_id, resultado_hash, area_id, tema_id, tema_nombre, nivel_id in generaciones:
+            area = catalogos.get(AreaEstudio, area_id)
+            nivel = catalogos.get(NivelExamen, nivel_id)
+            examenes[examen_id]['generacion_ia'] = {
+                'id': gen_id,
+                'resultado_url': url_resultado(gen_id),
+                'resultado_hash': resultado_hash or None,
+                'area': {'id': area.id, 'nombre': area.nombre} if area else None,
+                'tema': {'id': tema_id, 'nombre': tema_nombre} if tema_id else None,
+                'nivel': {'id': nivel.id, 'nombre': nivel.nombre} if nivel else None,
+                'fecha_generacion': None
+            }
+
+        # Preguntas
+        preguntas = {}
+        for pregunta_id, examen_id, enunciado, puntaje, tipo_id, estado_id in filas_preguntas:
+            pregunta_data = {
+                'id': pregunta_id,
+                'enunciado': enunciado,
+                'puntaje': float(puntaje) if puntaje else 0.0,
+                'tipo': _catalogo(TipoPregunta, tipo_id),
+                'estado': _catalogo(EstadoPregunta, estado_id),
+                'respuestas': []
+            }
+            preguntas[pregunta_id] = pregunta_data
+            preguntas_por_examen[examen_id].append(pregunta_data)
+
+        # Respuestas
+        for (respuesta_id, pregunta_id, texto, es_correcta, justificacion, puntaje,
+             vof_id, vof_nombre1, vof_apellido1, vof_apellido2, vof_username) in filas_respuestas:
+            preguntas[pregunta_id]['respuestas'].append({
+                'id': respuesta_id,
+                'texto': texto,
+                'es_correcta': es_correcta,
+                'justificacion': justificacion,
+                'puntaje': float(puntaje) if puntaje else 0.0,
+                'es_vof': {
+                    'id': vof_id,
+                    'nombre_completo': _nombre_persona(vof_nombre1, vof_apellido1, vof_apellido2, vof_username),
+                } if vof_id else None
+            })
+
+        return [examenes[examen_id] for examen_id in ids]
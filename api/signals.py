@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .models import Examen
+from .estadisticas import EstadisticasPersonaService, EstadisticasExamenesService
+from .catalogos import CATALOGOS, catalogos
+from .autenticacion import invalidar_tokens, invalidar_usuario
+
+
+@receiver(pre_save, sender=Examen)
+def examen_pre_save(sender, instance, raw=False, using=None, **kwargs):
+    """
+    Guarda el aporte y el día previos del examen para calcular el delta en post_save
+
+    La fila se bloquea hasta el fin de la transacción de ``Examen.save``: dos
+    guardados concurrentes del mismo examen no pueden leer el mismo aporte previo.
+    """
+    if raw:
+        return
+    anterior = dia = None
+    if instance.pk:
+        fila = Examen.objects.using(using).select_for_update().filter(pk=instance.pk).values(
+            'persona_id', 'is_active', 'estado_id', 'calificacion', 'fecha_examen', 'created_at'
+        ).first()
+        if fila:
+            dia = EstadisticasExamenesService.dia(fila.pop('fecha_examen'), fila.pop('created_at'))
+            anterior = EstadisticasPersonaService.aporte(**fila)
+    instance._aporte_estadisticas = anterior
+    instance._dia_estadisticas = dia
+
+
+@receiver(post_save, sender=Examen)
+def examen_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    EstadisticasPersonaService.aplicar(
+        getattr(instance, '_aporte_estadisticas', None),
+        EstadisticasPersonaService.aporte_examen(instance)
+    )
+    instance._aporte_estadisticas = EstadisticasPersonaService.aporte_examen(instance)
+    # Las estadísticas diarias de los días ya cerrados se recalculan en el cron
+    dia = EstadisticasExamenesService.dia(instance.fecha_examen, instance.created_at)
+    EstadisticasExamenesService.marcar_pendientes(getattr(instance, '_dia_estadisticas', None), dia)
+    instance._dia_estadisticas = dia
+
+
+@receiver(pre_delete, sender=Examen)
+def examen_pre_delete(sender, instance, using=None, **kwargs):
+    """Aporte vigente del examen (la instancia en memoria puede estar desactualizada)"""
+    fila = Examen.objects.using(using).select_for_update().filter(pk=instance.pk).values(
+        'persona_id', 'is_active', 'estado_id', 'calificacion'
+    ).first()
+    instance._aporte_estadisticas = EstadisticasPersonaService.aporte(**fila) if fila else None
+
+
+@receiver(post_delete, sender=Examen)
+def examen_post_delete(sender, instance, **kwargs):
+    anterior = getattr(instance, '_aporte_estadisticas', EstadisticasPersonaService.aporte_examen(instance))
+    EstadisticasPersonaService.aplicar(anterior, None)
+    EstadisticasExamenesService.marcar_pendientes(
+        EstadisticasExamenesService.dia(instance.fecha_examen, instance.created_at)
+    )
+
+
+def catalogo_modificado(sender, **kwargs):
+    """Invalida el registro de catálogos en todos los procesos al confirmar la transacción"""
+    transaction.on_commit(catalogos.invalidar)
+
+
+for modelo in CATALOGOS:
+    post_save.connect(catalogo_modificado, sender=modelo, dispatch_uid=f'catalogo_save_{modelo.__name__}')
+    post_delete.connect(catalogo_modificado, sender=modelo, dispatch_uid=f'catalogo_delete_{modelo.__name__}')
+
+
+@receiver(post_delete, sender=Token)
+def token_eliminado(sender, instance, **kwargs):
+    """Logout o token revocado: se descarta de la caché de autenticación"""
+    transaction.on_commit(lambda: invalidar_tokens([instance.key]))
+
+
+@receiver(pre_save, sender=get_user_model())
+def usuario_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Detecta el cambio de contraseña para revocar los tokens del usuario"""
+    instance._password_cambiado = False
+    if raw or not instance.pk or (update_fields is not None and 'password' not in update_fields):
+        return
+    anterior = sender.objects.filter(pk=instance.pk).values_list('password', flat=True).first()
+    instance._password_cambiado = anterior is not None and anterior != instance.password
+
+
+@receiver(post_save, sender=get_user_model())
+def usuario_post_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Desactivación, cambio de contraseña u otros cambios del usuario: se descartan sus tokens cacheados"""
+    if raw or created or (update_fields is not None and set(update_fields) == {'last_login'}):
+        return
+    if getattr(instance, '_password_cambiado', False):
+        # Al cambiar la contraseña se cierran todas las sesiones
+        Token.objects.filter(user=instance).delete()
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidar_usuario(user_id))
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from core.serializers import UserCreateSerializer
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from core.models import Persona
 from core.funciones import generarUsername, normalizarTexto
 from django.contrib.auth.hashers import make_password
@@ -22,25 +23,32 @@ def create_user(request):
         password = serializer.validated_data['password']
 
         try:
-            # CREAMOS EL USUARIO EN EL MODELO USER NATIVO EN DJANGO
-            user = User.objects.create_user(
-                username=generarUsername(fname, lname),
-                first_name=fname,
-                last_name=lname,
-                email=email,
-                password=password
-            )
-
-            persona = Persona(
-                user=user,
-                nombre1=fname,
-                apellido1=lname,
-                correo=email,
-            )
-
-            persona.save(request)
-
-            token, created = Token.objects.get_or_create(user=user)
+            # USUARIO, PERSONA Y TOKEN SE CREAN EN UNA SOLA TRANSACCIÓN: SI EL CORREO YA EXISTE
+            # EL ÍNDICE ÚNICO DE Persona.correo LA REVIERTE (SIN CONSULTA PREVIA)
+            with transaction.atomic():
+                # CREAMOS EL USUARIO EN EL MODELO USER NATIVO EN DJANGO
+                user = User.objects.create_user(
+                    username=generarUsername(fname, lname),
+                    first_name=fname,
+                    last_name=lname,
+                    email=email,
+                    password=password
+                )
+
+                persona = Persona(
+                    user=user,
+                    nombre1=fname,
+                    apellido1=lname,
+                    correo=email,
+                )
+
+                persona.save(request)
+
+                token, created = Token.objects.get_or_create(user=user)
+        except IntegrityError:
+            if Persona.objects.filter(correo__iexact=email).exists():
+                return Response({'email': ['El correo electrónico ya está en uso']}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'result': False, 'message': 'Error al crear el usuario'}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as ex:
             return Response({'result': False, 'message': 'Error al crear el usuario'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,163 @@
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Persona
+from .models import (
+    Examen, Pregunta, Respuesta, EstadoExamen, NivelExamen, AreaEstudio, TipoPregunta, TemaAreaEstudio
+)
+
+# Dominio de los correos de las personas sintéticas (permite identificarlas y borrarlas)
+DOMINIO_SINTETICO = 'sintetico.local'
+
+# Catálogos mínimos si la base está vacía
+CATALOGOS_POR_DEFECTO = (
+    (EstadoExamen, ('PENDIENTE', 'EN PROGRESO', 'EXAMEN COMPLETADO', 'EXAMEN CALIFICADO')),
+    (NivelExamen, ('BÁSICO', 'INTERMEDIO', 'AVANZADO', 'EXPERTO')),
+    (AreaEstudio, ('MATEMÁTICAS', 'CIENCIAS', 'HISTORIA', 'LENGUAJE')),
+    (TipoPregunta, ('SELECCIÓN MÚLTIPLE', 'VERDADERO_FALSO', 'RESPUESTA CORTA')),
+)
+
+
+def _ids_catalogo(modelo, nombres):
+    ids = list(modelo.objects.values_list('id', flat=True))
+    if not ids:
+        ids = [obj.id for obj in modelo.objects.bulk_create([modelo(nombre=nombre) for nombre in nombres])]
+    return ids
+
+
+def _ids_temas(area_ids, por_area=3):
+    temas = {}
+    for area_id, tema_id in TemaAreaEstudio.objects.filter(area_id__in=area_ids).values_list('area_id', 'id'):
+        temas.setdefault(area_id, []).append(tema_id)
+    faltantes = [area_id for area_id in area_ids if area_id not in temas]
+    if faltantes:
+        for tema in TemaAreaEstudio.objects.bulk_create([
+            TemaAreaEstudio(area_id=area_id, nombre=f'TEMA {i + 1}')
+            for area_id in faltantes for i in range(por_area)
+        ]):
+            temas.setdefault(tema.area_id, []).append(tema.id)
+    return temas
+
+
+def generar(examenes=1000, personas=20, preguntas=5, respuestas=4, dias=365, semilla=None, lote=1000):
+    """
+    Crea exámenes sintéticos con preguntas y respuestas usando ``bulk_create``
+
+    Con la misma ``semilla`` (y los mismos catálogos) los datos generados son
+    los mismos; los usernames llevan la semilla, así que para repetirla primero
+    hay que borrar los datos anteriores con ``limpiar``. Las fechas
+    (``fecha_examen`` y ``created_at``) se reparten en los ``dias`` días previos
+    a la fecha actual. Como ``bulk_create`` no dispara señales, las estadísticas
+    por persona se deben reconstruir después (``manage.py reconstruir_estadisticas``).
+
+    Args:
+        examenes: Cantidad de exámenes
+        personas: Cantidad de personas (con su usuario) entre las que se reparten
+        preguntas: Preguntas por examen
+        respuestas: Respuestas por pregunta (la primera es la correcta; se marca una por pregunta)
+        semilla: Semilla del generador aleatorio (resultados reproducibles)
+        lote: Exámenes insertados por transacción
+
+    Returns:
+        Dict con las cantidades creadas de cada modelo
+    """
+    azar = random.Random(semilla)
+    catalogos = {modelo: _ids_catalogo(modelo, nombres) for modelo, nombres in CATALOGOS_POR_DEFECTO}
+    temas = _ids_temas(catalogos[AreaEstudio])
+    ahora = timezone.now().replace(microsecond=0)
+    totales = {'personas': 0, 'examenes': 0, 'preguntas': 0, 'respuestas': 0}
+
+    with transaction.atomic():
+        prefijo = str(semilla) if semilla is not None else uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create([
+            User(username=f'sint_{prefijo}_{i}', password='!', email=f'sint_{prefijo}_{i}@{DOMINIO_SINTETICO}')
+            for i in range(max(1, personas))
+        ])
+        persona_ids = [persona.id for persona in Persona.objects.bulk_create([
+            Persona(user=user, nombre1='SINTETICO', nombre2='', apellido1=str(i), apellido2='', correo=user.email)
+            for i, user in enumerate(users)
+        ])]
+        totales['personas'] = len(persona_ids)
+
+    # Habilidad de cada persona y facilidad de cada pregunta: la opción marcada es la
+    # correcta con probabilidad (habilidad + facilidad) / 2, para que el análisis de
+    # ítems (api/analisis.py) encuentre dificultades y discriminaciones realistas
+    habilidad = {persona_id: azar.random() for persona_id in persona_ids}
+    facilidad = [azar.random() for _ in range(preguntas)]
+
+    for inicio in range(0, examenes, lote):
+        with transaction.atomic():
+            nuevos = []
+            for i in range(inicio, min(inicio + lote, examenes)):
+                fecha = ahora - timedelta(seconds=azar.randrange(max(1, dias) * 86400))
+                calificado = azar.random() < 0.6
+                nuevos.append(Examen(
+                    persona_id=azar.choice(persona_ids),
+                    titulo=f'Examen sintético {i}',
+                    fecha_examen=fecha,
+                    puntaje_maximo=Decimal(preguntas),
+                    puntaje_obtenido=Decimal(azar.randint(0, preguntas)) if calificado else None,
+                    calificacion=azar.randint(0, 100) if calificado else None,
+                    estado_id=azar.choice(catalogos[EstadoExamen]),
+                    nivel_id=azar.choice(catalogos[NivelExamen]),
+                    area_estudio_id=azar.choice(catalogos[AreaEstudio]),
+                    is_active=azar.random() < 0.95,
+                ))
+            nuevos = Examen.objects.bulk_create(nuevos)
+
+            # created_at es auto_now_add: se reparte en el tiempo con un bulk_update
+            for examen in nuevos:
+                examen.created_at = examen.fecha_examen
+            Examen.objects.bulk_update(nuevos, ['created_at'], batch_size=500)
+
+            Examen.tema.through.objects.bulk_create([
+                Examen.tema.through(examen_id=examen.id, temaareaestudio_id=azar.choice(temas[examen.area_estudio_id]))
+                for examen in nuevos
+            ])
+            nuevas_preguntas = Pregunta.objects.bulk_create([
+                Pregunta(examen=examen, enunciado=f'Pregunta {j + 1}', puntaje=Decimal(1),
+                         tipo_id=azar.choice(catalogos[TipoPregunta]))
+                for examen in nuevos for j in range(preguntas)
+            ])
+            marcadas = [
+                0 if respuestas < 2 or azar.random() < (habilidad[examen.persona_id] + facilidad[j]) / 2
+                else azar.randrange(1, respuestas)
+                for examen in nuevos for j in range(preguntas)
+            ]
+            nuevas_respuestas = Respuesta.objects.bulk_create([
+                Respuesta(pregunta=pregunta, texto=f'Opción {k + 1}', es_correcta=(k == 0),
+                          puntaje=Decimal(1) if k == 0 else Decimal(0), seleccionada=(k == marcada))
+                for pregunta, marcada in zip(nuevas_preguntas, marcadas) for k in range(respuestas)
+            ], batch_size=5000)
+
+        totales['examenes'] += len(nuevos)
+        totales['preguntas'] += len(nuevas_preguntas)
+        totales['respuestas'] += len(nuevas_respuestas)
+
+    return totales
+
+
+def limpiar():
+    """
+    Borra los datos sintéticos (usuarios con correo @DOMINIO_SINTETICO y, en
+    cascada, sus personas, exámenes, preguntas y respuestas)
+
+    Returns:
+        Cantidad de usuarios borrados
+    """
+    with transaction.atomic():
+        usuarios = User.objects.filter(email__endswith=f'@{DOMINIO_SINTETICO}')
+        cantidad = usuarios.count()
+        # Preguntas y respuestas se borran antes, persona por persona, para que el borrado
+        # en cascada no cargue en memoria todas sus filas de una vez
+        for persona_id in Persona.objects.filter(user__in=usuarios).values_list('id', flat=True):
+            Respuesta.objects.filter(pregunta__examen__persona_id=persona_id).delete()
+            Pregunta.objects.filter(examen__persona_id=persona_id).delete()
+        usuarios.delete()
+    return cantidad
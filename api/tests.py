@@ -1,3 +1,1540 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import random
+import statistics
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipIf, skipUnless
+from decimal import Decimal, ROUND_HALF_UP
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.models import Persona
+from .analisis import AnalisisItemsService, np
+from .autenticacion import CacheTokens, CachedTokenAuthentication, cache_tokens, version_token_key
+from .backends import EmailBackend
+from .calificacion import CalificacionService, ESTADO_COMPLETADO, ESTADO_CALIFICADO
+from .catalogos import VERSION_KEY, catalogos
+from .detector import ConsultasTestMixin, DetectorN1Middleware, PresupuestoExcedido, detectar
+from .detalle import get_examen_detalle
+from .examen import ExamReportService, exam_report_view
+from .exportacion import COLUMNAS, exportar_examenes, lotes, pyarrow
+from .generacion import resultado_generacion
+from .importacion import ImportacionEstudiantesService
+from .ingesta import ErrorIngesta, IngestaGeneracionService
+from .instrumentacion import InstrumentacionMiddleware, metrics_view
+from .login import login_user
+from .mainview import get_examenes
+from .estadisticas import EstadisticasExamenesService, EstadisticasPersonaService, DIMENSIONES
+from .models import (
+    Examen, Pregunta, Respuesta, GeneracionIA, EstadoExamen, AnalisisItem, AreaEstudio, TemaAreaEstudio, TipoPregunta,
+    TrabajoGeneracion, NivelExamen, EstadisticaDiariaPendiente, EstadisticaPersona
+)
+from .renderizado import JSON, MSGPACK, brotli, msgpack, negociar, comprimir as comprimir_respuesta
+from .resultados import GZIP, ZSTD, comprimir, descomprimir
+from .serializacion import ExamValuesSerializer
+from .trabajos import PERDIDO, GeneradorStub, TrabajoGeneracionService
+
+
+class GetExamenesCondicionalTests(TestCase):
+    """ETag / If-None-Match en mainview"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        for i in range(3):
+            examen = Examen.objects.create(persona=persona, titulo=f'Examen {i}', puntaje_maximo=Decimal('10'))
+            pregunta = Pregunta.objects.create(examen=examen, enunciado='¿2 + 2?', puntaje=Decimal('1'))
+            Respuesta.objects.create(pregunta=pregunta, texto='4', es_correcta=True)
+        cls.pregunta = pregunta
+
+    def get(self, **headers):
+        request = APIRequestFactory().get('/api/mainview/', **headers)
+        force_authenticate(request, user=self.user)
+        return get_examenes(request)
+
+    def test_responde_con_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+    def test_304_con_una_sola_consulta(self):
+        etag = self.get()['ETag']
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertLessEqual(len(consultas.captured_queries), 1)
+
+    def test_cambio_en_respuesta_invalida_etag(self):
+        etag = self.get()['ETag']
+        Respuesta.objects.create(pregunta=self.pregunta, texto='5', es_correcta=False)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_temas_persona_y_generacion_invalidan_etag(self):
+        examen = self.pregunta.examen
+        area = AreaEstudio.objects.create(nombre='MATEMATICAS')
+        tema = TemaAreaEstudio.objects.create(nombre='SUMAS', area=area)
+        cambios = [
+            ('tema agregado', lambda: examen.tema.add(tema)),
+            ('tema renombrado', lambda: TemaAreaEstudio.objects.filter(pk=tema.pk).update(
+                nombre='RESTAS', updated_at=timezone.now())),
+            ('tema quitado', lambda: examen.tema.remove(tema)),
+            ('persona renombrada', lambda: Persona.objects.filter(user=self.user).update(
+                nombre1='ANITA', updated_at=timezone.now())),
+            ('generación', lambda: GeneracionIA.objects.create(examen=examen, area=area)),
+        ]
+        for nombre, cambio in cambios:
+            with self.subTest(nombre):
+                etag = self.get()['ETag']
+                cambio()
+                self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class LoginPorCorreoTests(TestCase):
+    """Login con EmailBackend: usuario y persona en una sola consulta"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('aperezl', 'Ana.Perez@Example.com', 'Secret123!')
+        cls.persona = Persona.objects.create(
+            user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ', correo='Ana.Perez@Example.com'
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def login(self, email, password):
+        request = APIRequestFactory().post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+        return login_user(request)
+
+    def test_login_con_cantidad_fija_de_consultas(self):
+        # authenticate(): usuario + persona en EmailBackend (1); ModelBackend no consulta
+        # sin username. Token existente (1)
+        with self.assertNumQueries(2):
+            response = self.login('ana.perez@example.com', 'Secret123!')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], self.token.key)
+        self.assertEqual(response.data['user']['personaId'], self.persona.id)
+
+    def test_contrasena_incorrecta(self):
+        self.assertEqual(self.login('ana.perez@example.com', 'Otra123!').status_code, 401)
+
+    def test_fallos_pasan_por_authenticate(self):
+        fallidos = []
+
+        def registrar(sender, credentials, **kwargs):
+            fallidos.append(credentials['email'])
+
+        user_login_failed.connect(registrar)
+        self.addCleanup(user_login_failed.disconnect, registrar)
+        with mock.patch.object(User, 'set_password') as hashear:
+            self.assertEqual(self.login('nadie@example.com', 'Secret123!').status_code, 401)
+        # El correo inexistente hashea la contraseña igual que uno existente
+        hashear.assert_called_once_with('Secret123!')
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login('ana.perez@example.com', 'Secret123!').status_code, 401)
+        self.assertEqual(fallidos, ['nadie@example.com', 'ana.perez@example.com'])
+
+    def test_backend_authenticate(self):
+        self.assertEqual(EmailBackend().authenticate(None, email='ANA.PEREZ@example.com', password='Secret123!'), self.user)
+        self.assertIsNone(EmailBackend().authenticate(None, email='nadie@example.com', password='Secret123!'))
+
+    def test_correo_unico_sin_distinguir_mayusculas(self):
+        otro = User.objects.create_user('aperez2', 'otro@example.com', 'Secret123!')
+        with self.assertRaises(IntegrityError):
+            Persona.objects.create(user=otro, nombre1='ANA', apellido1='PEREZ', apellido2='', correo='ANA.PEREZ@EXAMPLE.COM')
+
+
+class PresupuestoConsultasTests(ConsultasTestMixin, TestCase):
+    """Consultas N+1 y presupuesto de consultas de mainview y del reporte"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        cls.staff = User.objects.create_user('admin', 'admin@example.com', 'Secret123!', is_staff=True)
+        cls.persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        calificador = Persona.objects.create(user=cls.staff, nombre1='LUIS', apellido1='DIAZ', apellido2='')
+        for i in range(5):
+            examen = Examen.objects.create(persona=cls.persona, titulo=f'Examen {i}', calificado_por=calificador,
+                                           puntaje_maximo=Decimal('10'))
+            for j in range(2):
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=Decimal('1'))
+                Respuesta.objects.create(pregunta=pregunta, texto='A', es_correcta=True, es_vof=calificador)
+                Respuesta.objects.create(pregunta=pregunta, texto='B')
+
+    def setUp(self):
+        # Los presupuestos son con los catálogos ya cargados (se leen una vez por proceso)
+        catalogos.precargar()
+
+    def get(self, vista, user, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=user)
+        response = vista(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_mainview_dentro_del_presupuesto(self):
+        for serializer in ('orm', 'values'):
+            with self.subTest(serializer=serializer), self.assertPresupuestoConsultas(vista=get_examenes):
+                self.get(get_examenes, self.user, serializer=serializer)
+
+    def test_reporte_dentro_del_presupuesto(self):
+        for serializer in ('orm', 'values'):
+            with self.subTest(serializer=serializer), self.assertPresupuestoConsultas(vista=exam_report_view):
+                self.get(exam_report_view, self.staff, serializer=serializer)
+
+    def test_detecta_carga_perezosa_repetida(self):
+        with detectar() as detector:
+            nombres = [str(examen) for examen in Examen.objects.all()]
+        self.assertEqual(len(nombres), 5)
+        # Examen.__str__ carga la persona y Persona.__str__ su usuario, una vez por examen
+        repetidas = detector.repetidas()
+        self.assertEqual([(c['cantidad'], c['perezosa']) for c in repetidas], [(5, True), (5, True)])
+        self.assertEqual(
+            sorted(c['ubicacion'].split(':')[0] for c in repetidas), ['api/models.py', 'core/models.py']
+        )
+
+        with self.assertRaises(self.failureException):
+            with self.assertPresupuestoConsultas():
+                [str(examen) for examen in Examen.objects.all()]
+
+    def test_middleware_desactivado_se_quita_de_la_cadena(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            DetectorN1Middleware(lambda request: None)
+
+    @override_settings(DETECTOR_N1=True, DETECTOR_N1_ESTRICTO=True)
+    async def test_middleware_async_detecta_n1(self):
+        async def vista(request):
+            await sync_to_async(lambda: [str(examen) for examen in Examen.objects.all()])()
+            return HttpResponse()
+
+        middleware = DetectorN1Middleware(vista)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertRaises(PresupuestoExcedido):
+            await middleware(APIRequestFactory().get('/'))
+
+
+class ProyeccionTests(TestCase):
+    """fields= / include= en mainview: mismo JSON con ambos serializadores y sin consultar lo no pedido"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        for i in range(3):
+            examen = Examen.objects.create(persona=persona, titulo=f'Examen {i}', calificacion=i * 10)
+            pregunta = Pregunta.objects.create(examen=examen, enunciado='¿2 + 2?', puntaje=Decimal('1'))
+            Respuesta.objects.create(pregunta=pregunta, texto='4', es_correcta=True)
+
+    def setUp(self):
+        catalogos.precargar()
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/api/mainview/', params)
+        force_authenticate(request, user=self.user)
+        return get_examenes(request)
+
+    def test_solo_campos_pedidos(self):
+        for serializer in ('orm', 'values'):
+            with self.subTest(serializer=serializer):
+                with CaptureQueriesContext(connection) as consultas:
+                    response = self.get(fields='id,titulo,calificacion', include='estado', serializer=serializer)
+                self.assertEqual(response.status_code, 200)
+                examen = json.loads(response.content)['examenes'][0]
+                self.assertEqual(list(examen), ['id', 'titulo', 'calificacion', 'estado'])
+                # Sin prefetch de preguntas/respuestas ni subconsultas de métricas
+                for consulta in consultas.captured_queries:
+                    self.assertFalse(consulta['sql'].startswith(('SELECT "api_pregunta"', 'SELECT "api_respuesta"')))
+                    self.assertNotIn('total_respuestas', consulta['sql'])
+
+    def test_mismo_json_con_ambos_serializadores(self):
+        params = {'fields': 'porcentaje_aciertos,persona,preguntas'}
+        self.assertEqual(
+            json.loads(self.get(serializer='orm', **params).content)['examenes'],
+            json.loads(self.get(serializer='values', **params).content)['examenes']
+        )
+
+    def test_campo_desconocido(self):
+        self.assertEqual(self.get(fields='id,clave').status_code, 400)
+        self.assertEqual(self.get(include='titulo').status_code, 400)
+
+
+class ExamenDetalleTests(ConsultasTestMixin, TestCase):
+    """Detalle de examen con preguntas paginadas por cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        cls.examen = Examen.objects.create(persona=persona, titulo='Largo')
+        for i in range(25):
+            pregunta = Pregunta.objects.create(examen=cls.examen, enunciado=f'P{i}', puntaje=Decimal('1'))
+            Respuesta.objects.create(pregunta=pregunta, texto='A', es_correcta=True)
+            Respuesta.objects.create(pregunta=pregunta, texto='B')
+
+    def setUp(self):
+        catalogos.precargar()
+
+    def get(self, user=None, **params):
+        request = APIRequestFactory().get(f'/api/examenes/{self.examen.id}/', params)
+        force_authenticate(request, user=user or self.user)
+        return get_examen_detalle(request, exam_id=self.examen.id)
+
+    def test_recorre_todas_las_preguntas_en_orden(self):
+        ids, cursor, paginas = [], None, 0
+        while True:
+            params = {'page_size': 10, **({'cursor': cursor} if cursor else {})}
+            with self.assertPresupuestoConsultas(vista=get_examen_detalle):
+                data = json.loads(self.get(**params).content)
+            self.assertEqual(data['examen'] is not None, paginas == 0)
+            self.assertTrue(all(len(pregunta['respuestas']) == 2 for pregunta in data['preguntas']))
+            ids += [pregunta['id'] for pregunta in data['preguntas']]
+            paginas += 1
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(paginas, 3)
+        self.assertEqual(ids, list(self.examen.preguntas.order_by('id').values_list('id', flat=True)))
+
+    def test_cabecera_sin_metricas(self):
+        examen = json.loads(self.get().content)['examen']
+        self.assertEqual(examen['titulo'], 'Largo')
+        self.assertNotIn('total_preguntas', examen)
+        self.assertNotIn('preguntas', examen)
+
+    def test_examen_de_otro_estudiante(self):
+        otro = User.objects.create_user('otro', 'otro@example.com', 'Secret123!')
+        self.assertEqual(self.get(user=otro).status_code, 404)
+        self.assertEqual(self.get(user=otro, cursor='MQ').status_code, 404)
+
+
+class ResultadoGeneracionTests(TestCase):
+    """Resultado de la generación IA comprimido y servido aparte"""
+
+    RESULTADO = {'examen': {'titulo': 'Álgebra'}, 'preguntas': [{'enunciado': f'P{i}'} for i in range(50)]}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        generacion = GeneracionIA(persona=persona)
+        generacion.resultado = cls.RESULTADO
+        generacion.save()
+        cls.generacion = generacion
+
+    def get(self, user=None, **headers):
+        request = APIRequestFactory().get('/api/generaciones-ia/1/resultado/', **headers)
+        force_authenticate(request, user=user or self.user)
+        return resultado_generacion(request, generacion_id=self.generacion.id)
+
+    def test_guarda_comprimido_y_no_lo_lee_por_defecto(self):
+        generacion = GeneracionIA.objects.get(id=self.generacion.id)
+        self.assertEqual(generacion.get_deferred_fields(), {'resultadojson', 'resultado_comprimido'})
+        self.assertIsNone(GeneracionIA.objects.values_list('resultadojson', flat=True).get(id=generacion.id))
+        self.assertLess(len(generacion.resultado_comprimido), generacion.resultado_tamano)
+        self.assertEqual(generacion.resultado, self.RESULTADO)
+
+    def test_envia_los_bytes_guardados_si_el_cliente_acepta_la_codificacion(self):
+        self.generacion.refresh_from_db(fields=['resultado_comprimido'])
+        codificacion = self.generacion.resultado_codificacion
+        response = self.get(HTTP_ACCEPT_ENCODING=f'br, {codificacion}')
+        self.assertEqual(response['Content-Encoding'], codificacion)
+        self.assertEqual(response.content, bytes(self.generacion.resultado_comprimido))
+        self.assertEqual(json.loads(descomprimir(response.content, codificacion)), self.RESULTADO)
+
+        response = self.get(HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), self.RESULTADO)
+
+    def test_etag_con_el_hash_y_304(self):
+        etag = self.get()['ETag']
+        self.assertEqual(etag, f'"{self.generacion.resultado_hash}"')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertTrue(all('resultado_comprimido' not in q['sql'] for q in consultas.captured_queries))
+
+    def test_etag_distinto_por_codificacion(self):
+        codificada = self.get(HTTP_ACCEPT_ENCODING=GZIP)
+        identidad = self.get()
+        self.assertEqual(codificada['Content-Encoding'], GZIP)
+        self.assertEqual(codificada['ETag'], f'"{self.generacion.resultado_hash}-gzip"')
+        self.assertEqual(identidad['ETag'], f'"{self.generacion.resultado_hash}"')
+        # Cada representación solo valida su propio ETag
+        self.assertEqual(self.get(HTTP_ACCEPT_ENCODING=GZIP, HTTP_IF_NONE_MATCH=identidad['ETag']).status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=codificada['ETag']).status_code, 200)
+        self.assertEqual(self.get(HTTP_ACCEPT_ENCODING=GZIP, HTTP_IF_NONE_MATCH=codificada['ETag']).status_code, 304)
+
+    def test_gzip_por_defecto_aunque_zstd_este_disponible(self):
+        with mock.patch('api.resultados.zstandard', mock.Mock()):
+            self.assertEqual(comprimir(self.RESULTADO)['resultado_codificacion'], GZIP)
+        with mock.patch('api.resultados.zstandard', None):
+            with self.assertRaises(RuntimeError):
+                comprimir(self.RESULTADO, ZSTD)
+            with self.assertRaises(CommandError):
+                call_command('comprimir_resultados', codificacion=ZSTD, stdout=io.StringIO())
+
+    def test_fila_zstd_en_host_sin_zstandard(self):
+        GeneracionIA.objects.filter(id=self.generacion.id).update(
+            resultado_comprimido=b'zstd', resultado_codificacion=ZSTD
+        )
+        with mock.patch('api.resultados.zstandard', None):
+            self.assertEqual(self.get().status_code, 406)
+            response = self.get(HTTP_ACCEPT_ENCODING=ZSTD)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], ZSTD)
+        self.assertEqual(response.content, b'zstd')
+
+    def test_comprimir_resultados_con_filas_legadas_problematicas(self):
+        persona = Persona.objects.get(user=self.user)
+        legadas = {
+            'texto': 'respuesta del modelo sin JSON',
+            'json_en_texto': '{"examen": {"titulo": "Texto"}}',
+            'falla': {'examen': 'no se puede comprimir'},
+            'dict': self.RESULTADO,
+        }
+        ids = {nombre: GeneracionIA.objects.create(persona=persona, resultadojson=datos).id for nombre, datos in legadas.items()}
+        original = comprimir
+
+        def comprimir_con_fallo(datos, codificacion=None):
+            if datos == legadas['falla']:
+                raise ValueError('dato inválido')
+            return original(datos, codificacion)
+
+        salida, errores = io.StringIO(), io.StringIO()
+        with mock.patch('api.management.commands.comprimir_resultados.comprimir', comprimir_con_fallo):
+            call_command('comprimir_resultados', lote=1, stdout=salida, stderr=errores)
+        self.assertIn('3 generaciones | 1 omitidas', salida.getvalue())
+        self.assertIn(f'Generación {ids["falla"]} omitida', errores.getvalue())
+
+        resultados = {nombre: GeneracionIA.objects.get(id=id_) for nombre, id_ in ids.items()}
+        self.assertEqual(resultados['texto'].resultado, legadas['texto'])
+        self.assertEqual(resultados['json_en_texto'].resultado, {'examen': {'titulo': 'Texto'}})
+        self.assertEqual(resultados['dict'].resultado, self.RESULTADO)
+        self.assertIsNone(resultados['falla'].resultado_comprimido)
+
+        # Al volver a ejecutar solo queda pendiente la fila omitida
+        salida = io.StringIO()
+        call_command('comprimir_resultados', stdout=salida)
+        self.assertIn('1 generaciones | 0 omitidas', salida.getvalue())
+
+    def test_fila_legada_sin_comprimir(self):
+        GeneracionIA.objects.filter(id=self.generacion.id).update(
+            resultadojson=self.RESULTADO, resultado_comprimido=None, resultado_codificacion='', resultado_hash=''
+        )
+        response = self.get(HTTP_ACCEPT_ENCODING=GZIP)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), self.RESULTADO)
+        self.assertEqual(response['ETag'], f'"{self.generacion.resultado_hash}"')
+        self.assertEqual(GeneracionIA.objects.get(id=self.generacion.id).resultado, self.RESULTADO)
+
+    def test_generacion_de_otro_usuario(self):
+        otro = User.objects.create_user('otro', 'otro@example.com', 'Secret123!')
+        self.assertEqual(self.get(user=otro).status_code, 404)
+
+
+def calificar_examen(examen):
+    """Calificación de referencia, examen por examen: (puntaje_obtenido, calificacion) o None"""
+    total = obtenido = Decimal('0')
+    for pregunta in examen.preguntas.all():
+        respuestas = list(pregunta.respuestas.all())
+        correctas = {r.id for r in respuestas if r.es_correcta}
+        marcadas = {r.id for r in respuestas if r.seleccionada}
+        total += pregunta.puntaje or 0
+        if correctas and correctas == marcadas:
+            obtenido += pregunta.puntaje or 0
+    if total <= 0:
+        return None
+    return obtenido, int((100 * obtenido / total).quantize(Decimal('1'), ROUND_HALF_UP))
+
+
+class CalificacionTests(TestCase):
+    """Calificación masiva con un UPDATE por lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.completado = EstadoExamen.objects.create(nombre=ESTADO_COMPLETADO)
+        cls.calificado = EstadoExamen.objects.create(nombre=ESTADO_CALIFICADO)
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        cls.persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        azar = random.Random(7)
+        for i in range(30):
+            examen = Examen.objects.create(persona=cls.persona, titulo=f'E{i}', estado=cls.completado)
+            for j in range(azar.randint(0, 6)):
+                puntaje = azar.choice([Decimal('1'), Decimal('2.5'), Decimal('0.75'), Decimal('0'), None])
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=puntaje)
+                for k in range(azar.randint(0, 4)):
+                    Respuesta.objects.create(
+                        pregunta=pregunta, texto=f'R{k}', es_correcta=azar.random() < 0.4,
+                        seleccionada=azar.random() < 0.4
+                    )
+
+    def setUp(self):
+        # Los estados se crean en el test: on_commit no invalida el registro dentro de TestCase
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def test_paridad_con_la_calificacion_examen_por_examen(self):
+        esperado = {
+            examen.id: calificar_examen(examen)
+            for examen in Examen.objects.prefetch_related('preguntas__respuestas')
+        }
+        docente = User.objects.create_user('docente', 'docente@example.com', 'Secret123!')
+        calificador = Persona.objects.create(user=docente, nombre1='EVA', apellido1='DIAZ', apellido2='RUIZ')
+
+        resultado = CalificacionService.calificar_lote(tamano_lote=7, calificado_por_id=calificador.id)
+
+        self.assertEqual(resultado['procesados'], 30)
+        self.assertEqual(resultado['calificados'], sum(1 for valor in esperado.values() if valor is not None))
+        for examen in Examen.objects.all():
+            with self.subTest(examen=examen.titulo):
+                if esperado[examen.id] is None:
+                    self.assertEqual(examen.estado_id, self.completado.id)
+                    self.assertIsNone(examen.calificado_por_id)
+                else:
+                    self.assertEqual((examen.puntaje_obtenido, examen.calificacion), esperado[examen.id])
+                    self.assertEqual(examen.estado_id, self.calificado.id)
+                    self.assertEqual(examen.calificado_por_id, calificador.id)
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+
+    def test_recalifica_tras_cambiar_las_opciones_marcadas(self):
+        CalificacionService.calificar_lote()
+        examen = Examen.objects.filter(estado=self.calificado).first()
+        Respuesta.objects.filter(pregunta__examen=examen).update(seleccionada=False)
+        Respuesta.objects.filter(pregunta__examen=examen, es_correcta=True).update(seleccionada=True)
+
+        self.assertEqual(CalificacionService.calificar([examen.id]), 1)
+        examen.refresh_from_db()
+        self.assertEqual((examen.puntaje_obtenido, examen.calificacion), calificar_examen(examen))
+
+    def test_recalificar_no_pisa_las_notas_de_otra_persona(self):
+        docente = Persona.objects.create(
+            user=User.objects.create_user('docente'), nombre1='EVA', apellido1='DIAZ', apellido2='RUIZ'
+        )
+        automatico, manual = Examen.objects.filter(preguntas__puntaje__gt=0).distinct()[:2]
+        Examen.objects.filter(id=automatico.id).update(estado=self.calificado)
+        Examen.objects.filter(id=manual.id).update(estado=self.calificado, calificado_por=docente, calificacion=95)
+
+        self.assertIn(automatico, CalificacionService.calificados())
+        self.assertNotIn(manual, CalificacionService.calificados())
+        self.assertIn(manual, CalificacionService.calificados(docente.id))
+
+        call_command('calificar_examenes', recalificar=True, stdout=io.StringIO())
+        manual.refresh_from_db()
+        self.assertEqual((manual.calificacion, manual.calificado_por_id), (95, docente.id))
+
+    def test_examen_indicado_solo_si_es_calificable(self):
+        en_curso, inactivo, entregado = Examen.objects.filter(preguntas__puntaje__gt=0).distinct()[:3]
+        Examen.objects.filter(id=en_curso.id).update(estado=None)
+        Examen.objects.filter(id=inactivo.id).update(is_active=False)
+
+        call_command('calificar_examenes', examen=[en_curso.id, inactivo.id, entregado.id], stdout=io.StringIO())
+        calificados = set(Examen.objects.filter(estado=self.calificado).values_list('id', flat=True))
+        self.assertEqual(calificados, {entregado.id})
+
+
+@skipIf(np is None, 'numpy no está instalado')
+class AnalisisItemsTests(TestCase):
+    """Dificultad, discriminación y distractores de los ítems del banco"""
+
+    @classmethod
+    def setUpTestData(cls):
+        completado = EstadoExamen.objects.create(nombre=ESTADO_COMPLETADO)
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        azar = random.Random(3)
+        # aciertos[examen][ítem]; 'Q2' tiene espacios y mayúsculas distintos en algunos exámenes
+        cls.aciertos = [[azar.random() < 0.3 + 0.1 * i for i in range(4)] for _ in range(12)]
+        cls.marcadas = []
+        for e, fila in enumerate(cls.aciertos):
+            examen = Examen.objects.create(persona=persona, titulo=f'E{e}', estado=completado)
+            marcadas = []
+            for i, acierta in enumerate(fila):
+                enunciado = f'  q{i}' if i == 2 and e % 2 else f'Q{i}'
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=enunciado, puntaje=Decimal('1'))
+                marcada = 0 if acierta else azar.randint(1, 2)
+                marcadas.append(marcada)
+                for k in range(3):
+                    Respuesta.objects.create(pregunta=pregunta, texto=f'Opción {k}', es_correcta=(k == 0),
+                                             seleccionada=(k == marcada))
+            cls.marcadas.append(marcadas)
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def test_metricas_contra_el_calculo_directo(self):
+        AnalisisItemsService.refrescar()
+        items = {item.enunciado.strip().upper(): item for item in AnalisisItem.objects.all()}
+        self.assertEqual(sorted(items), ['Q0', 'Q1', 'Q2', 'Q3'])
+
+        for i in range(4):
+            with self.subTest(item=i):
+                item = items[f'Q{i}']
+                x = [float(fila[i]) for fila in self.aciertos]
+                resto = [(sum(fila) - fila[i]) / 3 for fila in self.aciertos]
+                self.assertEqual(item.presentaciones, 12)
+                self.assertAlmostEqual(item.dificultad, sum(x) / 12)
+                self.assertAlmostEqual(item.discriminacion, statistics.correlation(x, resto), delta=1e-4)
+                opciones = {opcion['texto']: opcion for opcion in item.opciones}
+                for k in range(3):
+                    elegida = sum(marcadas[i] == k for marcadas in self.marcadas) / 12
+                    self.assertAlmostEqual(opciones[f'Opción {k}']['proporcion'], round(elegida, 4))
+                self.assertEqual([o['es_correcta'] for o in item.opciones].count(True), 1)
+
+    def test_incluye_los_calificados_a_mano(self):
+        calificado = EstadoExamen.objects.create(nombre=ESTADO_CALIFICADO)
+        catalogos.invalidar()
+        docente = Persona.objects.create(
+            user=User.objects.create_user('docente', 'docente@example.com', 'Secret123!'),
+            nombre1='EVA', apellido1='DIAZ', apellido2='RUIZ'
+        )
+        Examen.objects.filter(titulo__in=['E0', 'E1']).update(estado=calificado, calificado_por=docente, calificacion=90)
+        Examen.objects.filter(titulo='E2').update(estado=calificado, calificacion=50)
+
+        AnalisisItemsService.refrescar()
+        self.assertEqual(sorted(AnalisisItem.objects.values_list('presentaciones', flat=True)), [12] * 4)
+
+    def test_refresco_incremental(self):
+        AnalisisItemsService.refrescar()
+        self.assertEqual(AnalisisItemsService.refrescar()['grupos'], 0)
+
+        pregunta = Pregunta.objects.filter(enunciado='Q0').first()
+        Respuesta.objects.filter(pregunta=pregunta).update(seleccionada=False)
+        respuesta = pregunta.respuestas.get(es_correcta=True)
+        respuesta.seleccionada = True
+        respuesta.save()
+
+        resultado = AnalisisItemsService.refrescar()
+        self.assertEqual(resultado['grupos'], 1)
+        self.assertEqual(AnalisisItem.objects.count(), 4)
+        esperado = (sum(fila[0] for fila in self.aciertos) + (not self.aciertos[0][0])) / 12
+        self.assertAlmostEqual(AnalisisItem.objects.get(enunciado='Q0').dificultad, esperado)
+
+    def test_lectura_por_bloques_de_examenes(self):
+        completa = AnalisisItemsService.cargar()
+        with mock.patch('api.analisis.IDS_POR_CONSULTA', 5):
+            por_bloques = AnalisisItemsService.cargar()
+        self.assertEqual(por_bloques[1], completa[1])
+        self.assertEqual(
+            sorted(zip(*(por_bloques[0][campo] for campo in ('celda', 'opcion', 'seleccionada')))),
+            sorted(zip(*(completa[0][campo] for campo in ('celda', 'opcion', 'seleccionada'))))
+        )
+
+
+class ExportacionTests(TestCase):
+    """Exportación en streaming de exámenes, preguntas y respuestas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.completado = EstadoExamen.objects.create(nombre=ESTADO_COMPLETADO)
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'Secret123!', is_staff=True)
+        persona = Persona.objects.create(user=cls.admin, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        for i in range(5):
+            examen = Examen.objects.create(persona=persona, titulo=f'E{i}', estado=cls.completado)
+            for j in range(i % 3):
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=Decimal('2.5'))
+                for k in range(2):
+                    Respuesta.objects.create(pregunta=pregunta, texto=f'R{k}', es_correcta=k == 0)
+        # E0 y E3 sin preguntas: una fila cada uno; E1 y E4: 2 filas; E2: 4 filas
+        cls.filas = 1 + 2 + 4 + 1 + 2
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def get(self, **params):
+        request = APIRequestFactory().get('/api/examenes/exportar/', params)
+        force_authenticate(request, user=self.admin)
+        return exportar_examenes(request)
+
+    def test_lotes_no_dependen_del_tamano_del_bloque(self):
+        por_examen = [fila for filas in lotes(Examen.objects.all(), 1) for fila in filas]
+        self.assertEqual(por_examen, next(lotes(Examen.objects.all(), 100)))
+        self.assertEqual(len(por_examen), self.filas)
+        self.assertEqual(len(list(lotes(Examen.objects.all(), 2))), 3)
+
+    def test_csv(self):
+        response = self.get()
+        self.assertTrue(response.streaming)
+        filas = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+        self.assertEqual(filas[0], [nombre for nombre, _ in COLUMNAS])
+        self.assertEqual(len(filas), self.filas + 1)
+        self.assertEqual(filas[1][COLUMNAS.index(('estado', 'string'))], ESTADO_COMPLETADO)
+        self.assertEqual(filas[1][COLUMNAS.index(('persona', 'string'))], 'ANA PEREZ LOPEZ (admin)')
+
+    def test_filtros_del_reporte(self):
+        response = self.get(estado='PENDIENTE')
+        self.assertEqual(len(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()), 1)
+
+    @skipIf(pyarrow is None, 'pyarrow no está instalado')
+    def test_parquet_con_un_row_group_por_bloque(self):
+        import pyarrow.parquet
+
+        archivo = pyarrow.parquet.ParquetFile(io.BytesIO(b''.join(self.get(formato='parquet').streaming_content)))
+        tabla = archivo.read()
+        self.assertEqual(tabla.column_names, [nombre for nombre, _ in COLUMNAS])
+        self.assertEqual([tuple(fila.values()) for fila in tabla.to_pylist()], next(lotes(Examen.objects.all())))
+        self.assertEqual(archivo.num_row_groups, 1)
+
+    def test_formato_no_valido(self):
+        self.assertEqual(self.get(formato='xls').status_code, 400)
+
+
+class InstrumentacionTests(TestCase):
+    """Middleware de instrumentación en WSGI y ASGI"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('admin', 'admin@example.com', 'Secret123!', is_staff=True)
+        persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        for i in range(3):
+            examen = Examen.objects.create(persona=persona, titulo=f'Examen {i}')
+            Pregunta.objects.create(examen=examen, enunciado='P', puntaje=Decimal('1'))
+        cls.token = Token.objects.create(user=cls.user)
+
+    @override_settings(INSTRUMENTACION_MUESTREO=0)
+    def test_sin_muestreo_se_quita_de_la_cadena(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            InstrumentacionMiddleware(lambda request: None)
+
+    @override_settings(INSTRUMENTACION_MUESTREO=1)
+    def test_cadena_async_se_mantiene_async(self):
+        async def vista(request):
+            return None
+        self.assertTrue(iscoroutinefunction(InstrumentacionMiddleware(vista)))
+        self.assertFalse(iscoroutinefunction(InstrumentacionMiddleware(lambda request: None)))
+
+    @override_settings(INSTRUMENTACION_MUESTREO=1)
+    async def test_vistas_async_medidas_con_async_client(self):
+        for url in ('/api/async/mainview/', '/api/async/examenes/reporte/'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, headers={'Authorization': f'Token {self.token.key}'})
+                self.assertEqual(response.status_code, 200)
+                sql = [parte for parte in response['Server-Timing'].split(', ') if parte.startswith('sql;')]
+                self.assertEqual(len(sql), 1)
+                self.assertNotIn('"0 consultas"', sql[0])
+
+    def metricas(self, autorizacion=None):
+        headers = {'HTTP_AUTHORIZATION': autorizacion} if autorizacion else {}
+        return metrics_view(APIRequestFactory().get('/metrics', REMOTE_ADDR='127.0.0.1', **headers))
+
+    def test_metricas_solo_para_staff_o_el_token_del_scraper(self):
+        self.assertEqual(self.metricas(f'Token {self.token.key}').status_code, 200)
+        for autorizacion in (None, 'Bearer secreto', f'Token {Token.objects.create(user=User.objects.create_user("otro")).key}'):
+            with self.subTest(autorizacion=autorizacion), self.assertRaises(Http404):
+                self.metricas(autorizacion)
+        with override_settings(INSTRUMENTACION_METRICS_TOKEN='secreto'):
+            self.assertEqual(self.metricas('Bearer secreto').status_code, 200)
+            with self.assertRaises(Http404):
+                self.metricas('Bearer otro')
+
+
+class CatalogosTests(TestCase):
+    """Registro de catálogos por proceso e invalidación por el sello de la caché compartida"""
+
+    def setUp(self):
+        self.estado = EstadoExamen.objects.create(nombre='PENDIENTE')
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def test_alta_en_este_proceso_invalida_al_confirmar(self):
+        version = catalogos.version
+        with self.captureOnCommitCallbacks(execute=True):
+            nuevo = EstadoExamen.objects.create(nombre='ANULADO')
+        self.assertNotEqual(catalogos.version, version)
+        self.assertEqual(catalogos.get_by_nombre(EstadoExamen, 'ANULADO'), nuevo)
+
+    def test_cambio_en_otro_proceso_llega_tras_el_intervalo(self):
+        # Otro proceso renombra el estado y sube el sello en la caché compartida
+        EstadoExamen.objects.filter(id=self.estado.id).update(nombre='ENTREGADO')
+        cache.incr(VERSION_KEY)
+
+        with self.assertNumQueries(0):
+            catalogos.sync()
+            self.assertEqual(catalogos.get(EstadoExamen, self.estado.id).nombre, 'PENDIENTE')
+
+        with override_settings(CATALOGOS_VERIFICACION=0):
+            catalogos.sync()
+        self.assertEqual(catalogos.get(EstadoExamen, self.estado.id).nombre, 'ENTREGADO')
+        self.assertEqual(catalogos.id_por_nombre(EstadoExamen, 'ENTREGADO'), self.estado.id)
+        self.assertIsNone(catalogos.get_by_nombre(EstadoExamen, 'PENDIENTE'))
+
+    def test_attach_sin_consultas(self):
+        examen = Examen.objects.create(
+            persona=Persona.objects.create(user=User.objects.create_user('u'), nombre1='A', apellido1='B', apellido2=''),
+            titulo='E', estado=self.estado
+        )
+        examen = Examen.objects.get(id=examen.id)
+        with self.assertNumQueries(0):
+            catalogos.attach(examen, 'estado')
+            self.assertEqual(examen.estado.nombre, 'PENDIENTE')
+
+
+class TokenCacheTests(TestCase):
+    """Caché de autenticación por token: revocación entre procesos y expiración"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+
+    def setUp(self):
+        # Caché compartida que no consulta la base (como Redis o Memcached)
+        directorio = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directorio,
+        }}))
+        cache_tokens.limpiar()
+        self.addCleanup(cache_tokens.limpiar)
+        self.token = Token.objects.create(user=self.user)
+
+    def autenticar(self):
+        return CachedTokenAuthentication().authenticate_credentials(self.token.key)
+
+    def test_entrada_cacheada_sin_consultas(self):
+        with self.assertNumQueries(1):
+            self.autenticar()
+        with self.assertNumQueries(0):
+            user, _ = self.autenticar()
+        self.assertEqual(user, self.user)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'evalup_cache',
+    }})
+    def test_cache_en_la_base_una_consulta_por_request(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.autenticar()
+        self.assertEqual(len(cache_tokens), 0)
+
+    def test_revocado_en_otro_proceso(self):
+        self.autenticar()
+        # Otro worker borra el token y cambia el sello en la caché compartida
+        Token.objects.filter(key=self.token.key).delete()
+        cache.set(version_token_key(self.token.key), 1)
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_logout_y_desactivacion(self):
+        self.autenticar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+        self.token = Token.objects.create(user=self.user)
+        self.autenticar()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_cambio_de_contrasena_revoca_los_tokens(self):
+        self.autenticar()
+        self.user.set_password('Otra123!')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_token_expirado(self):
+        self.autenticar()
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timedelta(days=30))
+        cache_tokens.limpiar()
+        with override_settings(TOKEN_EXPIRACION=timedelta(days=7)), self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+    def test_entrada_vence_con_el_ttl(self):
+        local = CacheTokens(maximo=10, ttl=60)
+        with mock.patch('api.autenticacion.time.monotonic', return_value=1000):
+            local.guardar(self.token, None)
+            self.assertIsNotNone(local.obtener(self.token.key))
+        with mock.patch('api.autenticacion.time.monotonic', return_value=1061):
+            self.assertIsNone(local.obtener(self.token.key))
+        self.assertEqual(len(local), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_sin_cache_compartida_valida_siempre_en_la_base(self):
+        self.autenticar()
+        self.assertEqual(len(cache_tokens), 0)
+        Token.objects.filter(key=self.token.key).delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar()
+
+
+class IngestaTests(TestCase):
+    """Ingesta de GeneracionIA.resultado en exámenes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        EstadoExamen.objects.create(nombre='PENDIENTE')
+        TipoPregunta.objects.create(nombre='SELECCIÓN MÚLTIPLE')
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        cls.persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        area = AreaEstudio.objects.create(nombre='MATEMATICAS')
+        cls.tema = TemaAreaEstudio.objects.create(area=area, nombre='ÁLGEBRA')
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def generacion(self, persona=True, puntaje=2.5, preguntas=2):
+        generacion = GeneracionIA(persona=self.persona if persona else None, temas=self.tema)
+        generacion.resultado = {
+            'titulo': 'Álgebra',
+            'duracion_minutos': 30,
+            'preguntas': [
+                {
+                    'enunciado': f'P{i}', 'tipo': 'selección múltiple', 'puntaje': puntaje,
+                    'respuestas': [{'texto': 'A', 'es_correcta': True}, {'texto': 'B', 'es_correcta': False}],
+                }
+                for i in range(preguntas)
+            ],
+        }
+        generacion.save()
+        return generacion
+
+    def test_ingesta_el_examen_completo(self):
+        generacion = self.generacion()
+        examen = IngestaGeneracionService.ingestar(generacion)
+        self.assertEqual(examen.puntaje_maximo, Decimal('5'))
+        self.assertEqual(examen.estado.nombre, 'PENDIENTE')
+        self.assertEqual(list(examen.tema.all()), [self.tema])
+        self.assertEqual(Respuesta.objects.filter(pregunta__examen=examen).count(), 4)
+        self.assertEqual(GeneracionIA.objects.get(id=generacion.id).examen, examen)
+        self.assertIsNone(IngestaGeneracionService.ingestar(generacion))
+
+    def test_generacion_sin_persona(self):
+        with self.assertRaisesMessage(ErrorIngesta, 'no tiene persona'):
+            IngestaGeneracionService.ingestar(self.generacion(persona=False))
+
+    def test_puntaje_total_fuera_de_rango(self):
+        with self.assertRaisesMessage(ErrorIngesta, 'puntaje total'):
+            IngestaGeneracionService.ingestar(self.generacion(puntaje=600))
+        with self.assertRaisesMessage(ErrorIngesta, 'fuera de rango'):
+            IngestaGeneracionService.ingestar(self.generacion(puntaje=1000, preguntas=1))
+
+    def test_lote_registra_errores_y_sigue(self):
+        huerfana, valida = self.generacion(persona=False), self.generacion()
+        rechazada = self.generacion()
+        crear = IngestaGeneracionService.crear
+
+        def crear_o_fallar(generacion, datos):
+            if generacion.id == rechazada.id:
+                raise IntegrityError('violación de restricción')
+            return crear(generacion, datos)
+
+        with mock.patch.object(IngestaGeneracionService, 'crear', side_effect=crear_o_fallar):
+            resultado = IngestaGeneracionService.ingestar_lote(tamano_lote=2)
+        self.assertEqual(resultado['procesadas'], 3)
+        self.assertEqual(resultado['examenes'], 1)
+        self.assertEqual([generacion_id for generacion_id, _ in resultado['errores']], [huerfana.id, rechazada.id])
+        self.assertIsNotNone(GeneracionIA.objects.get(id=valida.id).examen_id)
+
+
+class GeneradorConFallo:
+    def generar(self, trabajo):
+        raise RuntimeError('sin conexión')
+
+
+@override_settings(GENERADOR_STUB_PREGUNTAS=2)
+class TrabajosGeneracionTests(TestCase):
+    """Cola de trabajos de generación: reclamo, reintentos y recuperación de abandonados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        cls.persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        cls.area = AreaEstudio.objects.create(nombre='MATEMATICAS')
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def encolar(self, cantidad=1):
+        return [TrabajoGeneracionService.encolar(self.persona.id, self.area.id) for _ in range(cantidad)]
+
+    def test_reclamo_sin_repetir_trabajos(self):
+        futuro = self.encolar()[0]
+        TrabajoGeneracion.objects.filter(id=futuro.id).update(disponible_en=timezone.now() + timedelta(minutes=1))
+        self.encolar(3)
+        primeros = TrabajoGeneracionService.reclamar('w1', cantidad=2)
+        segundos = TrabajoGeneracionService.reclamar('w2', cantidad=2)
+        self.assertEqual([len(primeros), len(segundos)], [2, 1])
+        self.assertFalse({t.id for t in primeros} & {t.id for t in segundos})
+        self.assertTrue(all(t.estado == TrabajoGeneracion.EN_CURSO and t.intentos == 1 for t in primeros + segundos))
+        self.assertEqual(TrabajoGeneracionService.reclamar('w3'), [])
+
+    def test_completa_el_trabajo(self):
+        self.encolar()
+        trabajo = TrabajoGeneracionService.reclamar('w1')[0]
+        self.assertEqual(TrabajoGeneracionService.procesar(trabajo, GeneradorStub()), TrabajoGeneracion.COMPLETADO)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoGeneracion.COMPLETADO)
+        self.assertEqual(trabajo.generacion.examen.preguntas.count(), 2)
+
+    def test_reintentos_con_backoff_y_fallo_final(self):
+        self.encolar()
+        for intento in range(1, 4):
+            trabajo = TrabajoGeneracionService.reclamar('w1')[0]
+            antes = timezone.now()
+            estado = TrabajoGeneracionService.procesar(trabajo, GeneradorConFallo())
+            trabajo.refresh_from_db()
+            if intento < 3:
+                self.assertEqual(estado, TrabajoGeneracion.PENDIENTE)
+                espera = (trabajo.disponible_en - antes).total_seconds()
+                self.assertTrue(0.8 * 5 * 2 ** (intento - 1) - 1 <= espera <= 1.2 * 5 * 2 ** (intento - 1) + 1)
+                TrabajoGeneracion.objects.filter(id=trabajo.id).update(disponible_en=timezone.now())
+            else:
+                self.assertEqual(estado, TrabajoGeneracion.FALLIDO)
+                self.assertEqual(trabajo.error, 'RuntimeError: sin conexión')
+        self.assertLessEqual(TrabajoGeneracionService.backoff(20), 300 * 1.2)
+
+    def test_trabajo_recuperado_no_se_procesa_dos_veces(self):
+        self.encolar()
+        lento = TrabajoGeneracionService.reclamar('w1')[0]
+        TrabajoGeneracion.objects.filter(id=lento.id).update(iniciado_en=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(TrabajoGeneracionService.recuperar_abandonados(), 1)
+        nuevo = TrabajoGeneracionService.reclamar('w2')[0]
+
+        # El worker original termina tarde: no guarda nada ni toca el trabajo del nuevo worker
+        self.assertEqual(TrabajoGeneracionService.procesar(lento, GeneradorStub()), PERDIDO)
+        self.assertEqual(TrabajoGeneracionService.procesar(lento, GeneradorConFallo()), PERDIDO)
+        self.assertEqual(GeneracionIA.objects.count(), 0)
+        self.assertEqual(TrabajoGeneracionService.procesar(nuevo, GeneradorStub()), TrabajoGeneracion.COMPLETADO)
+        self.assertEqual(GeneracionIA.objects.count(), 1)
+        self.assertEqual(Examen.objects.count(), 1)
+
+    def test_abandonado_sin_intentos_queda_fallido(self):
+        self.encolar()
+        trabajo = TrabajoGeneracionService.reclamar('w1')[0]
+        TrabajoGeneracion.objects.filter(id=trabajo.id).update(
+            intentos=3, iniciado_en=timezone.now() - timedelta(minutes=11)
+        )
+        TrabajoGeneracionService.recuperar_abandonados()
+        self.assertEqual(TrabajoGeneracion.objects.get(id=trabajo.id).estado, TrabajoGeneracion.FALLIDO)
+
+
+class SerializadoresTests(TestCase):
+    """El serializador ``values`` devuelve el mismo JSON que serialize_exam"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = EstadoExamen.objects.create(nombre='EXAMEN CALIFICADO')
+        nivel = NivelExamen.objects.create(nombre='BÁSICO')
+        area = AreaEstudio.objects.create(nombre='MATEMATICAS')
+        temas = [TemaAreaEstudio.objects.create(area=area, nombre=f'T{i}', descripcion=f'D{i}') for i in range(3)]
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        docente = Persona.objects.create(
+            user=User.objects.create_user('docente'), nombre1='LUIS', apellido1='DIAZ', apellido2=''
+        )
+        for i in range(3):
+            examen = Examen.objects.create(
+                persona=persona, titulo=f'Examen {i}', estado=estado, nivel=nivel, area_estudio=area,
+                calificado_por=docente if i else None, calificacion=70 + i, puntaje_maximo=Decimal('10'),
+                duracion=timedelta(minutes=30) if i else None,
+            )
+            # Temas asignados en orden distinto al de sus ids
+            for tema in (temas[2], temas[0], temas[1])[i:]:
+                examen.tema.add(tema)
+            for j in range(2):
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=Decimal('2.5'))
+                Respuesta.objects.create(pregunta=pregunta, texto='A', es_correcta=True, es_vof=docente)
+                Respuesta.objects.create(pregunta=pregunta, texto='B', justificacion='No')
+        generacion = GeneracionIA(persona=persona, area=area, temas=temas[1], nivel=nivel, examen=examen)
+        generacion.resultado = {'titulo': 'Examen 2'}
+        generacion.save()
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def test_mismo_json_que_serialize_exam(self):
+        examenes = ExamReportService.get_exam_complete_data()
+        orm = ExamReportService.serialize_exam_data(examenes)
+        self.assertEqual([e['temas'][0]['nombre'] for e in orm], ['T1', 'T0', 'T0'])
+        self.assertEqual(ExamValuesSerializer.serialize(examenes), orm)
+
+
+class EstadisticasDiariasTests(TestCase):
+    """Estadísticas del dashboard: GROUPING SETS, enrollado en memoria y agregados diarios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        estados = [EstadoExamen.objects.create(nombre=n) for n in (ESTADO_COMPLETADO, ESTADO_CALIFICADO)]
+        areas = [AreaEstudio.objects.create(nombre=n) for n in ('MATEMATICAS', 'HISTORIA')]
+        niveles = [NivelExamen.objects.create(nombre=n) for n in ('BÁSICO', 'AVANZADO')]
+        user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        persona = Persona.objects.create(user=user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        azar = random.Random(5)
+        ahora = timezone.now()
+        for i in range(40):
+            examen = Examen.objects.create(
+                persona=persona, titulo=f'E{i}', fecha_examen=ahora - timedelta(days=i % 5),
+                estado=azar.choice(estados + [None]), area_estudio=azar.choice(areas), nivel=azar.choice(niveles),
+                calificacion=azar.choice([None, azar.randint(0, 100)]),
+                puntaje_maximo=azar.choice([None, Decimal('10')]), puntaje_obtenido=Decimal(azar.randint(0, 10)),
+            )
+            for j in range(azar.randint(0, 3)):
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=Decimal('1'))
+                for k in range(azar.randint(1, 3)):
+                    Respuesta.objects.create(pregunta=pregunta, texto=f'R{k}', es_correcta=k == 0)
+        cls.desde = timezone.localdate() - timedelta(days=4)
+        cls.ayer = timezone.localdate() - timedelta(days=1)
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+        EstadisticasExamenesService.refrescar_diarias(self.desde, self.ayer)
+        EstadisticaDiariaPendiente.objects.all().delete()
+
+    def en_vivo(self):
+        return EstadisticasExamenesService.calcular(EstadisticasExamenesService.examenes_del_periodo(self.desde))
+
+    def test_agregados_diarios_igual_al_calculo_en_vivo(self):
+        en_vivo = self.en_vivo()
+        self.assertEqual(en_vivo['total_examenes'], 40)
+        calificaciones = list(Examen.objects.filter(calificacion__isnull=False).values_list('calificacion', flat=True))
+        self.assertEqual(en_vivo['promedio_calificacion'], sum(calificaciones) / len(calificaciones))
+        self.assertEqual(en_vivo['total_respuestas'], Respuesta.objects.count())
+        self.assertEqual(EstadisticasExamenesService.rango(self.desde), en_vivo)
+
+    @skipUnless(connection.vendor == 'postgresql', 'GROUPING SETS solo en PostgreSQL')
+    def test_grouping_sets_igual_a_enrollar(self):
+        examenes = Examen.objects.filter(is_active=True)
+        campos = [campo for campo, _, _ in DIMENSIONES]
+        servicio = EstadisticasExamenesService
+        self.assertEqual(
+            servicio.armar(servicio._grouping_sets(examenes)),
+            servicio.armar(servicio.enrollar(servicio.agrupar(examenes, *campos)))
+        )
+
+    def test_cambios_en_dias_cerrados_se_recalculan_en_el_cron(self):
+        viejo, borrado = Examen.objects.filter(fecha_examen__date__lt=timezone.localdate())[:2]
+        viejo.is_active = False
+        viejo.save()
+        borrado.delete()
+        self.assertEqual(
+            set(EstadisticaDiariaPendiente.objects.values_list('fecha', flat=True)),
+            {EstadisticasExamenesService.dia(e.fecha_examen, None) for e in (viejo, borrado)}
+        )
+        self.assertNotEqual(EstadisticasExamenesService.rango(self.desde), self.en_vivo())
+
+        call_command('refrescar_estadisticas_diarias', dias=1, stdout=io.StringIO())
+        self.assertFalse(EstadisticaDiariaPendiente.objects.exists())
+        self.assertEqual(EstadisticasExamenesService.rango(self.desde), self.en_vivo())
+
+
+class EstadisticasPersonaTests(TestCase):
+    """Estadísticas por persona mantenidas con deltas desde las señales de Examen"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.completado = EstadoExamen.objects.create(nombre=ESTADO_COMPLETADO)
+        cls.calificado = EstadoExamen.objects.create(nombre=ESTADO_CALIFICADO)
+        cls.ana = Persona.objects.create(
+            user=User.objects.create_user('ana', 'ana@example.com', 'Secret123!'),
+            nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ'
+        )
+        cls.eva = Persona.objects.create(
+            user=User.objects.create_user('eva', 'eva@example.com', 'Secret123!'),
+            nombre1='EVA', apellido1='DIAZ', apellido2='RUIZ'
+        )
+
+    def test_deltas_de_guardado_y_borrado(self):
+        examen = Examen.objects.create(persona=self.ana, titulo='E1', estado=self.completado)
+        otro = Examen.objects.create(persona=self.ana, titulo='E2', estado=self.completado, calificacion=40)
+        self.assertEqual(EstadisticasPersonaService.leer([self.ana.id]), {self.ana.id: {
+            'total_examenes': 2, 'examenes_calificados': 1, 'suma_calificacion': 40,
+            'por_estado': {self.completado.id: 2},
+        }})
+
+        examen.calificacion, examen.estado = 80, self.calificado
+        examen.save()
+        otro.persona = self.eva
+        otro.save()
+        self.assertEqual(EstadisticasPersonaService.leer(), {
+            self.ana.id: {'total_examenes': 1, 'examenes_calificados': 1, 'suma_calificacion': 80,
+                          'por_estado': {self.calificado.id: 1}},
+            self.eva.id: {'total_examenes': 1, 'examenes_calificados': 1, 'suma_calificacion': 40,
+                          'por_estado': {self.completado.id: 1}},
+        })
+
+        otro.is_active = False
+        otro.save()
+        examen.delete()
+        self.assertEqual(EstadisticasPersonaService.leer(), {})
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+
+    def test_guardado_con_instancia_desactualizada(self):
+        examen = Examen.objects.create(persona=self.ana, titulo='E1', estado=self.completado)
+        copia = Examen.objects.get(pk=examen.pk)
+        examen.calificacion = 70
+        examen.save()
+        # La otra copia todavía no ve la calificación: el delta parte de la fila, no de la instancia
+        copia.estado = self.calificado
+        copia.save()
+        Examen.objects.get(pk=examen.pk).delete()
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+
+        examen = Examen.objects.create(persona=self.ana, titulo='E2', estado=self.completado)
+        copia = Examen.objects.get(pk=examen.pk)
+        examen.calificacion = 90
+        examen.save()
+        copia.delete()
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+        self.assertEqual(EstadisticasPersonaService.leer(), {})
+
+    def test_drift_y_rebuild(self):
+        Examen.objects.create(persona=self.ana, titulo='E1', estado=self.completado, calificacion=60)
+        # Un UPDATE masivo no pasa por las señales
+        Examen.objects.update(calificacion=30)
+        drift = EstadisticasPersonaService.drift()
+        self.assertEqual(list(drift), [self.ana.id])
+        almacenado, calculado = drift[self.ana.id]
+        self.assertEqual((almacenado['suma_calificacion'], calculado['suma_calificacion']), (60, 30))
+
+        self.assertEqual(EstadisticasPersonaService.rebuild(), 1)
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+
+    def test_obtener_no_escribe(self):
+        Examen.objects.create(persona=self.ana, titulo='E1', calificacion=50)
+        Examen.objects.create(persona=self.ana, titulo='E2', calificacion=70)
+        EstadisticaPersona.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = EstadisticasPersonaService.obtener(self.ana.id)
+        self.assertEqual(resumen, {'cantidad': 2, 'promedio': 60})
+        self.assertFalse(any(
+            q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')) for q in consultas.captured_queries
+        ))
+        self.assertFalse(EstadisticaPersona.objects.exists())
+        self.assertEqual(EstadisticasPersonaService.obtener(self.eva.id), {'cantidad': 0, 'promedio': 0})
+
+
+class ImportacionEstudiantesTests(TestCase):
+    """Importación de estudiantes desde CSV (vista en streaming y lotes)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'Secret123!', is_staff=True)
+        cls.token = Token.objects.create(user=admin)
+
+    def importar(self, contenido, lote=500):
+        respuesta = self.client.post(
+            '/api/estudiantes/importar/',
+            {'archivo': SimpleUploadedFile('estudiantes.csv', contenido, content_type='text/csv'), 'lote': lote},
+            HTTP_AUTHORIZATION=f'Token {self.token.key}'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        return [json.loads(linea) for linea in b''.join(respuesta.streaming_content).splitlines()]
+
+    def test_importa_en_streaming_sin_pool_de_procesos(self):
+        contenido = (
+            'nombre1,apellido1,correo\n'
+            'Ana,Pérez,ana@example.com\n'
+            'Eva,Díaz,EVA@example.com\n'
+            'Luis,,luis@example.com\n'
+            'Ana,Pérez,ana@example.com\n'
+        ).encode()
+        with mock.patch('api.importacion.ProcessPoolExecutor') as pool:
+            lineas = self.importar(contenido)
+        pool.assert_not_called()
+
+        final = lineas[-1]
+        self.assertTrue(final['terminado'])
+        self.assertEqual((final['procesadas'], final['creados']), (4, 2))
+        self.assertEqual([error['linea'] for error in final['errores']], [4, 5])
+        self.assertEqual(
+            set(Persona.objects.values_list('correo', flat=True)), {'ana@example.com', 'eva@example.com'}
+        )
+        self.assertEqual(Token.objects.filter(user__persona__isnull=False).count(), 2)
+
+    def test_utf8_invalido_a_la_mitad_cierra_con_error(self):
+        filas = ''.join(f'Nombre{i},Apellido{i},e{i}@example.com\n' for i in range(400))
+        contenido = f'nombre1,apellido1,correo\n{filas}'.encode() + b'Mal\xff,Dato,mal@example.com\n'
+        lineas = self.importar(contenido, lote=100)
+
+        final = lineas[-1]
+        self.assertFalse(final['terminado'])
+        self.assertIn('UTF-8', final['error'])
+        # Los lotes completos antes del error quedan guardados
+        self.assertEqual(final['creados'], Persona.objects.count())
+        self.assertGreater(final['creados'], 0)
+
+    def test_conflicto_en_el_lote_reintenta_fila_por_fila(self):
+        Persona.objects.create(
+            user=User.objects.create_user('previo', 'b@example.com', 'Secret123!'),
+            nombre1='EVA', apellido1='DIAZ', correo='b@example.com'
+        )
+        filas = [
+            (linea, {'nombre1': n, 'apellido1': 'RUIZ', 'nombre2': '', 'apellido2': '', 'correo': correo,
+                     'cedula': '', 'telefono': '', 'password': ''})
+            for linea, (n, correo) in enumerate([('ANA', 'a@example.com'), ('EVA', 'b@example.com'),
+                                                  ('LUIS', 'c@example.com')], start=2)
+        ]
+        # Simula el registro concurrente: el correo no existía al validar el lote
+        with mock.patch.object(ImportacionEstudiantesService, 'correos_existentes', return_value=set()):
+            creados, errores = ImportacionEstudiantesService.importar_lote(filas, None)
+
+        self.assertEqual(creados, 2)
+        self.assertEqual([linea for linea, _ in errores], [3])
+        self.assertEqual(
+            set(Persona.objects.values_list('correo', flat=True)), {'a@example.com', 'b@example.com', 'c@example.com'}
+        )
+
+
+class ReporteExamenesTests(TestCase):
+    """Reporte de exámenes: NDJSON, paginación por cursor, métricas y formatos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('admin', 'admin@example.com', 'Secret123!', is_staff=True)
+        cls.user = User.objects.create_user('estudiante', 'estudiante@example.com', 'Secret123!')
+        cls.persona = Persona.objects.create(user=cls.user, nombre1='ANA', apellido1='PEREZ', apellido2='LOPEZ')
+        cls.completado = EstadoExamen.objects.create(nombre=ESTADO_COMPLETADO)
+        azar = random.Random(11)
+        for i in range(7):
+            examen = Examen.objects.create(
+                persona=cls.persona, titulo=f'Examen {i}', estado=cls.completado if i % 2 else None,
+                calificacion=i * 10, puntaje_maximo=Decimal('10')
+            )
+            for j in range(azar.randint(1, 3)):
+                pregunta = Pregunta.objects.create(examen=examen, enunciado=f'P{j}', puntaje=Decimal('1.5'))
+                for k in range(azar.randint(1, 3)):
+                    Respuesta.objects.create(
+                        pregunta=pregunta, texto=f'R{k}', es_correcta=k == 0, puntaje=Decimal('0.5')
+                    )
+        cls.token = Token.objects.create(user=cls.user)
+        cls.token_staff = Token.objects.create(user=cls.staff)
+        # Empates en created_at: el cursor desempata por id
+        Examen.objects.filter(titulo__in=['Examen 2', 'Examen 3', 'Examen 4']).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+
+    def setUp(self):
+        catalogos.invalidar()
+        catalogos.precargar()
+
+    def reporte(self, **params):
+        headers = {clave: params.pop(clave) for clave in list(params) if clave.startswith('HTTP_')}
+        request = APIRequestFactory().get('/api/examenes/reporte/', params, **headers)
+        force_authenticate(request, user=self.staff)
+        return exam_report_view(request)
+
+    def test_ndjson_un_examen_por_linea_y_registro_final(self):
+        completo = json.loads(self.reporte().content)
+        with mock.patch('api.examen.NDJSON_CHUNK_SIZE', 3), CaptureQueriesContext(connection) as consultas:
+            response = self.reporte(formato='ndjson')
+            lineas = [json.loads(linea) for linea in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertTrue(response.has_header('ETag'))
+        *examenes, final = lineas
+        self.assertEqual([linea['examen'] for linea in examenes], completo['examenes'])
+        self.assertEqual(final['metadata']['total_records'], 7)
+        self.assertEqual(final['statistics'], completo['statistics'])
+        self.assertEqual(final['summary'], completo['summary'])
+        # Las preguntas se cargan por bloque de exámenes: 7 exámenes en bloques de 3
+        preguntas = [q for q in consultas.captured_queries if q['sql'].startswith('SELECT "api_pregunta"."id"')]
+        self.assertEqual(len(preguntas), 3)
+
+    def recorrer(self, pagina, **params):
+        """Ids de todas las páginas siguiendo el cursor ``next``"""
+        ids, cursor = [], None
+        while True:
+            response = pagina(**params, **({'cursor': cursor} if cursor else {}))
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content)
+            self.assertLessEqual(len(data['examenes']), params['page_size'])
+            ids += [examen['id'] for examen in data['examenes']]
+            cursor = data['next'] if 'next' in data else data['pagination']['next']
+            if not cursor:
+                return ids
+
+    def mainview(self, **params):
+        request = APIRequestFactory().get('/api/mainview/', params)
+        force_authenticate(request, user=self.user)
+        return get_examenes(request)
+
+    def test_cursor_recorre_todas_las_paginas_sin_repetir(self):
+        esperado = list(Examen.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        for nombre, pagina in (('mainview', self.mainview), ('reporte', self.reporte)):
+            for serializer in ('orm', 'values'):
+                with self.subTest(nombre, serializer=serializer):
+                    self.assertEqual(self.recorrer(pagina, page_size=2, serializer=serializer), esperado)
+
+    def test_cursor_invalido(self):
+        for cursor in ('no-es-base64', 'WzEsMl0'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.reporte(cursor=cursor).status_code, 400)
+                self.assertEqual(self.mainview(cursor=cursor).status_code, 400)
+
+    def test_metricas_con_subconsultas_igual_al_agregado_anterior(self):
+        examenes = Examen.objects.order_by('id')
+        nuevas = list(examenes.annotate(**ExamReportService.exam_metrics_annotations()))
+        # Agregado anterior con JOIN examen × pregunta × respuesta y DISTINCT
+        anteriores = list(examenes.annotate(
+            total_preguntas=Count('preguntas', distinct=True),
+            total_respuestas=Count('preguntas__respuestas', distinct=True),
+            respuestas_correctas=Count(
+                'preguntas__respuestas', filter=Q(preguntas__respuestas__es_correcta=True), distinct=True
+            ),
+            puntaje_total_preguntas=Coalesce(Sum('preguntas__puntaje'), Decimal('0.00')),
+            puntaje_total_respuestas=Coalesce(Sum('preguntas__respuestas__puntaje'), Decimal('0.00')),
+        ))
+        inflados = 0
+        for nueva, anterior in zip(nuevas, anteriores):
+            with self.subTest(examen=nueva.titulo):
+                preguntas = list(nueva.preguntas.prefetch_related('respuestas'))
+                for campo in ('total_preguntas', 'total_respuestas', 'respuestas_correctas', 'puntaje_total_respuestas'):
+                    self.assertEqual(getattr(nueva, campo), getattr(anterior, campo))
+                self.assertEqual(nueva.puntaje_total_preguntas, sum(p.puntaje for p in preguntas))
+                # El SUM sobre el JOIN multiplica el puntaje de cada pregunta por sus respuestas
+                inflados += anterior.puntaje_total_preguntas != nueva.puntaje_total_preguntas
+                self.assertEqual(anterior.puntaje_total_preguntas, sum(p.puntaje * len(p.respuestas.all()) for p in preguntas))
+        self.assertGreater(inflados, 0)
+
+    def test_negociacion_del_formato(self):
+        casos = [
+            (None, JSON),
+            ('*/*', JSON),
+            ('text/html', JSON),
+            ('application/msgpack', MSGPACK),
+            ('application/x-msgpack, application/json;q=0.5', MSGPACK),
+            ('application/json, application/msgpack', JSON),
+            ('application/msgpack;q=0, */*', JSON),
+        ]
+        for accept, formato in casos:
+            with self.subTest(accept=accept):
+                self.assertEqual(negociar(accept), formato if msgpack is not None else JSON)
+
+    @skipIf(msgpack is None, 'msgpack no instalado')
+    def test_msgpack_igual_al_json_compacto(self):
+        json_ = self.reporte()
+        self.assertNotIn(b'\n', json_.content)
+        response = self.reporte(HTTP_ACCEPT=MSGPACK)
+        self.assertEqual(response['Content-Type'], MSGPACK)
+        self.assertIn('Accept', response['Vary'])
+        datos = msgpack.unpackb(response.content, raw=False)
+        esperado = json.loads(json_.content)
+        # generated_at cambia en cada respuesta
+        for reporte in (datos, esperado):
+            reporte['metadata'].pop('generated_at')
+        self.assertEqual(datos, esperado)
+
+    def test_compresion_segun_accept_encoding(self):
+        plano = self.reporte().content
+        self.assertGreater(len(plano), 1024)
+
+        response = self.reporte(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.content))['examenes'], json.loads(plano)['examenes'])
+
+        if brotli is not None:
+            response = self.reporte(HTTP_ACCEPT_ENCODING='gzip, br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertEqual(json.loads(brotli.decompress(response.content))['examenes'], json.loads(plano)['examenes'])
+
+        # Las respuestas pequeñas van sin comprimir
+        self.assertEqual(comprimir_respuesta(b'{}', 'gzip, br'), (b'{}', None))
+
+    async def test_vistas_async_igual_a_las_sincronicas(self):
+        async def get(url, token, **params):
+            return await self.async_client.get(url, params, headers={'Authorization': f'Token {token.key}'})
+
+        params = {'serializer': 'values', 'page_size': 3}
+        vistas = [
+            ('/api/async/mainview/', self.token, self.mainview),
+            ('/api/async/examenes/reporte/', self.token_staff, self.reporte),
+        ]
+        for url, token, sincronica in vistas:
+            with self.subTest(url=url):
+                response = await get(url, token, **params)
+                self.assertEqual(response.status_code, 200)
+                asincrono = json.loads(response.content)
+                esperado = json.loads((await sync_to_async(sincronica)(**params)).content)
+                for reporte in (asincrono, esperado):
+                    reporte.get('metadata', {}).pop('generated_at', None)
+                self.assertEqual(asincrono, esperado)
+
+                cursor = asincrono.get('next') or asincrono['pagination']['next']
+                siguiente = json.loads((await get(url, token, cursor=cursor, **params)).content)
+                self.assertEqual(siguiente['examenes'], json.loads(
+                    (await sync_to_async(sincronica)(cursor=cursor, **params)).content
+                )['examenes'])
+                self.assertEqual((await get(url, token, cursor='no-es-base64')).status_code, 400)
+
+        self.assertEqual((await self.async_client.get('/api/async/mainview/')).status_code, 401)
+        self.assertEqual((await get('/api/async/examenes/reporte/', self.token)).status_code, 403)
+
+
+class ComandosRendimientoTests(TestCase):
+    """Comandos de diagnóstico sobre datos sintéticos pequeños"""
+
+    def setUp(self):
+        catalogos.invalidar()
+
+    def test_explicar_consultas(self):
+        salida = io.StringIO()
+        call_command('explicar_consultas', sinteticos=20, stdout=salida)
+        texto = salida.getvalue()
+        self.assertIn('mainview: validador del ETag', texto)
+        self.assertIn('reporte: primera página', texto)
+        self.assertIn(f'Motor: {connection.vendor}', texto)
+        # Los datos sintéticos se revierten al terminar
+        self.assertFalse(Examen.objects.exists())
+
+    def test_datos_sinteticos_deterministas_y_benchmark(self):
+        opciones = {'examenes': 12, 'personas': 3, 'preguntas': 2, 'respuestas': 3, 'semilla': 7, 'stdout': io.StringIO()}
+        call_command('generar_datos_sinteticos', **opciones)
+        primera = list(Examen.objects.order_by('titulo').values_list('titulo', 'calificacion', 'fecha_examen'))
+        self.assertEqual((len(primera), Pregunta.objects.count(), Respuesta.objects.count()), (12, 24, 72))
+        self.assertEqual(EstadisticasPersonaService.drift(), {})
+
+        call_command('generar_datos_sinteticos', limpiar=True, **opciones)
+        self.assertEqual(
+            list(Examen.objects.order_by('titulo').values_list('titulo', 'calificacion', 'fecha_examen')), primera
+        )
+
+        with tempfile.TemporaryDirectory() as directorio:
+            anterior, actual = f'{directorio}/anterior.json', f'{directorio}/actual.json'
+            call_command('benchmark_reporte', repeticiones=1, page_size=5, salida=anterior, stdout=io.StringIO())
+            salida = io.StringIO()
+            call_command('benchmark_reporte', repeticiones=1, page_size=5, salida=actual, comparar=anterior, stdout=salida)
+            with open(actual, encoding='utf-8') as archivo:
+                resultado = json.load(archivo)
+
+        self.assertEqual(resultado['datos'], {'examenes': 12, 'preguntas': 24, 'respuestas': 72})
+        self.assertEqual(len(resultado['casos']), 5)
+        for nombre, medicion in resultado['casos'].items():
+            with self.subTest(nombre):
+                # La página ya viene con sus prefetch: serializarla no consulta
+                if nombre.startswith('serialize_exam_data'):
+                    self.assertEqual(medicion['consultas'], 0)
+                else:
+                    self.assertGreater(medicion['consultas'], 0)
+                self.assertGreaterEqual(medicion['mediana_ms'], medicion['min_ms'])
+        self.assertIn('Comparación con', salida.getvalue())
@@ -0,0 +1,228 @@
+import os
+import random
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .catalogos import catalogos
+from .ingesta import IngestaGeneracionService
+from .models import TrabajoGeneracion, GeneracionIA, AreaEstudio
+
+# Espera antes de reintentar: BACKOFF_BASE * 2^(intento - 1) segundos, como máximo BACKOFF_MAXIMO
+BACKOFF_BASE = 5
+BACKOFF_MAXIMO = 300
+
+# Un trabajo en curso por más de este tiempo se considera abandonado (worker caído)
+TIMEOUT_EN_CURSO = timedelta(minutes=10)
+
+# Resultado de ``procesar`` cuando el trabajo dejó de ser de este worker (se recuperó
+# como abandonado mientras se generaba): no se guarda nada
+PERDIDO = 'lost'
+
+
+class TrabajoPerdido(Exception):
+    """El trabajo ya no está en curso a nombre de este worker"""
+
+
+class GeneradorStub:
+    """
+    Generador local que no llama a ningún modelo de IA
+
+    Devuelve un examen sintético con el formato de ``ESQUEMA_EXAMEN``. Sirve para
+    desarrollo y para pruebas de carga del worker sin conexión. La latencia y la
+    tasa de fallos se configuran con ``GENERADOR_STUB_LATENCIA`` (segundos) y
+    ``GENERADOR_STUB_FALLOS`` (0 a 1).
+    """
+
+    def __init__(self):
+        self.latencia = float(getattr(settings, 'GENERADOR_STUB_LATENCIA', 0))
+        self.fallos = float(getattr(settings, 'GENERADOR_STUB_FALLOS', 0))
+        self.preguntas = int(getattr(settings, 'GENERADOR_STUB_PREGUNTAS', 10))
+
+    def generar(self, trabajo):
+        if self.latencia:
+            time.sleep(self.latencia)
+        if self.fallos and random.random() < self.fallos:
+            raise RuntimeError('Fallo simulado del generador')
+
+        area = catalogos.get(AreaEstudio, trabajo.area_id)
+        tema = trabajo.temas.nombre if trabajo.temas_id else None
+        titulo = ' - '.join(n for n in (area.nombre if area else None, tema) if n) or 'Examen generado'
+        return {
+            'titulo': titulo,
+            'descripcion': f'Examen generado para el trabajo {trabajo.id}',
+            'duracion_minutos': 5 * self.preguntas,
+            'preguntas': [
+                {
+                    'enunciado': f'Pregunta {i + 1} de {titulo}',
+                    'puntaje': 1,
+                    'respuestas': [
+                        {'texto': f'Opción {chr(65 + j)}', 'es_correcta': j == 0, 'justificacion': None}
+                        for j in range(4)
+                    ],
+                }
+                for i in range(self.preguntas)
+            ],
+        }
+
+
+def obtener_generador():
+    """Instancia del generador configurado en ``EXAM_GENERATOR_BACKEND``"""
+    return import_string(settings.EXAM_GENERATOR_BACKEND)()
+
+
+def nombre_worker():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+class TrabajoGeneracionService:
+    """
+    Cola de trabajos de generación de exámenes guardada en la base de datos
+
+    La API encola y responde de inmediato; los workers reclaman trabajos con
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` (varios workers no bloquean entre sí
+    ni toman el mismo trabajo), llaman al generador y convierten el resultado
+    en examen con ``IngestaGeneracionService``.
+    """
+
+    @staticmethod
+    def encolar(persona_id, area_id, tema_id=None, nivel_id=None):
+        return TrabajoGeneracion.objects.create(
+            persona_id=persona_id, area_id=area_id, temas_id=tema_id, nivel_id=nivel_id
+        )
+
+    @staticmethod
+    def reclamar(worker, cantidad=1):
+        """
+        Marca como en curso hasta ``cantidad`` trabajos disponibles
+
+        Returns:
+            Lista de TrabajoGeneracion reclamados por ``worker``
+        """
+
+        ahora = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                TrabajoGeneracion.objects.select_for_update(skip_locked=True)
+                .filter(estado=TrabajoGeneracion.PENDIENTE, disponible_en__lte=ahora)
+                .order_by('disponible_en', 'id')
+                .values_list('id', flat=True)[:cantidad]
+            )
+            if not ids:
+                return []
+            TrabajoGeneracion.objects.filter(id__in=ids, estado=TrabajoGeneracion.PENDIENTE).update(
+                estado=TrabajoGeneracion.EN_CURSO, worker=worker, iniciado_en=ahora, updated_at=ahora,
+                intentos=F('intentos') + 1
+            )
+        # Solo los que efectivamente quedaron a nombre de este worker
+        return list(
+            TrabajoGeneracion.objects.select_related('temas')
+            .filter(id__in=ids, estado=TrabajoGeneracion.EN_CURSO, worker=worker, iniciado_en=ahora)
+        )
+
+    @staticmethod
+    def backoff(intentos):
+        """Segundos de espera antes del siguiente intento (exponencial con jitter)"""
+        espera = min(BACKOFF_BASE * 2 ** max(intentos - 1, 0), BACKOFF_MAXIMO)
+        return espera * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def reclamado(trabajo):
+        """Trabajos que siguen en curso a nombre del worker y del intento de ``trabajo``"""
+        return TrabajoGeneracion.objects.filter(
+            pk=trabajo.pk, estado=TrabajoGeneracion.EN_CURSO,
+            worker=trabajo.worker, iniciado_en=trabajo.iniciado_en
+        )
+
+    @classmethod
+    def procesar(cls, trabajo, generador):
+        """
+        Ejecuta un trabajo reclamado
+
+        El cierre es un compare-and-set sobre (pk, estado en curso, worker, iniciado_en):
+        si ``recuperar_abandonados`` devolvió el trabajo a la cola mientras se generaba,
+        no se crea la generación ni el examen (los creará quien lo reclame de nuevo).
+
+        Returns:
+            El estado final del trabajo (COMPLETADO, PENDIENTE si se reintentará, o
+            FALLIDO), o PERDIDO si ya no era de este worker
+        """
+
+        try:
+            resultado = generador.generar(trabajo)
+            with transaction.atomic():
+                # Bloquea el trabajo: la recuperación espera a que esta transacción termine
+                if not cls.reclamado(trabajo).select_for_update().exists():
+                    raise TrabajoPerdido
+                generacion = GeneracionIA.objects.create(
+                    persona_id=trabajo.persona_id,
+                    area_id=trabajo.area_id,
+                    temas_id=trabajo.temas_id,
+                    nivel_id=trabajo.nivel_id,
+                    resultado=resultado,
+                )
+                IngestaGeneracionService.ingestar(generacion)
+                ahora = timezone.now()
+                if not cls.reclamado(trabajo).update(
+                    estado=TrabajoGeneracion.COMPLETADO, generacion=generacion,
+                    terminado_en=ahora, updated_at=ahora, error=''
+                ):
+                    raise TrabajoPerdido
+            return TrabajoGeneracion.COMPLETADO
+        except TrabajoPerdido:
+            return PERDIDO
+        except Exception as ex:
+            return cls.fallar(trabajo, ex)
+
+    @classmethod
+    def fallar(cls, trabajo, error):
+        # ``intentos`` ya incluye el intento actual (se incrementa al reclamar)
+        intentos = trabajo.intentos
+        ahora = timezone.now()
+        if intentos >= trabajo.max_intentos:
+            estado, cambios = TrabajoGeneracion.FALLIDO, {'terminado_en': ahora}
+        else:
+            estado, cambios = TrabajoGeneracion.PENDIENTE, {
+                'disponible_en': ahora + timedelta(seconds=cls.backoff(intentos))
+            }
+        if not cls.reclamado(trabajo).update(
+            estado=estado, error=f'{type(error).__name__}: {error}',
+            updated_at=ahora, **cambios
+        ):
+            return PERDIDO
+        return estado
+
+    @staticmethod
+    def recuperar_abandonados(timeout=TIMEOUT_EN_CURSO):
+        """
+        Devuelve a la cola los trabajos en curso de workers que dejaron de responder
+
+        Los que ya agotaron sus intentos quedan como fallidos.
+
+        Returns:
+            Cantidad de trabajos recuperados
+        """
+        ahora = timezone.now()
+        abandonados = TrabajoGeneracion.objects.filter(
+            estado=TrabajoGeneracion.EN_CURSO, iniciado_en__lt=ahora - timeout
+        )
+        abandonados.filter(intentos__gte=F('max_intentos')).update(
+            estado=TrabajoGeneracion.FALLIDO, terminado_en=ahora, updated_at=ahora,
+            error='Tiempo de ejecución agotado'
+        )
+        return abandonados.update(estado=TrabajoGeneracion.PENDIENTE, disponible_en=ahora, updated_at=ahora)
+
+    @staticmethod
+    def estado(trabajo_id, user_id):
+        """Estado de un trabajo de la persona del usuario (una consulta), o None"""
+        return TrabajoGeneracion.objects.filter(id=trabajo_id, persona__user_id=user_id).values(
+            'id', 'estado', 'intentos', 'error', 'created_at', 'terminado_en',
+            examen_id=F('generacion__examen_id')
+        ).first()
@@ -1,8 +1,22 @@
 from django.urls import path, re_path
-from . import signup, login, mainview
+from . import signup, login, mainview, examen, detalle, exportacion, generacion, asincrono, estudiantes
 
 urlpatterns = [
     re_path(r'^signup/$', signup.create_user, name='signup'),
     re_path(r'^auth/login/$', login.login_user, name='login'),
+    re_path(r'^auth/logout/$', login.logout_user, name='logout'),
     re_path(r'^mainview/$', mainview.get_examenes, name='get_examenes'),
+    re_path(r'^examenes/reporte/$', examen.exam_report_view, name='exam_report_all'),
+    re_path(r'^examenes/reporte/(?P<exam_id>\d+)/$', examen.exam_report_view, name='exam_report_single'),
+    re_path(r'^examenes/estadisticas/$', examen.exam_statistics_view, name='exam_statistics'),
+    re_path(r'^examenes/exportar/$', exportacion.exportar_examenes, name='exportar_examenes'),
+    re_path(r'^examenes/(?P<exam_id>\d+)/$', detalle.get_examen_detalle, name='examen_detalle'),
+    # VERSIONES ASYNC PARA DESPLIEGUES ASGI
+    re_path(r'^async/mainview/$', asincrono.get_examenes_async, name='get_examenes_async'),
+    re_path(r'^async/examenes/reporte/$', asincrono.exam_report_async, name='exam_report_all_async'),
+    re_path(r'^async/examenes/reporte/(?P<exam_id>\d+)/$', asincrono.exam_report_async, name='exam_report_single_async'),
+    re_path(r'^generaciones/$', generacion.solicitar_generacion, name='solicitar_generacion'),
+    re_path(r'^generaciones/(?P<trabajo_id>\d+)/$', generacion.estado_generacion, name='estado_generacion'),
+    re_path(r'^generaciones-ia/(?P<generacion_id>\d+)/resultado/$', generacion.resultado_generacion, name='resultado_generacion'),
+    re_path(r'^estudiantes/importar/$', estudiantes.importar_estudiantes, name='importar_estudiantes'),
 ]
\ No newline at end of file
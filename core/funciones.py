@@ -1,23 +1,66 @@
+import re
+
 import unidecode
 from django.contrib.auth.models import User
+from django.db.models import Q
 
-def generarUsername(nombre, apellido):
+# LONGITUD MÁXIMA DE auth_user.username
+USERNAME_MAX = 150
+
+
+def baseUsername(nombre, apellido):
     """
-    Genera un nombre de usuario a partir de su nombre y apellido
+    Username base a partir de su nombre y apellido (sin verificar que esté libre)
     # NOMBRE = OSCAR
     # APELLIDO = MORÁN
     # GENERAMOS UN NOMBRE DE USUARIO CON EL FORMATO: omoranr
     """
-    try:
-        nombre = nombre.lower()
-        apellido = apellido.lower()
-        username = f"{nombre[0]}{apellido}{nombre[-1]}"
-        return username
-    except Exception:
-        # Si ocurre un error, devolvemos un nombre de usuario por defecto con un número de registro
-        # user_default_1 en caso de ser el primer usuario por default, user_default_2 en caso de ser el segundo, etc.
-        cantidad = User.objects.filter(username__startswith='user_default_').count()
-        return f'user_default_{cantidad + 1}'
+    nombre = re.sub(r'[^a-z0-9]', '', unidecode.unidecode(nombre or '').lower())
+    apellido = re.sub(r'[^a-z0-9]', '', unidecode.unidecode(apellido or '').lower())
+    if not nombre or not apellido:
+        return 'user_default'
+    return f"{nombre[0]}{apellido}{nombre[-1]}"[:USERNAME_MAX - 6]
+
+
+def asignarUsernames(bases):
+    """
+    Asigna usernames únicos para una lista de bases, con una sola consulta
+
+    Busca de una vez los usernames existentes que empiezan con cada base y asigna
+    la base libre o la base con el primer sufijo numérico libre (omoranr, omoranr2,
+    omoranr3...). Las bases repetidas dentro de la lista reciben sufijos distintos.
+
+    Returns:
+        Lista de usernames en el mismo orden que ``bases``
+    """
+    distintas = set(bases)
+    if not distintas:
+        return []
+
+    filtro = Q()
+    for base in distintas:
+        filtro |= Q(username__startswith=base)
+    ocupados = set(User.objects.filter(filtro).values_list('username', flat=True))
+
+    usernames = []
+    siguiente = {}
+    for base in bases:
+        numero = siguiente.get(base, 1)
+        username = base if numero == 1 else f'{base}{numero}'
+        while username in ocupados:
+            numero += 1
+            username = f'{base}{numero}'
+        ocupados.add(username)
+        siguiente[base] = numero + 1
+        usernames.append(username)
+    return usernames
+
+
+def generarUsername(nombre, apellido):
+    """
+    Genera un nombre de usuario libre a partir de su nombre y apellido (omoranr, omoranr2...)
+    """
+    return asignarUsernames([baseUsername(nombre, apellido)])[0]
 
 def normalizarTexto(texto):
     """
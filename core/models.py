@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
 from cities_light.models import Country, Region, City
 
@@ -34,5 +35,11 @@ class Persona(BaseModel):
     ciudad = models.ForeignKey(City, on_delete=models.SET_NULL, null=True)
     cedula = models.CharField(max_length=10, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            # EL CORREO ES ÚNICO SIN DISTINGUIR MAYÚSCULAS; EL ÍNDICE SE USA EN EL LOGIN (correo__iexact)
+            models.UniqueConstraint(Upper('correo'), name='persona_correo_upper_unique'),
+        ]
+
     def __str__(self):
         return f"{self.nombre1} {self.apellido1} {self.apellido2} ({self.user.username})"
\ No newline at end of file
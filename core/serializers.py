@@ -49,10 +49,7 @@ class UserCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError("Debes aceptar los términos y condiciones")
         return value
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("El correo electrónico ya está en uso")
-        return value
+    # LA UNICIDAD DEL CORREO LA GARANTIZA EL ÍNDICE ÚNICO DE Persona.correo (VER api/signup.py)
 
 class UserLoginSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)